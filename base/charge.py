@@ -2,7 +2,6 @@ import sympy
 from utility.logger import LoggerIfc
 from reactor.capacitor import Capacitor
 from reactor.ac_voltage_source import VoltageSource
-from matplotlib import pyplot as plt
 import numpy as np
 
 class Charge:
@@ -118,6 +117,8 @@ class Charge:
 
         Note: This function requires the 'numpy' and 'matplotlib' libraries to be installed.
         """
+        from matplotlib import pyplot as plt
+
         self.__log.debug("Plotting Lissajous curve with parameters: amplitudeXAsixOscillation = " + str(amplitudeXAsixOscillation) + ", amplitudeYAsixOscillation = " + str(amplitudeYAsixOscillation) + ", angularFrequencyX = " + str(angularFrequencyX) + ", angularFrequencyY = " + str(angularFrequencyY) + ", phaseDifference = " + str(phaseDifference))
         timeValues = np.linspace(0, 2 * np.pi, 10_000)
 
@@ -0,0 +1,270 @@
+import numpy as np
+from utility.logger import LoggerIfc
+from utility.streaming_histogram import StreamingHistogram
+
+
+class DischargeEventDetector:
+    """
+    Streaming detector of micro-discharge current pulses with running event statistics.
+
+    Methods:
+    - __init__(voltageSrc, threshold: float, releaseThreshold: float = None, maxCharge: float = 1e-9, chargeBins: int = 256, phaseBins: int = 72, maxEventsPerHalfCycle: int = 64): Initialize a DischargeEventDetector instance.
+    - process(results, baseline=None): Detect the events of one chunk of SimulationResults and add them to the statistics.
+    - run(chunks): Process a whole stream of chunks, e.g. from Reactor.simulateChunks, and finish it.
+    - finish(): Count the event and the half-cycle still open at the end of the stream.
+    - getStatistics(): Get the accumulated event statistics.
+
+    An event starts where the magnitude of the intensity (minus an optional baseline such as the displacement current)
+    rises to threshold and ends where it falls below releaseThreshold; the gap between the two thresholds is a
+    hysteresis band that keeps noise on a pulse flank from splitting it into several events. Detection, the charge of
+    every pulse (np.add.reduceat over the samples of each pulse) and its peak current are computed with whole-chunk
+    array operations.
+
+    Every event is binned by the phase of the voltage source at its start and by the half-cycle it starts in, both
+    taken from the source (getPhase() and getHalfCycle()), so a BurstVoltageSource whose carrier restarts with every
+    burst is binned by its carrier phase. A bare frequency stands for a continuous sinusoid, frequency * t mod 2 pi in
+    the angular convention of VoltageSource. Only histograms are kept: events and charge per
+    phase bin, the distribution of the charge per event and the distribution of the number of events per half-cycle,
+    so memory does not grow with the number of cycles. A pulse or a half-cycle that spans a chunk boundary is carried
+    over to the next chunk.
+
+    Note: This class assumes the existence of the LoggerIfc and StreamingHistogram classes and the numpy library.
+    """
+    def __init__(self, voltageSrc, threshold : float, releaseThreshold : float = None, maxCharge : float = 1e-9,
+                 chargeBins : int = 256, phaseBins : int = 72, maxEventsPerHalfCycle : int = 64) -> None:
+        """
+        Initialize a DischargeEventDetector instance.
+
+        Parameters:
+        - voltageSrc: The voltage source, e.g. a VoltageSource or a BurstVoltageSource, or just its frequency in the
+          convention of VoltageSource.getFrequency() for a continuous sinusoid. A source without getPhase() and
+          getHalfCycle() (e.g. a MeasuredVoltageSource) is treated as a continuous sinusoid of its getFrequency(), with
+          a warning.
+        - threshold: The current magnitude in mA at which an event starts.
+        - releaseThreshold: The current magnitude in mA below which an event ends (default: threshold / 2).
+        - maxCharge: The upper limit in C of the charge-per-event histogram (default: 1e-9).
+        - chargeBins: The number of bins of the charge-per-event histogram (default: 256).
+        - phaseBins: The number of phase bins over one period (default: 72).
+        - maxEventsPerHalfCycle: The number of bins of the events-per-half-cycle histogram; larger counts are counted in
+          the last bin (default: 64).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If releaseThreshold is larger than threshold.
+        """
+        self.__log = LoggerIfc("DischargeEventDetector")
+        self.__source = None
+        if np.isscalar(voltageSrc):
+            self.__frequency = float(voltageSrc)
+        elif hasattr(voltageSrc, "getPhase") and hasattr(voltageSrc, "getHalfCycle"):
+            self.__source = voltageSrc
+        else:
+            self.__frequency = float(voltageSrc.getFrequency())
+            self.__log.warning(f"{type(voltageSrc).__name__} has no phase, binning by the continuous phase of {self.__frequency}")
+        self.__threshold = float(threshold)
+        self.__release = float(releaseThreshold) if releaseThreshold is not None else self.__threshold / 2
+        if self.__release > self.__threshold:
+            raise ValueError("The release threshold must not be larger than the threshold")
+        self.__phaseBins = phaseBins
+        self.__maxEventsPerHalfCycle = maxEventsPerHalfCycle
+
+        self.__chargeHistogram = StreamingHistogram(0.0, maxCharge, 1, chargeBins)
+        self.__phaseCounts = np.zeros(phaseBins, dtype=np.int64)
+        self.__phaseCharge = np.zeros(phaseBins)
+        self.__halfCycleCounts = np.zeros(maxEventsPerHalfCycle + 1, dtype=np.int64)
+        self.__events = 0
+        self.__positiveEvents = 0
+        self.__totalCharge = 0.0
+        self.__peakCurrent = 0.0
+
+        self.__lastTime = None
+        self.__active = False
+        self.__pending = None
+        self.__halfCycle = None
+        self.__halfCycleEvents = 0
+
+    def __getPhase(self, time):
+        if self.__source is not None:
+            return self.__source.getPhase(time)
+        return self.__frequency * np.asarray(time, dtype=float)
+
+    def __getHalfCycle(self, time):
+        if self.__source is not None:
+            return self.__source.getHalfCycle(time)
+        return np.floor(self.__frequency * np.asarray(time, dtype=float) / np.pi).astype(np.int64)
+
+    def __record(self, start, charge, peak) -> None:
+        """
+        Add completed events, given by their start times, charges (C) and peak currents (mA), to the statistics.
+        """
+        if len(start) == 0:
+            return
+        angle = self.__getPhase(start)
+        phase = np.floor(np.mod(angle, 2 * np.pi) / (2 * np.pi) * self.__phaseBins).astype(np.int64) % self.__phaseBins
+        self.__phaseCounts += np.bincount(phase, minlength=self.__phaseBins)
+        self.__phaseCharge += np.bincount(phase, weights=np.abs(charge), minlength=self.__phaseBins)
+        self.__chargeHistogram.add(np.abs(charge))
+        self.__events += len(start)
+        self.__positiveEvents += int(np.count_nonzero(charge > 0))
+        self.__totalCharge += float(np.sum(np.abs(charge)))
+        self.__peakCurrent = max(self.__peakCurrent, float(np.max(peak)))
+
+    def __closeHalfCycles(self, start, limit : int) -> None:
+        """
+        Count the events per half-cycle for the half-cycles that are complete up to the half-cycle index limit.
+        """
+        index = self.__getHalfCycle(start) - self.__halfCycle
+        counts = np.bincount(index, minlength=limit - self.__halfCycle + 1)
+        counts[0] += self.__halfCycleEvents
+        closed = np.minimum(counts[:-1], self.__maxEventsPerHalfCycle)
+        self.__halfCycleCounts += np.bincount(closed, minlength=self.__maxEventsPerHalfCycle + 1)
+        self.__halfCycleEvents = int(counts[-1])
+        self.__halfCycle = limit
+
+    def process(self, results, baseline = None) -> None:
+        """
+        Detect the events of one chunk of SimulationResults and add them to the statistics.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - results: A SimulationResults chunk. Chunks must be processed in time order.
+        - baseline: An optional array of the same length as the chunk's time axis, in mA, subtracted from the intensity
+          before detection, e.g. the displacement current C_cell * dV/dt (default: None).
+
+        Returns:
+        None
+
+        The charge of a pulse is the sum of intensity * sample spacing over its samples.
+        """
+        fullTime = results.getTime()
+        if len(fullTime) == 0:
+            return
+        if self.__halfCycle is None:
+            self.__halfCycle = int(self.__getHalfCycle(fullTime[0]))
+
+        # Results with active windows only store the samples inside them; the idle samples carry no current, so they
+        # end every pulse and are skipped. A window that starts after an idle sample (not right after the previous
+        # window or at the first sample) resets the detector state, and a chunk that ends idle leaves no pulse open.
+        active = results.getActiveIndices()
+        windows = results.getActiveWindows()
+        time = fullTime[active]
+        step = np.diff(fullTime, prepend=fullTime[0] if self.__lastTime is None else self.__lastTime)[active]
+        reset = np.zeros(len(active), dtype=bool)
+        endsIdle = False
+        if windows is not None:
+            starts = np.cumsum(np.concatenate([[0], windows[:-1, 1] - windows[:-1, 0]])).astype(np.int64)
+            reset[starts[windows[:, 0] > np.concatenate([[0], windows[:-1, 1]])]] = True
+            endsIdle = len(windows) == 0 or windows[-1, 1] < len(fullTime)
+
+        current = results.getActiveIntensity() if baseline is None else results.getActiveIntensity() - np.asarray(baseline, dtype=float)[active]
+        magnitude = np.abs(current)
+
+        # Hysteresis: every sample above threshold or below the release threshold sets the state, samples in between
+        # keep the state of the last sample that set it. After an idle sample the state is inactive.
+        code = np.where(magnitude >= self.__threshold, 1, np.where(magnitude < self.__release, 0, -1))
+        code[reset & (code < 0)] = 0
+        last = np.maximum.accumulate(np.where(code >= 0, np.arange(len(code)), -1))
+        carried = self.__active and not (len(reset) and reset[0])
+        state = np.where(last >= 0, code[np.maximum(last, 0)] == 1, carried)
+
+        runStart, runCharge, runPeak = np.empty(0), np.empty(0), np.empty(0)
+        if len(state):
+            charge = current * step * 1e-3
+            previous = np.concatenate([[self.__active], state[:-1]])
+            bounds = np.flatnonzero((state != previous) | reset)
+            if len(bounds) == 0 or bounds[0] != 0:
+                bounds = np.concatenate([[0], bounds])
+            runs = state[bounds]
+            runCharge = np.add.reduceat(charge, bounds)[runs]
+            runPeak = np.maximum.reduceat(magnitude, bounds)[runs]
+            runStart = time[bounds][runs]
+
+        if self.__pending is not None:
+            # The pulse carried over from the previous chunk either continues in the first run of this chunk or ended
+            # exactly at the chunk boundary, in which case it is complete now.
+            pendingStart, pendingCharge, pendingPeak = self.__pending
+            if len(state) and state[0] and not reset[0]:
+                runStart[0] = pendingStart
+                runCharge[0] += pendingCharge
+                runPeak[0] = max(runPeak[0], pendingPeak)
+            else:
+                runStart = np.concatenate([[pendingStart], runStart])
+                runCharge = np.concatenate([[pendingCharge], runCharge])
+                runPeak = np.concatenate([[pendingPeak], runPeak])
+        self.__active = bool(len(state) and state[-1] and not endsIdle)
+        if self.__active:
+            self.__pending = (runStart[-1], runCharge[-1], runPeak[-1])
+            runStart, runCharge, runPeak = runStart[:-1], runCharge[:-1], runPeak[:-1]
+        else:
+            self.__pending = None
+
+        self.__record(runStart, runCharge, runPeak)
+        limit = int(self.__getHalfCycle(fullTime[-1]))
+        if self.__pending is not None:
+            limit = min(limit, int(self.__getHalfCycle(self.__pending[0])))
+        self.__closeHalfCycles(runStart, max(limit, self.__halfCycle))
+        self.__lastTime = fullTime[-1]
+
+    def run(self, chunks) -> dict:
+        """
+        Process a whole stream of chunks, e.g. from Reactor.simulateChunks, and finish it.
+
+        Parameters:
+        - chunks: An iterable of SimulationResults chunks.
+
+        Returns:
+        The statistics (see getStatistics).
+        """
+        for chunk in chunks:
+            self.process(chunk)
+        self.finish()
+        return self.getStatistics()
+
+    def finish(self) -> None:
+        """
+        Count the event and the half-cycle still open at the end of the stream.
+
+        Returns:
+        None
+        """
+        start = np.empty(0)
+        if self.__pending is not None:
+            start = np.array([self.__pending[0]])
+            self.__record(start, np.array([self.__pending[1]]), np.array([self.__pending[2]]))
+            self.__pending = None
+            self.__active = False
+        if self.__halfCycle is not None:
+            self.__closeHalfCycles(start, self.__halfCycle + 1)
+            self.__halfCycleEvents = 0
+        self.__log.info(f"Detected {self.__events} discharge events with a total charge of {self.__totalCharge}C")
+
+    def getStatistics(self) -> dict:
+        """
+        Get the accumulated event statistics.
+
+        Returns:
+        A dictionary with:
+        - "events", "positiveEvents", "negativeEvents": The event counts, by the sign of their current.
+        - "totalCharge", "meanCharge": The summed and the mean absolute charge per event in C.
+        - "peakCurrent": The largest pulse peak in mA.
+        - "chargeMedian", "chargePercentile95": Percentiles of the charge per event in C.
+        - "chargeHistogram", "chargeClipped": The counts of the charge-per-event histogram and the number of events
+          above its upper limit.
+        - "phaseEdges", "phaseCounts", "phaseCharge": The phase bin edges in radians and the event count and absolute
+          charge per phase bin.
+        - "halfCycles", "eventsPerHalfCycle": The number of completed half-cycles and the histogram of the number of
+          events per half-cycle (index = event count).
+        """
+        return {"events": self.__events, "positiveEvents": self.__positiveEvents,
+                "negativeEvents": self.__events - self.__positiveEvents, "totalCharge": self.__totalCharge,
+                "meanCharge": self.__totalCharge / self.__events if self.__events else 0.0,
+                "peakCurrent": self.__peakCurrent,
+                "chargeMedian": float(self.__chargeHistogram.percentile(50)[0]),
+                "chargePercentile95": float(self.__chargeHistogram.percentile(95)[0]),
+                "chargeHistogram": self.__chargeHistogram.getCounts()[:, 0].copy(),
+                "chargeClipped": self.__chargeHistogram.getClipped(),
+                "phaseEdges": np.linspace(0.0, 2 * np.pi, self.__phaseBins + 1),
+                "phaseCounts": self.__phaseCounts.copy(), "phaseCharge": self.__phaseCharge.copy(),
+                "halfCycles": int(np.sum(self.__halfCycleCounts)), "eventsPerHalfCycle": self.__halfCycleCounts.copy()}
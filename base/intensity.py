@@ -17,6 +17,7 @@ class Intensity:
     - substituteVoltage(vt: VoltageSource): Substitute the voltage in the intensity equation.
     - substituteCapacitance(capacitance: float): Substitute the capacitance in the intensity equation.
     - solve(time: np.ndarray): Solve the intensity equation for the given time values.
+    - evaluate(time: np.ndarray): Evaluate the intensity equation for a whole array of time values at once.
     - getSolutions(): Get the solved intensity values.
 
     Note: This class assumes the existence of LoggerIfc, Charge, and VoltageSource classes.
@@ -43,6 +44,7 @@ class Intensity:
         self.__log.debug("Intensity created with symbol: " + str(self.__symbol) + " and equation: " + str(self.__equation))
         self.__solutions = None
         self.__data = None
+        self.__evaluator = None
 
     def getSymbol(self):
         """
@@ -115,6 +117,7 @@ class Intensity:
         self.__log.debug("Substituting charge: " + str(qt.getSymbol()))
         self.__equation = self.__equation.subs(qt.getSymbol(), qt.getEquation().rhs)
         self.__log.debug("New equation: " + str(self.__equation))
+        self.__evaluator = None
     
     def substituteVoltage(self, vt : VoltageSource):
         """
@@ -135,6 +138,7 @@ class Intensity:
         self.__log.debug("Substituting voltage: " + str(vt.getSymbol()))
         self.__equation = self.__equation.subs(vt.getSymbol(), vt.getEquation())
         self.__log.debug("New equation: " + str(self.__equation))
+        self.__evaluator = None
 
     def substituteCapacitance(self, capacitance : float):
         """
@@ -155,6 +159,7 @@ class Intensity:
         self.__log.debug("Substituting capacitance: " + str(capacitance))
         self.__equation = self.__equation.subs("C_cell", capacitance)
         self.__log.debug("New equation: " + str(self.__equation))
+        self.__evaluator = None
 
     def solve(self, time : np.ndarray):
         """
@@ -177,6 +182,38 @@ class Intensity:
         self.__data = [next(iter(sol[0].values())) * 1e3 for sol in self.__solutions]
         return self.__data
 
+    def evaluate(self, time : np.ndarray):
+        """
+        Evaluate the intensity equation for a whole array of time values at once.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of intensity values in mA with the same shape as the time array.
+
+        This method performs the derivative in the right-hand side of the equation symbolically, compiles the result into
+        a numpy function on first use and evaluates it over the whole time array. It gives the same values as solve()
+        without running the symbolic solver once per sample. All symbols except 't' must have been substituted before.
+
+        Note: This method assumes the existence of the imported sympy and numpy libraries.
+        """
+        if self.__evaluator is None:
+            self.__evaluator = sympy.lambdify(sympy.Symbol('t'), self.__equation.rhs.doit(), "numpy")
+        time = np.asarray(time, dtype=float)
+        return np.broadcast_to(self.__evaluator(time), time.shape) * 1e3
+
+    def __getstate__(self):
+        """
+        Get the state used for pickling, e.g. when the instance is sent to a worker process.
+
+        The compiled numpy functions cannot be pickled; they are dropped here and recompiled on first use.
+        """
+        state = self.__dict__.copy()
+        state["_Intensity__evaluator"] = None
+        return state
+
     def getSolutions(self):
         """
         Get the solved intensity values.
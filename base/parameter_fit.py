@@ -0,0 +1,239 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import sympy
+from scipy.optimize import least_squares
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+from reactor.ac_voltage_source import VoltageSource
+from base.charge import Charge
+from base.intensity import Intensity
+
+
+class ParameterFit:
+    """
+    Fits the reactor capacitances and the voltage source parameters to measured V/I/Q traces.
+
+    Methods:
+    - __init__(dischargeThreshold: float = 0.1): Initialize a ParameterFit instance.
+    - fit(time, voltage, intensity=None, charge=None): Fit the parameters to one set of traces.
+    - fitFile(path: str, dischargeThreshold: float = 0.1): Load a measurement file and fit it.
+    - fitFiles(paths, processes: int = None, dischargeThreshold: float = 0.1): Fit many measurement files in parallel.
+    - loadMeasurement(path: str): Load a measurement file.
+
+    The model is the Charge -> Intensity chain of the Reactor with symbolic capacitances and source parameters:
+    V(t) = A * sin(f * (t + tau)) and i(t) = dQ/dt with Q = V * C. Outside discharges the cell behaves like C_cell, the
+    series combination of C_barrier and C_gap; while the gap conducts its voltage is clamped and the current is set by
+    C_barrier alone. Samples are classified as discharge samples where the measured current departs from the
+    displacement current by more than dischargeThreshold times the peak current, which is what makes C_barrier and
+    C_gap separately identifiable. Without discharge samples they are not: only C_cell is fitted then, and C_barrier
+    and C_gap are reported as NaN.
+
+    The residual and its Jacobian are derived symbolically once per process and compiled with common-subexpression
+    elimination into numpy functions, so every least-squares iteration is a handful of vectorized passes over the full
+    traces.
+
+    Note: This class assumes the existence of the LoggerIfc, Capacitor, VoltageSource, Charge and Intensity classes and
+    the numpy, sympy and scipy libraries.
+    """
+    PARAMETERS = ("C_barrier", "C_gap", "amplitude", "frequency", "timeOffset")
+    CLASSIFICATION_PASSES = 20
+    __model = None
+
+    def __init__(self, dischargeThreshold : float = 0.1) -> None:
+        """
+        Initialize a ParameterFit instance.
+
+        Parameters:
+        - dischargeThreshold: The deviation from the displacement current, relative to the peak current, above which a
+          sample counts as a discharge sample (default: 0.1).
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("ParameterFit")
+        self.__dischargeThreshold = dischargeThreshold
+
+    @staticmethod
+    def __compileModel():
+        """
+        Build the symbolic residual model from the Charge -> Intensity chain and compile it together with its Jacobian.
+        """
+        if ParameterFit.__model is None:
+            t = sympy.Symbol("t")
+            barrier, gap, amplitude, frequency, timeOffset, discharge = sympy.symbols("C_barrier C_gap A f tau d")
+            source = VoltageSource(amplitude, frequency)
+            cell = Capacitor(0.0, "C_cell")
+            charge = Charge("Q", source, cell)
+            intensity = Intensity(charge)
+            intensity.substituteCharge(charge)
+            intensity.substituteVoltage(source)
+
+            effective = (1 - discharge) * barrier * gap / (barrier + gap) + discharge * barrier
+            voltageExpr = source.getEquation().subs(t, t + timeOffset)
+            intensityExpr = (intensity.getRhsEquation().doit().subs(cell.getSymbol(), effective) * 1e3).subs(t, t + timeOffset)
+            parameters = [barrier, gap, amplitude, frequency, timeOffset]
+            expressions = [voltageExpr, intensityExpr]
+            expressions += [sympy.diff(voltageExpr, parameter) for parameter in parameters]
+            expressions += [sympy.diff(intensityExpr, parameter) for parameter in parameters]
+            ParameterFit.__model = sympy.lambdify([t, discharge] + parameters, expressions, "numpy", cse=True)
+        return ParameterFit.__model
+
+    def __initialGuess(self, time, voltage, intensity):
+        spectrum = np.abs(np.fft.rfft(voltage - np.mean(voltage)))
+        peak = int(np.argmax(spectrum[1:])) + 1
+        if 0 < peak < len(spectrum) - 1:
+            left, centre, right = np.log(spectrum[peak - 1:peak + 2] + np.finfo(float).tiny)
+            peak = peak + 0.5 * (left - right) / (left - 2 * centre + right)
+        frequency = 2 * np.pi * peak / (len(time) * np.mean(np.diff(time)))
+
+        basis = np.column_stack([np.sin(frequency * time), np.cos(frequency * time)])
+        (sine, cosine), _, _, _ = np.linalg.lstsq(basis, voltage, rcond=None)
+        amplitude = float(np.hypot(sine, cosine))
+        timeOffset = float(np.arctan2(cosine, sine) / frequency)
+
+        slope = amplitude * frequency * np.cos(frequency * (time + timeOffset)) * 1e3
+        def regression(mask):
+            return float(np.dot(slope[mask], intensity[mask]) / np.dot(slope[mask], slope[mask]))
+
+        everything = np.ones(len(time), dtype=bool)
+        cell, barrier = regression(everything), None
+        threshold = self.__dischargeThreshold * np.max(np.abs(intensity))
+        discharge = np.abs(intensity - cell * slope) > threshold
+        for _ in range(ParameterFit.CLASSIFICATION_PASSES):
+            if np.count_nonzero(discharge) < 2 or np.all(discharge):
+                break
+            cell, barrier = regression(~discharge), regression(discharge)
+            update = (np.abs(intensity - cell * slope) > threshold) & (np.abs(intensity - barrier * slope) < np.abs(intensity - cell * slope))
+            if np.array_equal(update, discharge):
+                break
+            discharge = update
+        if barrier is None or barrier <= cell:
+            self.__log.warning("No discharge samples found, C_barrier and C_gap are not identifiable and only C_cell is fitted")
+            return np.array([regression(everything), amplitude, frequency, timeOffset]), np.zeros(len(time)), False
+        gap = 1.0 / (1.0 / cell - 1.0 / barrier)
+        return np.array([barrier, gap, amplitude, frequency, timeOffset]), discharge.astype(float), True
+
+    def fit(self, time, voltage, intensity = None, charge = None) -> dict:
+        """
+        Fit the parameters to one set of traces.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: The sample times in seconds.
+        - voltage: The measured voltage in V.
+        - intensity: The measured current in mA (default: None).
+        - charge: The measured charge in C, used to derive the current when no intensity trace is given (default: None).
+
+        Returns:
+        A dictionary with the fitted C_cell, C_barrier, C_gap (F), amplitude (V), frequency and timeOffset (s) in the
+        conventions of VoltageSource, plus the final cost, the solver success flag, the fraction of discharge samples and
+        the flag "identifiable". Without discharge samples "identifiable" is False and C_barrier and C_gap are NaN, as
+        the traces only determine their series combination C_cell.
+
+        Raises:
+        ValueError: If neither an intensity nor a charge trace is given.
+        """
+        time = np.asarray(time, dtype=float)
+        voltage = np.asarray(voltage, dtype=float)
+        if intensity is None:
+            if charge is None:
+                raise ValueError("Fitting needs an intensity or a charge trace")
+            intensity = np.gradient(np.asarray(charge, dtype=float), time) * 1e3
+        intensity = np.asarray(intensity, dtype=float)
+
+        model = self.__compileModel()
+        initial, discharge, identifiable = self.__initialGuess(time, voltage, intensity)
+        voltageScale = 1.0 / np.max(np.abs(voltage))
+        intensityScale = 1.0 / np.max(np.abs(intensity))
+        count = len(ParameterFit.PARAMETERS)
+        # The model parameters are mapping @ fitted parameters. Without discharges only C_cell is fitted, as
+        # C_barrier = C_gap = 2 * C_cell, whose series combination is C_cell.
+        capacitances = 2 if identifiable else 1
+        mapping = np.eye(count) if identifiable else np.vstack([[2.0, 0, 0, 0], [2.0, 0, 0, 0], np.eye(4)[1:]])
+
+        def evaluate(parameters):
+            values = [np.broadcast_to(value, time.shape) for value in model(time, discharge, *(mapping @ parameters))]
+            return values[0], values[1], values[2:2 + count], values[2 + count:]
+
+        def residual(parameters):
+            voltageModel, intensityModel, _, _ = evaluate(parameters)
+            return np.concatenate([(voltageModel - voltage) * voltageScale, (intensityModel - intensity) * intensityScale])
+
+        def jacobian(parameters):
+            _, _, voltageJacobian, intensityJacobian = evaluate(parameters)
+            return np.vstack([np.column_stack(voltageJacobian) * voltageScale, np.column_stack(intensityJacobian) * intensityScale]) @ mapping
+
+        amplitude, frequency, timeOffset = initial[capacitances:]
+        period = 2 * np.pi / frequency
+        scale = np.abs(initial)
+        scale[-1] = period
+        lower = list(initial[:capacitances] * 1e-3) + [0.0, frequency * 0.5, timeOffset - period]
+        upper = list(initial[:capacitances] * 1e3) + [amplitude * 2, frequency * 2, timeOffset + period]
+        solution = least_squares(residual, initial, jac=jacobian, bounds=(lower, upper), x_scale=scale)
+
+        result = dict(zip(ParameterFit.PARAMETERS, (float(value) for value in mapping @ solution.x)))
+        if identifiable:
+            result["C_cell"] = result["C_barrier"] * result["C_gap"] / (result["C_barrier"] + result["C_gap"])
+        else:
+            result["C_cell"], result["C_barrier"], result["C_gap"] = float(solution.x[0]), float("nan"), float("nan")
+        result["identifiable"] = identifiable
+        result["cost"] = float(solution.cost)
+        result["success"] = bool(solution.success)
+        result["dischargeFraction"] = float(np.mean(discharge))
+        self.__log.info(f"Fitted C_cell={result['C_cell']}F, C_barrier={result['C_barrier']}F, C_gap={result['C_gap']}F in {solution.nfev} evaluations")
+        return result
+
+    @staticmethod
+    def loadMeasurement(path : str) -> dict:
+        """
+        Load a measurement file.
+
+        Parameters:
+        - path: The path of a ".npz" archive or of a delimited text file with a header row. The columns (or arrays) are
+          named t, V and I and/or Q.
+
+        Returns:
+        A dictionary with the arrays "time", "voltage" and, if present, "intensity" and "charge".
+        """
+        if path.endswith(".npz"):
+            with np.load(path) as archive:
+                data = {name: archive[name] for name in archive.files}
+        else:
+            table = np.genfromtxt(path, delimiter=",", names=True)
+            data = {name: table[name] for name in table.dtype.names}
+        return {"time": data["t"], "voltage": data["V"], "intensity": data.get("I"), "charge": data.get("Q")}
+
+    @staticmethod
+    def fitFile(path : str, dischargeThreshold : float = 0.1) -> dict:
+        """
+        Load a measurement file and fit it.
+
+        Parameters:
+        - path: The path of the measurement file (see loadMeasurement).
+        - dischargeThreshold: See __init__ (default: 0.1).
+
+        Returns:
+        The fit result dictionary (see fit) with an additional "path" entry.
+        """
+        result = ParameterFit(dischargeThreshold).fit(**ParameterFit.loadMeasurement(path))
+        result["path"] = path
+        return result
+
+    @staticmethod
+    def fitFiles(paths, processes : int = None, dischargeThreshold : float = 0.1) -> list:
+        """
+        Fit many measurement files in parallel.
+
+        Parameters:
+        - paths: The paths of the measurement files.
+        - processes: The number of worker processes (default: one per CPU).
+        - dischargeThreshold: See __init__ (default: 0.1).
+
+        Returns:
+        A list of fit result dictionaries in the order of paths.
+
+        Every worker process compiles the symbolic model once and then fits the files it is handed one after another.
+        """
+        paths = list(paths)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(ParameterFit.fitFile, paths, [dischargeThreshold] * len(paths)))
@@ -0,0 +1,117 @@
+import numpy as np
+import sympy
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+from reactor.ac_voltage_source import VoltageSource
+from base.charge import Charge
+from base.intensity import Intensity
+
+
+class Sensitivity:
+    """
+    Evaluates the reactor solution together with its derivatives with respect to the capacitances and the voltage source
+    parameters.
+
+    Methods:
+    - __init__(reactorCellCapacitor: Capacitor, dielectricBarrierCapacitor: Capacitor, plasmaGapCapacitor: Capacitor, voltageSrc: VoltageSource): Initialize a Sensitivity instance.
+    - getParameterNames(): Get the names of the parameters the sensitivities are taken with respect to.
+    - evaluate(time): Evaluate voltage, intensity, power and all sensitivities in one vectorized pass.
+
+    The Charge -> Intensity chain of the Reactor is assembled once with the capacitances, the amplitude and the frequency
+    left as symbols. The intensity i(t) (mA) and the power P(t) = i(t) * V(t) * 1e-3 (W) are differentiated symbolically
+    with respect to every parameter, and all expressions are compiled together into a single numpy function with
+    common-subexpression elimination, so the sin/cos terms shared by the solution and its derivatives are computed once
+    per sample.
+
+    C_barrier and C_gap only enter the chain through C_cell, which is their series equivalent S, as in
+    Reactor.getNetlist(), ParameterFit and MonteCarlo. Their sensitivities are therefore taken through that relation the
+    way MonteCarlo.sample() propagates their tolerances, C_cell * S(C_barrier, C_gap) / S(nominal):
+    dX/dC_barrier = dX/dC_cell * C_cell / S * (C_gap / (C_barrier + C_gap))^2, and likewise for C_gap. With C_cell equal
+    to S this is the plain chain rule dX/dC_cell * dS/dC_barrier.
+
+    Note: This class assumes the existence of the LoggerIfc, Capacitor, VoltageSource, Charge and Intensity classes and
+    the numpy and sympy libraries.
+    """
+    def __init__(self, reactorCellCapacitor : Capacitor, dielectricBarrierCapacitor : Capacitor, plasmaGapCapacitor : Capacitor, voltageSrc : VoltageSource) -> None:
+        """
+        Initialize a Sensitivity instance.
+
+        Parameters:
+        - reactorCellCapacitor: The reactor cell capacitor.
+        - dielectricBarrierCapacitor: The dielectric barrier capacitor.
+        - plasmaGapCapacitor: The plasma gap capacitor.
+        - voltageSrc: The voltage source. It must be symbolic (see VoltageSource.isSymbolic()).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the voltage source has no symbolic equation.
+        """
+        if not voltageSrc.isSymbolic():
+            raise ValueError("Sensitivities need a voltage source with a symbolic equation")
+        self.__log = LoggerIfc("Sensitivity")
+        self.__capacitors = (reactorCellCapacitor, dielectricBarrierCapacitor, plasmaGapCapacitor)
+        self.__voltageSrc = voltageSrc
+        self.__model = None
+
+    def getParameterNames(self) -> list:
+        """
+        Get the names of the parameters the sensitivities are taken with respect to.
+
+        Returns:
+        The symbol names of the three capacitors followed by "amplitude" and "frequency".
+        """
+        return [str(capacitor.getSymbol()) for capacitor in self.__capacitors] + ["amplitude", "frequency"]
+
+    def __compileModel(self):
+        """
+        Assemble the symbolic chain and compile it together with all sensitivities.
+        """
+        if self.__model is None:
+            t = sympy.Symbol("t")
+            amplitude, frequency = sympy.symbols("A f")
+            cell, barrier, gap = (capacitor.getSymbol() for capacitor in self.__capacitors)
+            source = VoltageSource(amplitude, frequency)
+            charge = Charge("Q", source, self.__capacitors[0])
+            intensity = Intensity(charge)
+            intensity.substituteCharge(charge)
+            intensity.substituteVoltage(source)
+
+            voltageExpr = source.getEquation()
+            intensityExpr = intensity.getRhsEquation().doit() * 1e3
+            powerExpr = intensityExpr * voltageExpr * 1e-3
+            series = barrier * gap / (barrier + gap)
+            expressions = [voltageExpr, intensityExpr, powerExpr]
+            for expression in (intensityExpr, powerExpr):
+                cellDerivative = sympy.diff(expression, cell)
+                expressions += [cellDerivative, cellDerivative * cell / series * sympy.diff(series, barrier),
+                                cellDerivative * cell / series * sympy.diff(series, gap),
+                                sympy.diff(expression, amplitude), sympy.diff(expression, frequency)]
+            self.__model = sympy.lambdify([t, cell, barrier, gap, amplitude, frequency], expressions, "numpy", cse=True)
+            self.__log.debug(f"Compiled {len(expressions)} expressions for the sensitivities")
+        return self.__model
+
+    def evaluate(self, time) -> dict:
+        """
+        Evaluate voltage, intensity, power and all sensitivities in one vectorized pass.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A dictionary with the arrays "voltage" (V), "intensity" (mA) and "power" (W) and the dictionaries
+        "intensitySensitivity" (mA per unit of the parameter) and "powerSensitivity" (W per unit of the parameter), both
+        keyed by getParameterNames(). The C_barrier and C_gap sensitivities follow the series relation, see the class
+        description.
+
+        Note: This method assumes the existence of the imported sympy and numpy libraries.
+        """
+        time = np.asarray(time, dtype=float)
+        parameters = [capacitor.getValue() for capacitor in self.__capacitors]
+        parameters += [float(self.__voltageSrc.getAmplitude()), float(self.__voltageSrc.getFrequency())]
+        values = [np.broadcast_to(value, time.shape).astype(float) for value in self.__compileModel()(time, *parameters)]
+        names = self.getParameterNames()
+        return {"voltage": values[0], "intensity": values[1], "power": values[2],
+                "intensitySensitivity": dict(zip(names, values[3:8])), "powerSensitivity": dict(zip(names, values[8:13]))}
@@ -1,4 +1,5 @@
 import sympy
+import numpy as np
 from utility.logger import LoggerIfc
 
 class VoltageSource:
@@ -11,7 +12,12 @@ class VoltageSource:
     - getSymbol(): Get the symbol representing the voltage waveform.
     - getAmplitude(): Get the amplitude of the voltage waveform.
     - getFrequency(): Get the frequency of the voltage waveform.
+    - isSymbolic(): Check whether the waveform is available as a symbolic equation.
     - solve(time): Solve the equation for the voltage waveform for the given time values.
+    - evaluate(time): Evaluate the voltage waveform for a whole array of time values at once.
+    - evaluateDerivative(time): Evaluate the time derivative of the voltage waveform for a whole array of time values.
+    - getPhase(time): Get the phase angle of the waveform for a whole array of time values.
+    - getHalfCycle(time): Get the index of the half-cycle every time value falls into.
     - getSolutions(): Get the solved voltage values.
 
     Note: This class assumes the existence of LoggerIfc and sympy libraries.
@@ -42,6 +48,8 @@ class VoltageSource:
         self.__voltEquation = self.__voltAmplitude * sympy.sin(self.__voltFrequency * self.__time)
         self.__log.debug("Voltage waveform created with symbol: " + str(self.__symbol) + " and equation: " + str(self.__voltEquation))
         self.__equation = sympy.Eq(self.__symbol, self.__voltEquation)
+        self.__evaluator = None
+        self.__derivativeEvaluator = None
 
     def getEquation(self):
         """
@@ -111,6 +119,21 @@ class VoltageSource:
         """
         return self.__voltFrequency
 
+    def isSymbolic(self):
+        """
+        Check whether the waveform is available as a symbolic equation.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+
+        Returns:
+        True, the waveform of this source is the symbolic equation returned by getEquation().
+
+        Sources that are only known numerically (e.g. measured waveforms) return False, so the Reactor derives the
+        intensity from evaluateDerivative() instead of substituting the equation into the Intensity chain.
+        """
+        return True
+
     def solve(self, time):
         """
         Solve the equation for the voltage waveform for the given time values.
@@ -132,6 +155,84 @@ class VoltageSource:
         self.__data = [item for sublist in self.__solutions for item in sublist]
         return self.__data
 
+    def evaluate(self, time):
+        """
+        Evaluate the voltage waveform for a whole array of time values at once.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of voltage values with the same shape as the time array.
+
+        Unlike solve(), which runs the symbolic solver once per sample, this method compiles the waveform equation into a
+        numpy function on first use and evaluates it over the whole time array in a single call.
+
+        Note: This method assumes the existence of the imported sympy and numpy libraries.
+        """
+        if self.__evaluator is None:
+            self.__evaluator = sympy.lambdify(self.__time, self.__voltEquation, "numpy")
+        time = np.asarray(time, dtype=float)
+        return np.broadcast_to(self.__evaluator(time), time.shape).astype(float)
+
+    def evaluateDerivative(self, time):
+        """
+        Evaluate the time derivative of the voltage waveform for a whole array of time values.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of dV/dt values (V/s) with the same shape as the time array.
+
+        The derivative is taken symbolically once and compiled into a numpy function, like in evaluate().
+
+        Note: This method assumes the existence of the imported sympy and numpy libraries.
+        """
+        if self.__derivativeEvaluator is None:
+            self.__derivativeEvaluator = sympy.lambdify(self.__time, sympy.diff(self.__voltEquation, self.__time), "numpy")
+        time = np.asarray(time, dtype=float)
+        return np.broadcast_to(self.__derivativeEvaluator(time), time.shape).astype(float)
+
+    def getPhase(self, time):
+        """
+        Get the phase angle of the waveform for a whole array of time values.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of the unwrapped phase angles frequency * t in radians.
+        """
+        return float(self.__voltFrequency) * np.asarray(time, dtype=float)
+
+    def getHalfCycle(self, time):
+        """
+        Get the index of the half-cycle every time value falls into.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy integer array of floor(getPhase(time) / pi).
+        """
+        return np.floor(self.getPhase(time) / np.pi).astype(np.int64)
+
+    def __getstate__(self):
+        """
+        Get the state used for pickling, e.g. when the instance is sent to a worker process.
+
+        The compiled numpy functions cannot be pickled; they are dropped here and recompiled on first use.
+        """
+        state = self.__dict__.copy()
+        state["_VoltageSource__evaluator"] = None
+        state["_VoltageSource__derivativeEvaluator"] = None
+        return state
+
     def getSolutions(self):
         """
         Get the solved voltage values.
@@ -0,0 +1,265 @@
+import numpy as np
+import sympy
+from utility.logger import LoggerIfc
+
+
+class BurstVoltageSource:
+    """
+    Represents a burst mode voltage source: sinusoidal packets separated by idle gaps.
+
+    Methods:
+    - __init__(amplitude, frequency, repetitionRate, burstLength=None, dutyCycle=None, ramp=0.0): Initialize a BurstVoltageSource instance.
+    - getSymbol(): Get the symbol representing the voltage waveform.
+    - getEquation(): Get the equation representing the voltage waveform.
+    - isSymbolic(): Check whether the waveform is available as a symbolic equation.
+    - getAmplitude(): Get the amplitude of the voltage waveform.
+    - getFrequency(): Get the frequency of the voltage waveform inside a burst.
+    - getRepetitionRate(): Get the number of bursts per second.
+    - getBurstLength(): Get the duration of one burst.
+    - getDutyCycle(): Get the fraction of time the source is active.
+    - getActiveWindows(time): Get the index ranges of a time axis that fall inside bursts.
+    - getBreakpoints(duration): Get the times at which the waveform has to be sampled to resolve every burst.
+    - evaluate(time): Evaluate the voltage waveform for a whole array of time values at once.
+    - evaluateDerivative(time): Evaluate the time derivative of the voltage waveform for a whole array of time values.
+    - getPhase(time): Get the carrier phase angle for a whole array of time values.
+    - getHalfCycle(time): Get the index of the carrier half-cycle every time value falls into.
+    - solve(time): Evaluate the waveform for the given time values and store the solutions.
+    - getSolutions(): Get the solved voltage values.
+
+    Burst k starts at k / repetitionRate and lasts burstLength. Inside a burst the voltage is
+    A * e(tau) * sin(f * tau), with tau the time since the start of the burst, f in the convention of VoltageSource and
+    e(tau) a trapezoidal envelope that rises linearly over the first ramp seconds and falls over the last ones. Between
+    bursts the voltage is 0.
+
+    The waveform is piecewise, so it is not offered as a symbolic equation (isSymbolic() is False) and the Reactor
+    derives the intensity from evaluateDerivative(). The Reactor, the plots and the exporters use
+    getActiveWindows() to only evaluate, perturb and store the samples inside bursts, so the cost of a run scales with
+    the duty cycle.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy and sympy libraries.
+    """
+    def __init__(self, amplitude, frequency, repetitionRate : float, burstLength : float = None, dutyCycle : float = None, ramp : float = 0.0) -> None:
+        """
+        Initialize a BurstVoltageSource instance.
+
+        Parameters:
+        - amplitude (float): Amplitude of the voltage waveform.
+        - frequency (float): Frequency of the voltage waveform inside a burst, in the convention of VoltageSource.
+        - repetitionRate (float): The number of bursts per second.
+        - burstLength (float): The duration of one burst in seconds.
+        - dutyCycle (float): The fraction of every repetition period the source is active, used if burstLength is not given.
+        - ramp (float): The rise and fall time of the burst envelope in seconds (default: 0, rectangular bursts).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If neither burstLength nor dutyCycle is given, if the bursts do not fit into the repetition period
+        or if the ramps do not fit into a burst.
+        """
+        self.__log = LoggerIfc("BurstVoltageSource")
+        self.__symbol = sympy.Symbol("V(t)")
+        self.__amplitude = amplitude
+        self.__frequency = frequency
+        self.__period = 1.0 / repetitionRate
+        if burstLength is None:
+            if dutyCycle is None:
+                raise ValueError("A burst source needs a burst length or a duty cycle")
+            burstLength = dutyCycle * self.__period
+        if not 0 < burstLength <= self.__period:
+            raise ValueError(f"The burst length {burstLength}s does not fit into the repetition period {self.__period}s")
+        if not 0 <= 2 * ramp <= burstLength:
+            raise ValueError(f"The ramps of {ramp}s do not fit into a burst of {burstLength}s")
+        self.__burstLength = burstLength
+        self.__ramp = ramp
+        self.__data = None
+        self.__log.info(f"Burst source with {repetitionRate} bursts/s of {burstLength}s ({self.getDutyCycle() * 100:.3g}% duty cycle)")
+
+    def getSymbol(self):
+        """
+        Get the symbol representing the voltage waveform.
+
+        Returns:
+        The symbol representing the voltage waveform, used by the Charge equation.
+        """
+        return self.__symbol
+
+    def getEquation(self):
+        """
+        Get the equation representing the voltage waveform.
+
+        Returns:
+        The bare voltage symbol, as the piecewise burst waveform is only evaluated numerically.
+        """
+        return self.__symbol
+
+    def isSymbolic(self):
+        """
+        Check whether the waveform is available as a symbolic equation.
+
+        Returns:
+        False, see getEquation().
+        """
+        return False
+
+    def getAmplitude(self):
+        return self.__amplitude
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getRepetitionRate(self):
+        return 1.0 / self.__period
+
+    def getBurstLength(self):
+        return self.__burstLength
+
+    def getDutyCycle(self):
+        return self.__burstLength / self.__period
+
+    def getActiveWindows(self, time):
+        """
+        Get the index ranges of a time axis that fall inside bursts.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An ascending array of time values.
+
+        Returns:
+        An (n x 2) integer array of [start, stop) index ranges, one per burst overlapping the time axis, in time order.
+
+        The ranges are found by bisecting the time axis at the start and end of every burst, so the cost depends on the
+        number of bursts rather than on the number of samples.
+        """
+        time = np.asarray(time, dtype=float)
+        if time.size == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        bursts = np.arange(np.floor(time[0] / self.__period), np.floor(time[-1] / self.__period) + 1) * self.__period
+        windows = np.stack([np.searchsorted(time, bursts), np.searchsorted(time, bursts + self.__burstLength)], axis=1)
+        return windows[windows[:, 1] > windows[:, 0]].astype(np.int64)
+
+    def getBreakpoints(self, duration):
+        """
+        Get the times at which the waveform has to be sampled to resolve every burst.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The duration of the time axis in seconds, starting at 0.
+
+        Returns:
+        An ascending array of the burst edges, the envelope corners and the zero-crossings and extrema of the carrier
+        inside every burst that starts before duration.
+
+        Time.getAdaptiveTimeAxis() only refines where a coarse grid already sees a change, so bursts shorter than its
+        largest step would otherwise be skipped entirely. Seeding the axis with these points puts at least four samples
+        into every carrier period of every burst.
+        """
+        bursts = np.arange(np.ceil(duration / self.__period)) * self.__period
+        tau = np.concatenate([[0.0, self.__ramp, self.__burstLength - self.__ramp, self.__burstLength],
+                              np.arange(0.0, self.__burstLength, 0.5 * np.pi / abs(self.__frequency))])
+        breakpoints = (bursts[:, np.newaxis] + np.unique(tau)).ravel()
+        return np.unique(breakpoints[breakpoints <= duration])
+
+    def __envelope(self, tau):
+        if self.__ramp <= 0:
+            return np.ones_like(tau), np.zeros_like(tau)
+        rise, fall = tau / self.__ramp, (self.__burstLength - tau) / self.__ramp
+        envelope = np.clip(np.minimum(rise, fall), 0.0, 1.0)
+        slope = np.where(rise < np.minimum(fall, 1.0), 1.0, np.where(fall < 1.0, -1.0, 0.0)) / self.__ramp
+        return envelope, slope
+
+    def evaluate(self, time):
+        """
+        Evaluate the voltage waveform for a whole array of time values at once.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of voltage values with the same shape as the time array. Only the samples inside bursts are
+        evaluated, the others are 0.
+        """
+        time = np.asarray(time, dtype=float)
+        tau = np.mod(time, self.__period)
+        active = tau < self.__burstLength
+        voltage = np.zeros(time.shape)
+        envelope, _ = self.__envelope(tau[active])
+        voltage[active] = self.__amplitude * envelope * np.sin(self.__frequency * tau[active])
+        return voltage
+
+    def evaluateDerivative(self, time):
+        """
+        Evaluate the time derivative of the voltage waveform for a whole array of time values.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of dV/dt values (V/s) with the same shape as the time array, 0 between bursts.
+        """
+        time = np.asarray(time, dtype=float)
+        tau = np.mod(time, self.__period)
+        active = tau < self.__burstLength
+        derivative = np.zeros(time.shape)
+        tau = tau[active]
+        envelope, slope = self.__envelope(tau)
+        derivative[active] = self.__amplitude * (slope * np.sin(self.__frequency * tau) + envelope * self.__frequency * np.cos(self.__frequency * tau))
+        return derivative
+
+    def getPhase(self, time):
+        """
+        Get the carrier phase angle for a whole array of time values.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy array of f * tau in radians, with tau the time since the start of the burst. The carrier restarts at
+        phase 0 with every burst, so unlike the phase of a VoltageSource this is not frequency * t.
+        """
+        return self.__frequency * np.mod(np.asarray(time, dtype=float), self.__period)
+
+    def getHalfCycle(self, time):
+        """
+        Get the index of the carrier half-cycle every time value falls into.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        A numpy integer array that counts the carrier half-cycles of all bursts in time order. Every burst has
+        ceil(f * burstLength / pi) of them, the last one possibly cut short, and the idle time after a burst belongs to
+        its last half-cycle, so the idle gaps add no empty half-cycles.
+        """
+        time = np.asarray(time, dtype=float)
+        tau = np.mod(time, self.__period)
+        burst = np.round((time - tau) / self.__period).astype(np.int64)
+        perBurst = max(int(np.ceil(abs(self.__frequency) * self.__burstLength / np.pi - 1e-9)), 1)
+        return burst * perBurst + np.minimum(np.floor(abs(self.__frequency) * tau / np.pi).astype(np.int64), perBurst - 1)
+
+    def solve(self, time):
+        """
+        Evaluate the waveform for the given time values and store the solutions.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        An array of voltage values, also available through getSolutions().
+        """
+        self.__data = self.evaluate(time)
+        return self.__data
+
+    def getSolutions(self):
+        """
+        Get the solved voltage values.
+
+        Returns:
+        The voltage values of the last solve() call.
+        """
+        return self.__data
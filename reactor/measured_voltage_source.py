@@ -0,0 +1,303 @@
+import os
+from itertools import islice
+import numpy as np
+import sympy
+from utility.logger import LoggerIfc
+
+
+class MeasuredVoltageSource:
+    """
+    Represents a voltage source that replays a captured oscilloscope waveform.
+
+    Methods:
+    - __init__(path: str, ...): Initialize a MeasuredVoltageSource instance from a CSV or raw binary capture.
+    - getSymbol(): Get the symbol representing the voltage waveform.
+    - getEquation(): Get the equation representing the voltage waveform.
+    - isSymbolic(): Check whether the waveform is available as a symbolic equation.
+    - getAmplitude(): Get the peak magnitude of the captured waveform.
+    - getFrequency(): Get the frequency of the captured waveform estimated from its zero-crossings.
+    - getDuration(): Get the duration of the capture.
+    - evaluate(time): Interpolate the captured waveform onto an array of time values.
+    - evaluateDerivative(time): Evaluate the time derivative of the interpolated waveform.
+    - solve(time): Evaluate the waveform for the given time values and store the solutions.
+    - getSolutions(): Get the solved voltage values.
+
+    Supported captures:
+    - CSV exports with a time and a voltage column. Leading metadata lines are skipped. The file is converted once,
+      chunk by chunk, into a binary float64 cache next to it ("<path>.cache"), which is then memory mapped.
+    - Raw binary int16 or float32 samples behind a text header of "key=value" lines terminated by a line "END". The
+      keys used are dtype (int16 or float32), sample_interval (s), scale (default 1) and offset (default 0); other
+      keys are ignored. Voltages are raw * scale + offset.
+
+    The samples are never loaded as a whole: evaluate() only touches the part of the memory map that covers the
+    requested time values, so simulations can stream through multi-GB captures chunk by chunk (see
+    Reactor.simulateChunks). Simulation time 0 corresponds to the first captured sample; outside the capture the
+    first and last samples are held.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy and sympy libraries.
+    """
+    STATISTICS_BLOCK = 1 << 22
+
+    def __init__(self, path : str, timeColumn : int = 0, voltageColumn : int = 1, delimiter : str = ",", chunkRows : int = 1 << 20) -> None:
+        """
+        Initialize a MeasuredVoltageSource instance from a CSV or raw binary capture.
+
+        Parameters:
+        - path: The path of the capture. Files ending in ".csv" are read as CSV, all others as raw binary.
+        - timeColumn: The index of the time column in a CSV capture (default: 0).
+        - voltageColumn: The index of the voltage column in a CSV capture (default: 1).
+        - delimiter: The column delimiter of a CSV capture (default: ",").
+        - chunkRows: The number of CSV rows converted at once when building the cache (default: 2^20).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If a raw binary header is missing the dtype or sample_interval key, or names an unsupported dtype.
+        """
+        self.__log = LoggerIfc("MeasuredVoltageSource")
+        self.__symbol = sympy.Symbol("V(t)")
+        self.__path = path
+        self.__amplitude = None
+        self.__frequency = None
+        self.__data = None
+
+        if path.lower().endswith(".csv"):
+            self.__samples = self.__openCsv(path, timeColumn, voltageColumn, delimiter, chunkRows)
+            self.__startTime = float(self.__samples[0, 0])
+            self.__sampleInterval = None
+            self.__scale, self.__offset = 1.0, 0.0
+            self.__count = len(self.__samples)
+            self.__duration = float(self.__samples[-1, 0]) - self.__startTime
+        else:
+            self.__samples = self.__openBinary(path)
+            self.__count = len(self.__samples)
+            self.__duration = (self.__count - 1) * self.__sampleInterval
+        self.__log.info(f"Capture {path} opened with {self.__count} samples over {self.__duration}s")
+
+    @staticmethod
+    def __isNumericRow(line : str, columns, delimiter : str) -> bool:
+        fields = line.strip().split(delimiter)
+        try:
+            for column in columns:
+                float(fields[column])
+        except (IndexError, ValueError):
+            return False
+        return True
+
+    def __openCsv(self, path : str, timeColumn : int, voltageColumn : int, delimiter : str, chunkRows : int) -> np.ndarray:
+        cachePath = path + ".cache"
+        if not os.path.exists(cachePath) or os.path.getmtime(cachePath) < os.path.getmtime(path):
+            self.__log.info(f"Converting {path} into binary cache {cachePath}")
+            columns = (timeColumn, voltageColumn)
+            with open(path, "r") as source, open(cachePath + ".tmp", "wb") as cache:
+                firstRow = next(line for line in source if self.__isNumericRow(line, columns, delimiter))
+                batch = [firstRow] + list(islice(source, chunkRows - 1))
+                while batch:
+                    rows = np.loadtxt(batch, delimiter=delimiter, usecols=columns, ndmin=2, dtype=np.float64)
+                    rows.tofile(cache)
+                    batch = list(islice(source, chunkRows))
+            os.replace(cachePath + ".tmp", cachePath)
+        return np.memmap(cachePath, dtype=np.float64, mode="r").reshape(-1, 2)
+
+    def __openBinary(self, path : str) -> np.ndarray:
+        header = {}
+        with open(path, "rb") as capture:
+            for line in capture:
+                line = line.decode("ascii").strip()
+                if line == "END":
+                    break
+                key, _, value = line.partition("=")
+                header[key.strip()] = value.strip()
+            headerBytes = capture.tell()
+
+        if "dtype" not in header or "sample_interval" not in header:
+            raise ValueError(f"Raw capture {path} needs a dtype and a sample_interval header entry")
+        if header["dtype"] not in ("int16", "float32"):
+            raise ValueError(f"Raw capture {path} has unsupported dtype {header['dtype']}")
+        self.__sampleInterval = float(header["sample_interval"])
+        self.__scale = float(header.get("scale", 1.0))
+        self.__offset = float(header.get("offset", 0.0))
+        self.__startTime = 0.0
+        return np.memmap(path, dtype=np.dtype(header["dtype"]).newbyteorder("<"), mode="r", offset=headerBytes)
+
+    def __bisect(self, value : float) -> int:
+        """
+        Get the number of captured sample times not larger than value, reading only O(log n) entries of the memory map.
+        """
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__samples[middle, 0] <= value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __window(self, time : np.ndarray):
+        """
+        Get the sample times and voltages of the smallest stretch of the capture that covers the given time values.
+        """
+        first, last = time.min(), time.max()
+        if self.__sampleInterval is None:
+            start = max(self.__bisect(first + self.__startTime) - 1, 0)
+            stop = max(min(self.__bisect(last + self.__startTime) + 1, self.__count), start + 1)
+            window = np.asarray(self.__samples[start:stop])
+            return window[:, 0] - self.__startTime, window[:, 1]
+        start = min(max(int(np.floor(first / self.__sampleInterval)), 0), self.__count - 1)
+        stop = min(max(int(np.ceil(last / self.__sampleInterval)) + 1, start + 1), self.__count)
+        voltage = np.asarray(self.__samples[start:stop], dtype=np.float64) * self.__scale + self.__offset
+        return np.arange(start, stop) * self.__sampleInterval, voltage
+
+    def __sampleTime(self, index : int) -> float:
+        if self.__sampleInterval is None:
+            return float(self.__samples[index, 0])
+        return index * self.__sampleInterval
+
+    def __blocks(self):
+        for start in range(0, self.__count, MeasuredVoltageSource.STATISTICS_BLOCK):
+            block = self.__samples[start:start + MeasuredVoltageSource.STATISTICS_BLOCK]
+            if self.__sampleInterval is None:
+                yield np.asarray(block[:, 1])
+            else:
+                yield np.asarray(block, dtype=np.float64) * self.__scale + self.__offset
+
+    def getSymbol(self):
+        """
+        Get the symbol representing the voltage waveform.
+
+        Returns:
+        The symbol representing the voltage waveform, used by the Charge equation.
+        """
+        return self.__symbol
+
+    def getEquation(self):
+        """
+        Get the equation representing the voltage waveform.
+
+        Returns:
+        The bare voltage symbol, as a captured waveform has no closed-form equation.
+        """
+        return self.__symbol
+
+    def isSymbolic(self):
+        """
+        Check whether the waveform is available as a symbolic equation.
+
+        Returns:
+        False, captured waveforms are only known numerically.
+        """
+        return False
+
+    def getAmplitude(self):
+        """
+        Get the peak magnitude of the captured waveform.
+
+        Returns:
+        The largest absolute voltage in the capture. It is computed block by block on first use and cached.
+        """
+        if self.__amplitude is None:
+            self.__amplitude = max(float(np.max(np.abs(block))) for block in self.__blocks())
+        return self.__amplitude
+
+    def getFrequency(self):
+        """
+        Get the frequency of the captured waveform estimated from its zero-crossings.
+
+        Returns:
+        The frequency in the convention of VoltageSource, i.e. the factor f in sin(f * t) (2 * pi times the number of
+        cycles per second), measured between the first and the last rising zero-crossing. It is computed block by block
+        on first use and cached; a capture with fewer than two rising zero-crossings has frequency 0.
+        """
+        if self.__frequency is None:
+            crossings, first, last, offset, previous = 0, None, None, 0, None
+            for block in self.__blocks():
+                signs = np.signbit(block)
+                if previous is not None:
+                    signs = np.concatenate([[previous], signs])
+                rising = np.flatnonzero(signs[:-1] & ~signs[1:]) + offset + (0 if previous is not None else 1)
+                if len(rising):
+                    first = rising[0] if first is None else first
+                    last = rising[-1]
+                    crossings += len(rising)
+                offset += len(block)
+                previous = bool(signs[-1])
+            self.__frequency = 0.0
+            if crossings > 1:
+                self.__frequency = 2 * np.pi * (crossings - 1) / (self.__sampleTime(last) - self.__sampleTime(first))
+        return self.__frequency
+
+    def getDuration(self):
+        """
+        Get the duration of the capture.
+
+        Returns:
+        The time between the first and the last captured sample in seconds.
+        """
+        return self.__duration
+
+    def evaluate(self, time):
+        """
+        Interpolate the captured waveform onto an array of time values.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values in seconds, with 0 at the first captured sample.
+
+        Returns:
+        A numpy array of voltage values with the same shape as the time array.
+
+        Only the stretch of the memory mapped capture between the smallest and largest requested time is read; the values
+        are then linearly interpolated in one vectorized call.
+        """
+        time = np.asarray(time, dtype=float)
+        if time.size == 0:
+            return np.zeros(time.shape)
+        sampleTime, voltage = self.__window(time)
+        return np.interp(time, sampleTime, voltage)
+
+    def evaluateDerivative(self, time):
+        """
+        Evaluate the time derivative of the interpolated waveform.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values in seconds, with 0 at the first captured sample.
+
+        Returns:
+        A numpy array of dV/dt values (V/s): the slope of the interpolation segment every time value falls into. Outside
+        the capture the derivative is 0.
+        """
+        time = np.asarray(time, dtype=float)
+        if time.size == 0:
+            return np.zeros(time.shape)
+        sampleTime, voltage = self.__window(time)
+        if len(sampleTime) < 2:
+            return np.zeros(time.shape)
+        slopes = np.diff(voltage) / np.diff(sampleTime)
+        segment = np.clip(np.searchsorted(sampleTime, time, side="right") - 1, 0, len(slopes) - 1)
+        inside = (time >= sampleTime[0]) & (time <= sampleTime[-1]) & (time >= 0) & (time <= self.__duration)
+        return np.where(inside, slopes[segment], 0.0)
+
+    def solve(self, time):
+        """
+        Evaluate the waveform for the given time values and store the solutions.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values.
+
+        Returns:
+        An array of voltage values, also available through getSolutions().
+        """
+        self.__data = self.evaluate(time)
+        return self.__data
+
+    def getSolutions(self):
+        """
+        Get the solved voltage values.
+
+        Returns:
+        The voltage values of the last solve() call.
+        """
+        return self.__data
@@ -0,0 +1,251 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+from reactor.ac_voltage_source import VoltageSource as Vs
+from reactor.reactor_array import ReactorArray
+from utility.streaming_histogram import StreamingHistogram, StreamingMoments
+
+
+class MonteCarlo:
+    """
+    Monte Carlo tolerance analysis of a reactor.
+
+    Methods:
+    - __init__(reactorCellCapacitor, dielectricBarrierCapacitor, plasmaGapCapacitor, voltageSrc, distributions): Initialize a MonteCarlo instance.
+    - sample(nominal, distributions, rng, count): Draw parameter realizations.
+    - evaluate(voltageSrc, nominal, values, time): Evaluate a batch of realizations.
+    - runBatch(voltageSrc, nominal, distributions, time, seed, count, ranges, bins, timeBins): Simulate one batch of realizations and reduce it to moments and histograms.
+    - run(time, realizations, batchSize, processes, seed, percentiles, bins, timeBins, maxCounters): Run the analysis.
+
+    The tolerated quantities are "C_cell", "C_barrier", "C_gap", "amplitude" and "frequency". Each can be given a
+    distribution relative to its nominal value:
+    - ("normal", sigma): nominal * (1 + sigma * N(0, 1))
+    - ("uniform", tolerance): nominal * U(1 - tolerance, 1 + tolerance)
+    - ("lognormal", sigma): nominal * exp(sigma * N(0, 1))
+    Quantities without a distribution stay at their nominal value. Barrier and gap tolerances propagate into the cell
+    capacitance through the ratio of their series combination to its nominal value.
+
+    Realizations are evaluated in batches as ReactorArray simulations with one cell per realization on a process pool,
+    every batch with its own RNG stream spawned from one SeedSequence. Each batch is reduced to StreamingMoments and
+    StreamingHistograms before it is returned, so what a worker sends back and what the parent keeps is a few values
+    per time sample, regardless of the batch size and the number of realizations.
+
+    Note: This class assumes the existence of the LoggerIfc, Capacitor, Vs, ReactorArray, StreamingMoments and
+    StreamingHistogram classes and the numpy library.
+    """
+    QUANTITIES = ("C_cell", "C_barrier", "C_gap", "amplitude", "frequency")
+
+    def __init__(self, reactorCellCapacitor : Capacitor, dielectricBarrierCapacitor : Capacitor, plasmaGapCapacitor : Capacitor,
+                 voltageSrc : Vs, distributions : dict = None) -> None:
+        """
+        Initialize a MonteCarlo instance.
+
+        Parameters:
+        - reactorCellCapacitor: The nominal reactor cell capacitor.
+        - dielectricBarrierCapacitor: The nominal dielectric barrier capacitor.
+        - plasmaGapCapacitor: The nominal plasma gap capacitor.
+        - voltageSrc: The nominal voltage source. It is sent to the worker processes, so it has to be picklable.
+        - distributions: A dictionary mapping quantity names to distribution tuples (default: no tolerances).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If a quantity or a distribution kind is unknown.
+        """
+        self.log = LoggerIfc("MonteCarlo")
+        self.__nominal = {"C_cell": reactorCellCapacitor.getValue(), "C_barrier": dielectricBarrierCapacitor.getValue(),
+                          "C_gap": plasmaGapCapacitor.getValue(), "amplitude": voltageSrc.getAmplitude(),
+                          "frequency": voltageSrc.getFrequency()}
+        self.__voltageSrc = voltageSrc
+        self.__distributions = dict(distributions or {})
+        for quantity, distribution in self.__distributions.items():
+            if quantity not in MonteCarlo.QUANTITIES:
+                raise ValueError(f"Unknown quantity {quantity}, expected one of {MonteCarlo.QUANTITIES}")
+            if distribution[0] not in ("normal", "uniform", "lognormal"):
+                raise ValueError(f"Unknown distribution {distribution[0]} for {quantity}")
+
+    @staticmethod
+    def sample(nominal : dict, distributions : dict, rng : np.random.Generator, count : int) -> dict:
+        """
+        Draw parameter realizations.
+
+        Parameters:
+        - nominal: The nominal values of all quantities.
+        - distributions: The distribution tuples of the tolerated quantities.
+        - rng: The random generator to draw from.
+        - count: The number of realizations.
+
+        Returns:
+        A dictionary mapping every quantity to an array of count values, with the barrier and gap tolerances already
+        propagated into "C_cell".
+        """
+        values = {}
+        for quantity in MonteCarlo.QUANTITIES:
+            kind, spread = distributions.get(quantity, ("fixed", 0.0))
+            if kind == "normal":
+                factor = 1.0 + spread * rng.standard_normal(count)
+            elif kind == "uniform":
+                factor = rng.uniform(1.0 - spread, 1.0 + spread, count)
+            elif kind == "lognormal":
+                factor = np.exp(spread * rng.standard_normal(count))
+            else:
+                factor = np.ones(count)
+            values[quantity] = nominal[quantity] * factor
+
+        series = values["C_barrier"] * values["C_gap"] / (values["C_barrier"] + values["C_gap"])
+        nominalSeries = nominal["C_barrier"] * nominal["C_gap"] / (nominal["C_barrier"] + nominal["C_gap"])
+        values["C_cell"] = values["C_cell"] * series / nominalSeries
+        return values
+
+    @staticmethod
+    def evaluate(voltageSrc, nominal : dict, values : dict, time : np.ndarray):
+        """
+        Evaluate a batch of realizations.
+
+        Parameters:
+        - voltageSrc: The nominal voltage source, any source with evaluate() and evaluateDerivative().
+        - nominal: The nominal values of all quantities.
+        - values: Parameter arrays as returned by sample().
+        - time: The time axis.
+
+        Returns:
+        A tuple (intensity, power, energy): intensity (mA) and power (W) are (realizations x time) arrays, energy is the
+        energy per cycle (J) of every realization.
+
+        The batch is simulated as a ReactorArray with one cell per realization. A realization with the amplitude
+        a * A and the frequency b * f sees the nominal waveform scaled to a * V(b * t), so every cell gets the time
+        axis b * t and the cell results are scaled by a (voltage) and a * b (dV/dt) afterwards. This works for any
+        source, not only for A * sin(f * t).
+        """
+        amplitude = (values["amplitude"] / nominal["amplitude"])[:, None]
+        frequency = (values["frequency"] / nominal["frequency"])[:, None]
+        array = ReactorArray(values["C_cell"], values["C_barrier"], values["C_gap"], voltageSrc)
+        results = array.simulate(frequency * time[None, :])
+        intensity = results.getCellIntensity() * (amplitude * frequency)
+        power = results.getCellPower() * (amplitude ** 2 * frequency)
+        cycles = values["frequency"] * (time[-1] - time[0]) / (2 * np.pi)
+        energy = 0.5 * np.sum((power[:, 1:] + power[:, :-1]) * np.diff(time), axis=1) / np.maximum(cycles, np.finfo(float).tiny)
+        return intensity, power, energy
+
+    @staticmethod
+    def runBatch(voltageSrc, nominal : dict, distributions : dict, time : np.ndarray, seed : np.random.SeedSequence, count : int,
+                 ranges : dict, bins : int, timeBins : int) -> dict:
+        """
+        Simulate one batch of realizations and reduce it to moments and histograms.
+
+        Parameters:
+        - voltageSrc: The nominal voltage source.
+        - nominal: The nominal values of all quantities.
+        - distributions: The distribution tuples of the tolerated quantities.
+        - time: The time axis.
+        - seed: The SeedSequence of this batch.
+        - count: The number of realizations in this batch.
+        - ranges: The (low, high) histogram range of "intensity", "power" and "energy", one value per time sample for
+          intensity and power.
+        - bins: The number of bins of the energy histogram.
+        - timeBins: The number of bins of the per-time-sample histograms of intensity and power, 0 for none.
+
+        Returns:
+        A dictionary with the batch size and, for every channel, a tuple of its StreamingMoments and its
+        StreamingHistogram (None for intensity and power if timeBins is 0). The size of the result only depends on the
+        length of the time axis and the bin counts, not on the batch size.
+        """
+        values = MonteCarlo.sample(nominal, distributions, np.random.default_rng(seed), count)
+        intensity, power, energy = MonteCarlo.evaluate(voltageSrc, nominal, values, time)
+        reduced = {"count": count}
+        for name, channel, channelBins in (("intensity", intensity, timeBins), ("power", power, timeBins), ("energy", energy[:, None], bins)):
+            moments = StreamingMoments(channel.shape[1])
+            moments.add(channel)
+            histogram = None
+            if channelBins:
+                histogram = StreamingHistogram(*ranges[name], channel.shape[1], channelBins)
+                histogram.add(channel)
+            reduced[name] = (moments, histogram)
+        return reduced
+
+    def run(self, time : np.ndarray, realizations : int = 10_000, batchSize : int = 256, processes : int = None,
+            seed : int = None, percentiles = (5, 50, 95), bins : int = 512, timeBins : int = 128, maxCounters : int = 1 << 21) -> dict:
+        """
+        Run the analysis.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: The time axis, typically a few periods of the supply.
+        - realizations: The total number of realizations (default: 10000).
+        - batchSize: The number of realizations evaluated together in one array (default: 256).
+        - processes: The number of worker processes; 1 runs everything in this process (default: one per CPU).
+        - seed: The root seed for reproducible runs (default: fresh entropy).
+        - percentiles: The percentiles to report (default: 5, 50 and 95).
+        - bins: The number of bins of the energy histogram (default: 512).
+        - timeBins: The number of bins of the per-time-sample histograms of intensity and power (default: 128).
+        - maxCounters: The largest number of counters a per-time-sample histogram may have, time samples x timeBins.
+          Longer time axes only report moments and the min/max envelope for intensity and power (default: 2^21).
+
+        Returns:
+        A dictionary with the "time" axis, the number of "realizations" and, for "intensity" (mA), "power" (W) and
+        "energy" (J per cycle), a dictionary with the "mean", "std", "min", "max" and one entry per requested percentile.
+        The intensity and power percentiles are only present if their per-time-sample histograms were kept.
+
+        Every batch is reduced to per-time-sample moments (count, mean, sum of squared deviations, min and max) and,
+        for short time axes, a per-time-sample histogram; the energy gets a histogram of its own. The histogram range of
+        every time sample is the spread of a pilot batch at that sample, drawn from its own RNG stream, widened by half
+        of it on both sides. Values outside of it are clipped into the outermost bins; a warning tells how many.
+        Percentiles are interpolated within their bin, so their resolution is the bin width, twice the pilot spread of
+        the time sample divided by timeBins (bins for the energy): about 1.6% of the spread with the defaults, and a
+        fraction of that in practice.
+        """
+        time = np.asarray(time, dtype=float)
+        root = np.random.SeedSequence(seed)
+        counts = [min(batchSize, realizations - start) for start in range(0, realizations, batchSize)]
+        pilotSeed, *seeds = root.spawn(len(counts) + 1)
+        if len(time) * timeBins > maxCounters:
+            self.log.info(f"{len(time)} time samples exceed the histogram budget of {maxCounters} counters, reporting intensity and power moments only")
+            timeBins = 0
+
+        pilotValues = MonteCarlo.sample(self.__nominal, self.__distributions, np.random.default_rng(pilotSeed), batchSize)
+        pilot = MonteCarlo.evaluate(self.__voltageSrc, self.__nominal, pilotValues, time)
+        ranges = {}
+        for name, values in zip(("intensity", "power", "energy"), pilot):
+            low, high = np.min(values, axis=0), np.max(values, axis=0)
+            margin = np.maximum(0.5 * (high - low), 1e-9 * (float(np.max(np.abs(values))) or 1.0))
+            ranges[name] = (low - margin, high + margin)
+        self.log.info(f"Running {realizations} realizations in {len(counts)} batches of up to {batchSize}")
+
+        totals = None
+        def accumulate(reduced):
+            nonlocal totals
+            if totals is None:
+                totals = reduced
+                return
+            totals["count"] += reduced["count"]
+            for name in ("intensity", "power", "energy"):
+                moments, histogram = totals[name]
+                moments.merge(reduced[name][0])
+                if histogram is not None:
+                    histogram.merge(reduced[name][1])
+
+        arguments = [(self.__voltageSrc, self.__nominal, self.__distributions, time, batchSeed, count, ranges, bins, timeBins)
+                     for batchSeed, count in zip(seeds, counts)]
+        if processes == 1:
+            for argument in arguments:
+                accumulate(MonteCarlo.runBatch(*argument))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                for future in as_completed([executor.submit(MonteCarlo.runBatch, *argument) for argument in arguments]):
+                    accumulate(future.result())
+
+        report = {"time": time, "realizations": totals["count"]}
+        for name in ("intensity", "power", "energy"):
+            moments, histogram = totals[name]
+            statistics = {"mean": moments.getMean(), "std": moments.getStd(), "min": moments.getMin(), "max": moments.getMax()}
+            if histogram is not None:
+                for q in percentiles:
+                    statistics[q] = histogram.percentile(q)
+                if histogram.getClipped():
+                    self.log.warning(f"{histogram.getClipped()} {name} values fell outside the histogram range and were clipped")
+            if name == "energy":
+                statistics = {key: float(value[0]) for key, value in statistics.items()}
+            report[name] = statistics
+        return report
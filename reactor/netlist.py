@@ -0,0 +1,416 @@
+import numpy as np
+from collections import OrderedDict
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+
+
+class ElementTable:
+    """
+    Array-backed storage for the two-terminal elements of a netlist.
+
+    Methods:
+    - __init__(capacity: int): Initialize an empty ElementTable instance.
+    - append(kind, nodeA, nodeB, value, breakdown, extinction): Append a block of elements.
+    - select(kind): Get the node indices and parameters of all elements of one kind.
+    - __len__(): Get the number of stored elements.
+
+    Every element is one row in a set of parallel numpy arrays (kind, nodes and parameters) instead of one Python
+    object per component, so netlists with hundreds of elements stay compact and can be stamped in a single
+    vectorized pass.
+    """
+    def __init__(self, capacity : int = 16) -> None:
+        """
+        Initialize an empty ElementTable instance.
+
+        Parameters:
+        - capacity: The initial number of rows to allocate (default: 16).
+
+        Returns:
+        None
+
+        This method allocates the parallel arrays. They grow geometrically when more elements are appended.
+        """
+        self.__size = 0
+        self.__kind = np.empty(capacity, dtype=np.int8)
+        self.__nodeA = np.empty(capacity, dtype=np.int32)
+        self.__nodeB = np.empty(capacity, dtype=np.int32)
+        self.__value = np.empty(capacity, dtype=np.float64)
+        self.__breakdown = np.empty(capacity, dtype=np.float64)
+        self.__extinction = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __grow(self, required : int) -> None:
+        capacity = max(required, 2 * len(self.__kind))
+        for name in ("kind", "nodeA", "nodeB", "value", "breakdown", "extinction"):
+            attribute = f"_ElementTable__{name}"
+            old = getattr(self, attribute)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.__size] = old[:self.__size]
+            setattr(self, attribute, new)
+
+    def append(self, kind : int, nodeA, nodeB, value, breakdown = 0.0, extinction = 0.0) -> np.ndarray:
+        """
+        Append a block of elements of the same kind.
+
+        Parameters:
+        - kind: The element kind code (see Netlist.CAPACITOR, Netlist.RESISTOR and Netlist.PLASMA).
+        - nodeA: Index or array of indices of the first terminal.
+        - nodeB: Index or array of indices of the second terminal.
+        - value: Scalar or array of element values (capacitance, resistance or plasma on-resistance).
+        - breakdown: Scalar or array of breakdown voltages (plasma elements only, default: 0).
+        - extinction: Scalar or array of extinction voltages (plasma elements only, default: 0).
+
+        Returns:
+        The row indices of the appended elements.
+
+        This method broadcasts all arguments to a common length and copies them into the backing arrays.
+        """
+        nodeA, nodeB, value, breakdown, extinction = np.broadcast_arrays(
+            np.atleast_1d(nodeA), np.atleast_1d(nodeB), np.atleast_1d(value), np.atleast_1d(breakdown), np.atleast_1d(extinction))
+        count = len(nodeA)
+        if self.__size + count > len(self.__kind):
+            self.__grow(self.__size + count)
+        rows = slice(self.__size, self.__size + count)
+        self.__kind[rows] = kind
+        self.__nodeA[rows] = nodeA
+        self.__nodeB[rows] = nodeB
+        self.__value[rows] = value
+        self.__breakdown[rows] = breakdown
+        self.__extinction[rows] = extinction
+        self.__size += count
+        return np.arange(rows.start, rows.stop)
+
+    def select(self, kind : int):
+        """
+        Get the node indices and parameters of all elements of one kind.
+
+        Parameters:
+        - kind: The element kind code.
+
+        Returns:
+        A tuple (nodeA, nodeB, value, breakdown, extinction) of numpy arrays.
+        """
+        mask = self.__kind[:self.__size] == kind
+        return (self.__nodeA[:self.__size][mask], self.__nodeB[:self.__size][mask], self.__value[:self.__size][mask],
+                self.__breakdown[:self.__size][mask], self.__extinction[:self.__size][mask])
+
+
+class Netlist:
+    """
+    Represents an electrical circuit as a netlist and solves it with modified nodal analysis (MNA).
+
+    Methods:
+    - __init__(): Initialize an empty Netlist instance with a ground node named "0".
+    - addNode(name: str): Add a node (or get the index of an existing one).
+    - getNodeIndex(name: str): Get the index of a node.
+    - getNodeCount(): Get the number of nodes including ground.
+    - addCapacitor(nodeA, nodeB, capacitance): Add one or many capacitors.
+    - addResistor(nodeA, nodeB, resistance): Add one or many resistors.
+    - addPlasma(nodeA, nodeB, breakdownVoltage, onResistance, extinctionVoltage): Add one or many plasma gap elements.
+    - addVoltageSource(nodePositive, nodeNegative, source): Add an independent voltage source.
+    - assemble(plasmaState): Assemble the sparse MNA conductance and capacitance matrices.
+    - solveTransient(time): Solve the circuit over a time axis.
+    - getPlasmaPower(voltages): Get the power dissipated in every plasma element along a transient solution.
+
+    Elements are stored in an ElementTable and stamped into scipy.sparse matrices in one vectorized pass. The
+    system matrix of the implicit (backward Euler) time step only depends on the topology, the step size and which
+    plasma elements are conducting, so it is factorized once per such combination and reused for every time step. The
+    factorizations are kept in a least recently used cache of CACHE_SIZE entries, and a step within STEP_TOLERANCE
+    (relative) of a cached one reuses it, so the many slightly different steps of an adaptive time axis neither grow the
+    cache nor refactorize on every step.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy and scipy libraries.
+    """
+    CAPACITOR = 0
+    RESISTOR = 1
+    PLASMA = 2
+    INITIAL_STEP = 1e-9
+    CACHE_SIZE = 8
+    STEP_TOLERANCE = 1e-3
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty Netlist instance with a ground node named "0".
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("Netlist")
+        self.__nodes = {"0": 0}
+        self.__elements = ElementTable()
+        self.__sourceNodes = []
+        self.__sources = []
+        self.__matrices = None
+        self.__factorizations = OrderedDict()
+
+    def __invalidate(self) -> None:
+        self.__matrices = None
+        self.__factorizations.clear()
+
+    def __resolve(self, nodes) -> np.ndarray:
+        if isinstance(nodes, (str, int, np.integer)):
+            nodes = [nodes]
+        return np.array([self.addNode(node) if isinstance(node, str) else int(node) for node in nodes], dtype=np.int32)
+
+    def addNode(self, name : str) -> int:
+        """
+        Add a node (or get the index of an existing one).
+
+        Parameters:
+        - name: The name of the node. The name "0" is reserved for ground.
+
+        Returns:
+        The index of the node.
+        """
+        if name not in self.__nodes:
+            self.__nodes[name] = len(self.__nodes)
+            self.__invalidate()
+        return self.__nodes[name]
+
+    def getNodeIndex(self, name : str) -> int:
+        """
+        Get the index of a node.
+
+        Parameters:
+        - name: The name of the node.
+
+        Returns:
+        The index of the node, usable as a row index into the voltages returned by solveTransient().
+        """
+        return self.__nodes[name]
+
+    def getNodeCount(self) -> int:
+        """
+        Get the number of nodes including ground.
+
+        Returns:
+        The number of nodes.
+        """
+        return len(self.__nodes)
+
+    def addCapacitor(self, nodeA, nodeB, capacitance) -> np.ndarray:
+        """
+        Add one or many capacitors.
+
+        Parameters:
+        - nodeA: Node name, node index or sequence of them for the first terminal.
+        - nodeB: Node name, node index or sequence of them for the second terminal.
+        - capacitance: A Capacitor instance, a value in farads or an array of values.
+
+        Returns:
+        The element indices of the added capacitors.
+        """
+        if isinstance(capacitance, Capacitor):
+            capacitance = capacitance.getValue()
+        self.__invalidate()
+        return self.__elements.append(Netlist.CAPACITOR, self.__resolve(nodeA), self.__resolve(nodeB), capacitance)
+
+    def addResistor(self, nodeA, nodeB, resistance) -> np.ndarray:
+        """
+        Add one or many resistors.
+
+        Parameters:
+        - nodeA: Node name, node index or sequence of them for the first terminal.
+        - nodeB: Node name, node index or sequence of them for the second terminal.
+        - resistance: A value in ohms or an array of values.
+
+        Returns:
+        The element indices of the added resistors.
+        """
+        self.__invalidate()
+        return self.__elements.append(Netlist.RESISTOR, self.__resolve(nodeA), self.__resolve(nodeB), resistance)
+
+    def addPlasma(self, nodeA, nodeB, breakdownVoltage, onResistance = 1e3, extinctionVoltage = None) -> np.ndarray:
+        """
+        Add one or many plasma gap elements.
+
+        Parameters:
+        - nodeA: Node name, node index or sequence of them for the first terminal.
+        - nodeB: Node name, node index or sequence of them for the second terminal.
+        - breakdownVoltage: The voltage magnitude above which the gap starts conducting.
+        - onResistance: The resistance of the gap while conducting (default: 1e3 ohms).
+        - extinctionVoltage: The voltage magnitude below which a conducting gap extinguishes (default: half of the
+          breakdown voltage).
+
+        Returns:
+        The element indices of the added plasma elements.
+
+        A plasma element is an open circuit until the voltage across it exceeds the breakdown voltage. It then conducts
+        through its on-resistance until the voltage drops below the extinction voltage. The gap capacitance itself is
+        added separately with addCapacitor().
+        """
+        if extinctionVoltage is None:
+            extinctionVoltage = 0.5 * np.asarray(breakdownVoltage, dtype=float)
+        self.__invalidate()
+        return self.__elements.append(Netlist.PLASMA, self.__resolve(nodeA), self.__resolve(nodeB), onResistance,
+                                      breakdownVoltage, extinctionVoltage)
+
+    def addVoltageSource(self, nodePositive, nodeNegative, source) -> int:
+        """
+        Add an independent voltage source.
+
+        Parameters:
+        - nodePositive: Node name or index of the positive terminal.
+        - nodeNegative: Node name or index of the negative terminal.
+        - source: Any object with an evaluate(time) method returning the source voltage, e.g. a VoltageSource.
+
+        Returns:
+        The index of the source, usable as a row index into the currents returned by solveTransient().
+        """
+        self.__sourceNodes.append((self.__resolve(nodePositive)[0], self.__resolve(nodeNegative)[0]))
+        self.__sources.append(source)
+        self.__invalidate()
+        return len(self.__sources) - 1
+
+    def __stamp(self, nodeA : np.ndarray, nodeB : np.ndarray, values : np.ndarray, size : int) -> sparse.csc_matrix:
+        rows = np.concatenate([nodeA, nodeB, nodeA, nodeB])
+        cols = np.concatenate([nodeA, nodeB, nodeB, nodeA])
+        data = np.concatenate([values, values, -values, -values])
+        keep = (rows > 0) & (cols > 0)
+        return sparse.coo_matrix((data[keep], (rows[keep] - 1, cols[keep] - 1)), shape=(size, size)).tocsc()
+
+    def assemble(self, plasmaState : np.ndarray = None):
+        """
+        Assemble the sparse MNA conductance and capacitance matrices.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - plasmaState: Boolean array telling which plasma elements are conducting (default: none are).
+
+        Returns:
+        A tuple (G, C) of scipy.sparse CSC matrices of size (nodes - 1 + sources).
+
+        The unknown vector holds the voltages of all non-ground nodes followed by the currents through the voltage
+        sources. The static part of both matrices is cached until the topology changes; only the conductances of the
+        conducting plasma elements are stamped on every call.
+        """
+        nodeCount = len(self.__nodes) - 1
+        size = nodeCount + len(self.__sources)
+        if self.__matrices is None:
+            capA, capB, capValue, _, _ = self.__elements.select(Netlist.CAPACITOR)
+            resA, resB, resValue, _, _ = self.__elements.select(Netlist.RESISTOR)
+            conductance = self.__stamp(resA, resB, 1.0 / resValue, size)
+            if self.__sources:
+                sourceRows = nodeCount + np.arange(len(self.__sources))
+                positive, negative = np.array(self.__sourceNodes, dtype=np.int32).T
+                rows = np.concatenate([positive - 1, negative - 1, sourceRows, sourceRows])
+                cols = np.concatenate([sourceRows, sourceRows, positive - 1, negative - 1])
+                data = np.concatenate([np.ones(len(positive)), -np.ones(len(negative)), np.ones(len(positive)), -np.ones(len(negative))])
+                keep = (rows >= 0) & (cols >= 0)
+                conductance = conductance + sparse.coo_matrix((data[keep], (rows[keep], cols[keep])), shape=(size, size)).tocsc()
+            self.__matrices = (conductance, self.__stamp(capA, capB, capValue, size), self.__elements.select(Netlist.PLASMA))
+            self.__log.debug(f"Assembled MNA matrices of size {size} with {len(self.__elements)} elements and {len(self.__sources)} sources")
+
+        conductance, capacitance, (plasmaA, plasmaB, plasmaResistance, _, _) = self.__matrices
+        if plasmaState is not None and np.any(plasmaState):
+            conductance = conductance + self.__stamp(plasmaA[plasmaState], plasmaB[plasmaState], 1.0 / plasmaResistance[plasmaState], size)
+        return conductance, capacitance
+
+    def __factorize(self, step : float, plasmaState : np.ndarray):
+        """
+        Get the factorized system matrix for a step size and plasma state, and the step size it was built for.
+        """
+        state = plasmaState.tobytes()
+        for key in reversed(self.__factorizations):
+            if key[1] == state and abs(key[0] - step) <= Netlist.STEP_TOLERANCE * key[0]:
+                self.__factorizations.move_to_end(key)
+                return self.__factorizations[key], key[0]
+        conductance, capacitance = self.assemble(plasmaState)
+        self.__factorizations[(step, state)] = splu((conductance + capacitance / step).tocsc())
+        if len(self.__factorizations) > Netlist.CACHE_SIZE:
+            self.__factorizations.popitem(last=False)
+        return self.__factorizations[(step, state)], step
+
+    def solveTransient(self, time : np.ndarray):
+        """
+        Solve the circuit over a time axis.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: A monotonically increasing array of time values.
+
+        Returns:
+        A tuple (voltages, currents): voltages is an array of shape (nodes, len(time)) whose row i holds the voltage of
+        node i (row 0 is ground), currents is an array of shape (sources, len(time)) with the source currents.
+
+        This method integrates the MNA equations G x + C dx/dt = b(t) with the backward Euler method. The first sample is
+        a consistent operating point for the source values at time[0]: it is one backward Euler step from an uncharged
+        circuit over a step that is negligible against the first one, so capacitive nodes take the charge-conserving
+        capacitive divider of the sources and purely resistive nodes their DC value. A source that is not 0 at time[0]
+        therefore does not produce a current spike in the first step. The source currents of the first sample repeat
+        those of the first step, as there is no earlier step to take a current from. All source waveforms are evaluated
+        up front in one vectorized call per source. Plasma elements switch on or off based on the voltage across them at
+        the end of the previous step; the factorization of the system matrix for each visited (step size, plasma state)
+        pair is cached and reused. A step within STEP_TOLERANCE of a cached one is taken with the cached step size, which
+        changes the integrated charge by at most that relative amount.
+
+        Note: This method assumes the existence of the numpy and scipy libraries.
+        """
+        time = np.asarray(time, dtype=float)
+        nodeCount = len(self.__nodes) - 1
+        size = nodeCount + len(self.__sources)
+        self.assemble()
+        _, capacitance, (plasmaA, plasmaB, _, breakdown, extinction) = self.__matrices
+
+        excitation = np.zeros((len(self.__sources), len(time)))
+        for index, source in enumerate(self.__sources):
+            excitation[index] = source.evaluate(time)
+
+        plasmaState = np.zeros(len(plasmaA), dtype=bool)
+        solution = np.zeros((size, len(time)))
+        rhs = np.zeros(size)
+        for step in range(len(time)):
+            if step == 0:
+                factorization, dt = self.__factorize(Netlist.INITIAL_STEP * (time[1] - time[0] if len(time) > 1 else 1.0), plasmaState)
+                rhs[:] = 0.0
+            else:
+                factorization, dt = self.__factorize(time[step] - time[step - 1], plasmaState)
+                rhs[:] = capacitance @ state / dt
+            rhs[nodeCount:] += excitation[:, step]
+            state = factorization.solve(rhs)
+            solution[:, step] = state
+
+            if len(plasmaA):
+                nodeVoltages = np.concatenate([[0.0], state[:nodeCount]])
+                across = np.abs(nodeVoltages[plasmaA] - nodeVoltages[plasmaB])
+                plasmaState = np.where(plasmaState, across > extinction, across > breakdown)
+
+        if len(time) > 1:
+            solution[nodeCount:, 0] = solution[nodeCount:, 1]
+        self.__log.debug(f"Solved {len(time)} time steps with {len(self.__factorizations)} cached factorizations")
+        voltages = np.zeros((nodeCount + 1, len(time)))
+        voltages[1:] = solution[:nodeCount]
+        return voltages, solution[nodeCount:]
+
+    def getPlasmaPower(self, voltages : np.ndarray) -> np.ndarray:
+        """
+        Get the power dissipated in every plasma element along a transient solution.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - voltages: The node voltages returned by solveTransient().
+
+        Returns:
+        An array of shape (plasma elements, len(time)) with the power in W, in the order the plasma elements were added.
+
+        A conducting element dissipates V^2 / R_on. Whether an element conducts during a step follows the same
+        breakdown/extinction hysteresis as in solveTransient(), replayed on the voltage across it with whole-array
+        operations: samples above the breakdown voltage switch it on, samples at or below the extinction voltage switch it
+        off and samples in between keep the state of the last sample that set it. An element conducts during step k if
+        it was switched on at the end of step k - 1.
+        """
+        plasmaA, plasmaB, resistance, breakdown, extinction = self.__elements.select(Netlist.PLASMA)
+        across = np.abs(voltages[plasmaA] - voltages[plasmaB])
+        code = np.where(across > breakdown[:, None], 1, np.where(across <= extinction[:, None], 0, -1))
+        last = np.maximum.accumulate(np.where(code >= 0, np.arange(across.shape[1]), -1), axis=1)
+        state = (last >= 0) & (np.take_along_axis(code, np.maximum(last, 0), axis=1) == 1)
+        conducting = np.zeros_like(state)
+        conducting[:, 1:] = state[:, :-1]
+        return np.where(conducting, across ** 2 / resistance[:, None], 0.0)
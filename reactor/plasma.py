@@ -1,27 +1,324 @@
+import json
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+from utility.logger import LoggerIfc
+
+
 class Plasma:
     """
-    Represents a plasma entity.
+    Represents the plasma of the reactor gap as a zero-dimensional chemical kinetics model.
 
     Methods:
-    - __init__(): Initialize a Plasma instance.
-    
-    TODO: Add more methods as needed.
+    - __init__(reactionSet: dict, gasTemperature: float = 300.0, electronDensityPerPowerDensity: float = 1e13): Initialize a Plasma instance.
+    - loadReactionSet(path: str): Load a reaction set from a JSON file.
+    - fromFile(path: str, gasTemperature: float = 300.0, electronDensityPerPowerDensity: float = 1e13): Create a Plasma
+      instance from a reaction set file.
+    - getSpecies(): Get the names of the species.
+    - getSpeciesIndex(name: str): Get the position of a species in the density vectors.
+    - getInitialDensities(): Get the initial densities of the reaction set.
+    - getRateCoefficients(): Get the rate coefficients of all reactions.
+    - setElectronImpactRates(rates): Override the rate coefficients of the electron impact reactions.
+    - setRateTable(rateTable): Take the rate coefficients of tabulated electron impact reactions from a RateTable.
+    - getDerivative(densities, electronDensity, reducedField=None): Get the time derivative of the densities.
+    - getJacobian(densities, electronDensity, reducedField=None): Get the sparse Jacobian of the time derivative.
+    - getCyclePower(results, frequency): Reduce the simulated discharge power to its mean over every period of the voltage source.
+    - integrate(duration, power, volume, initial, rtol, atol, samples, reducedField): Integrate the species densities.
+
+    The reaction set is a JSON document of the form
+        {"species": {"O2": 5.0e24, "O": 0.0, "O3": 0.0},
+         "reactions": [{"reactants": ["e", "O2"], "products": ["e", "O", "O"], "rate": 1e-16},
+                       {"reactants": ["O", "O2", "O2"], "products": ["O3", "O2"], "rate": [6.0e-46, -2.6, 0.0]}]}
+    where species map to their initial densities in m^-3 and rates are either a constant in SI units or Arrhenius
+    parameters [A, n, Ea] for k = A * (T / 300)^n * exp(-Ea / T), with T the gas temperature in K and Ea in K. A species
+    listed twice reacts twice (mass action). The electron "e" is not integrated: its density is prescribed from the
+    discharge power density, n_e = electronDensityPerPowerDensity * P / volume, which couples the chemistry to the
+    power dissipated in the gap. That is the power of the plasma element of the equivalent circuit
+    (Reactor.simulateCircuit() with a breakdown voltage, see SimulationResults.getDissipatedPower()), not the power drawn
+    from the source (SimulationResults.getPower()), which is reactive for the capacitive cell and averages to about 0.
+    Reactions with "e" among their reactants are electron impact reactions.
+    An electron impact reaction may name a reaction of a RateTable with a "table" entry; once a table is set with
+    setRateTable() its rate coefficient follows the reduced field E/N given to integrate().
 
+    The rates are r_j = k_j * n_e^(e_j) * prod(n_i) over the reactants of reaction j, evaluated for all reactions at once
+    through a padded reactant index matrix; the padding points to an extra entry fixed at 1. The Jacobian is
+    S @ D with the sparse stoichiometric matrix S and the sparse partial derivatives D of the rates, whose pattern is
+    fixed by the reactant matrix and only its values are recomputed. The system is integrated with the implicit BDF
+    method of scipy, which factorizes the sparse Jacobian, so sets with hundreds of species and reactions stay cheap.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy and scipy libraries.
     """
+    ELECTRON = "e"
 
-    def __init__(self):
+    def __init__(self, reactionSet : dict, gasTemperature : float = 300.0, electronDensityPerPowerDensity : float = 1e13):
         """
         Initialize a Plasma instance.
 
         Parameters:
+        - reactionSet: The reaction set (see the class documentation).
+        - gasTemperature: The gas temperature in K (default: 300).
+        - electronDensityPerPowerDensity: The electron density in m^-3 per W/m^3 of discharge power density (default: 1e13).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If a reaction refers to an unknown species.
+
+        This method builds the padded reactant index matrix, the stoichiometric matrix and the sparsity pattern of the rate
+        derivatives once.
+
+        Note: This method assumes the existence of the LoggerIfc class and the numpy and scipy libraries.
+        """
+        self.log = LoggerIfc("Plasma")
+        self.__species = list(reactionSet["species"].keys())
+        self.__index = {name: position for position, name in enumerate(self.__species)}
+        self.__initial = np.array([float(reactionSet["species"][name]) for name in self.__species])
+        self.__gasTemperature = float(gasTemperature)
+        self.__electronDensityPerPowerDensity = float(electronDensityPerPowerDensity)
+
+        reactions = reactionSet["reactions"]
+        speciesCount, reactionCount = len(self.__species), len(reactions)
+        order = max([sum(1 for name in reaction["reactants"] if name != Plasma.ELECTRON) for reaction in reactions] + [1])
+        self.__reactants = np.full((reactionCount, order), speciesCount, dtype=np.int64)
+        self.__electronOrder = np.zeros(reactionCount)
+        stoichiometry = np.zeros((speciesCount, reactionCount))
+        self.__arrhenius = np.zeros((reactionCount, 3))
+        for row, reaction in enumerate(reactions):
+            heavy = [name for name in reaction["reactants"] if name != Plasma.ELECTRON]
+            self.__electronOrder[row] = len(reaction["reactants"]) - len(heavy)
+            for name in heavy + [name for name in reaction["products"] if name != Plasma.ELECTRON]:
+                if name not in self.__index:
+                    raise ValueError(f"Reaction {row} refers to the unknown species {name}")
+            self.__reactants[row, :len(heavy)] = [self.__index[name] for name in heavy]
+            np.subtract.at(stoichiometry[:, row], [self.__index[name] for name in heavy], 1)
+            products = [self.__index[name] for name in reaction["products"] if name != Plasma.ELECTRON]
+            np.add.at(stoichiometry[:, row], products, 1)
+            rate = reaction["rate"]
+            self.__arrhenius[row] = [rate, 0.0, 0.0] if np.isscalar(rate) else rate
+        self.__stoichiometry = sparse.csr_matrix(stoichiometry)
+        self.__rates = (self.__arrhenius[:, 0] * (self.__gasTemperature / 300.0) ** self.__arrhenius[:, 1]
+                        * np.exp(-self.__arrhenius[:, 2] / self.__gasTemperature))
+        self.__electronImpact = np.flatnonzero(self.__electronOrder > 0)
+        self.__tableRows = np.array([row for row in self.__electronImpact if "table" in reactions[row]], dtype=np.int64)
+        self.__tableNames = [reactions[row]["table"] for row in self.__tableRows]
+        self.__rateTable = None
+
+        rows = np.repeat(np.arange(reactionCount), order)
+        columns = self.__reactants.ravel()
+        self.__derivativeMask = columns < speciesCount
+        self.__derivativeRows = rows[self.__derivativeMask]
+        self.__derivativeColumns = columns[self.__derivativeMask]
+        self.log.info(f"Plasma kinetics with {speciesCount} species and {reactionCount} reactions ({len(self.__electronImpact)} electron impact)")
+
+    @staticmethod
+    def loadReactionSet(path : str) -> dict:
+        """
+        Load a reaction set from a JSON file.
+
+        Parameters:
+        - path: The path of the JSON file.
+
+        Returns:
+        The reaction set dictionary.
+        """
+        with open(path) as source:
+            return json.load(source)
+
+    @staticmethod
+    def fromFile(path : str, gasTemperature : float = 300.0, electronDensityPerPowerDensity : float = 1e13):
+        """
+        Create a Plasma instance from a reaction set file.
+
+        Parameters:
+        - path: The path of the JSON reaction set.
+        - gasTemperature: See __init__ (default: 300).
+        - electronDensityPerPowerDensity: See __init__ (default: 1e13).
+
+        Returns:
+        A Plasma instance.
+        """
+        return Plasma(Plasma.loadReactionSet(path), gasTemperature, electronDensityPerPowerDensity)
+
+    def getSpecies(self) -> list:
+        return list(self.__species)
+
+    def getSpeciesIndex(self, name : str) -> int:
+        return self.__index[name]
+
+    def getInitialDensities(self) -> np.ndarray:
+        return self.__initial.copy()
+
+    def getRateCoefficients(self) -> np.ndarray:
+        return self.__rates.copy()
+
+    def setElectronImpactRates(self, rates) -> None:
+        """
+        Override the rate coefficients of the electron impact reactions.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - rates: The new rate coefficients, one per electron impact reaction in reaction set order.
+
+        Returns:
         None
 
+        Raises:
+        ValueError: If the number of rates does not match the number of electron impact reactions.
+        """
+        rates = np.asarray(rates, dtype=float)
+        if rates.shape != self.__electronImpact.shape:
+            raise ValueError(f"Expected {len(self.__electronImpact)} electron impact rates, got {rates.size}")
+        self.__rates[self.__electronImpact] = rates
+
+    def setRateTable(self, rateTable) -> None:
+        """
+        Take the rate coefficients of tabulated electron impact reactions from a RateTable.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - rateTable: A RateTable instance containing every reaction named by a "table" entry of the reaction set, or
+          None to go back to the constant rate coefficients.
+
         Returns:
         None
 
-        This method initializes a Plasma instance.
+        Raises:
+        KeyError: If the table lacks a reaction named in the reaction set.
+        """
+        missing = [name for name in self.__tableNames if rateTable is not None and name not in rateTable.getNames()]
+        if missing:
+            raise KeyError(f"The rate table has no reactions {missing}")
+        self.__rateTable = rateTable
+
+    def __getEffectiveRates(self, electronDensity : float, reducedField = None) -> np.ndarray:
+        rates = self.__rates
+        if self.__rateTable is not None and reducedField is not None and len(self.__tableRows):
+            rates = rates.copy()
+            rates[self.__tableRows] = self.__rateTable.lookup(reducedField, self.__tableNames)
+        return rates * electronDensity ** self.__electronOrder
+
+    def getDerivative(self, densities, electronDensity : float, reducedField = None) -> np.ndarray:
+        """
+        Get the time derivative of the densities.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - densities: The species densities in m^-3.
+        - electronDensity: The electron density in m^-3.
+        - reducedField: The reduced field in Td for the tabulated reactions (default: None, constant rates).
+
+        Returns:
+        The time derivative of the densities in m^-3 s^-1.
+        """
+        padded = np.append(densities, 1.0)
+        return self.__stoichiometry @ (self.__getEffectiveRates(electronDensity, reducedField) * np.prod(padded[self.__reactants], axis=1))
+
+    def getJacobian(self, densities, electronDensity : float, reducedField = None):
+        """
+        Get the sparse Jacobian of the time derivative.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - densities: The species densities in m^-3.
+        - electronDensity: The electron density in m^-3.
+        - reducedField: The reduced field in Td for the tabulated reactions (default: None, constant rates).
+
+        Returns:
+        The Jacobian as a scipy CSC matrix.
+
+        The derivative of every rate with respect to the species in one reactant slot is the rate coefficient times the
+        product of the other slots; repeated reactants add up when the entries are assembled.
+        """
+        factors = np.append(densities, 1.0)[self.__reactants]
+        others = np.empty_like(factors)
+        for slot in range(factors.shape[1]):
+            others[:, slot] = np.prod(np.delete(factors, slot, axis=1), axis=1)
+        values = (self.__getEffectiveRates(electronDensity, reducedField)[:, None] * others).ravel()[self.__derivativeMask]
+        derivatives = sparse.csr_matrix((values, (self.__derivativeRows, self.__derivativeColumns)),
+                                        shape=(len(self.__rates), len(self.__species)))
+        return (self.__stoichiometry @ derivatives).tocsc()
+
+    @staticmethod
+    def getCyclePower(results, frequency : float):
+        """
+        Reduce the simulated discharge power to its mean over every period of the voltage source.
 
-        TODO: Add more details as needed.
+        Parameters:
+        - results: A SimulationResults instance that carries the dissipated power, e.g. from Reactor.simulateCircuit()
+          with a breakdown voltage.
+        - frequency: The frequency of the voltage source, in the convention of VoltageSource.getFrequency().
+
+        Returns:
+        A tuple (time, power) with the centre time of every complete period and the mean dissipated power over it in W.
+
+        Raises:
+        ValueError: If the results carry no dissipated power. The source power of Reactor.simulate() is reactive and its
+        cycle mean is about 0, so it cannot drive the discharge.
+        """
+        if results.getDissipatedPower() is None:
+            raise ValueError("The plasma kinetics need the dissipated discharge power, e.g. from Reactor.simulateCircuit() with a breakdown voltage")
+        time, power = results.getTime(), results.getDissipatedPower()
+        period = 2 * np.pi / frequency
+        cycles = int((time[-1] - time[0]) // period)
+        if cycles == 0:
+            return np.array([0.5 * (time[0] + time[-1])]), np.array([np.mean(power)])
+        bounds = np.searchsorted(time, time[0] + np.arange(cycles + 1) * period)
+        step = np.diff(time, append=time[-1])
+        # Differences of the running sums at the bounds, so the partial period after the last bound is left out.
+        energy = np.diff(np.concatenate([[0.0], np.cumsum(power * step)])[bounds])
+        duration = np.diff(np.concatenate([[0.0], np.cumsum(step)])[bounds])
+        return time[0] + (np.arange(cycles) + 0.5) * period, energy / np.maximum(duration, np.finfo(float).tiny)
 
+    def integrate(self, duration : float, power = 0.0, volume : float = 1e-6, initial = None, rtol : float = 1e-6,
+                  atol : float = 1e6, samples : int = 200, reducedField = None) -> dict:
         """
-        pass
+        Integrate the species densities.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The integration time in seconds.
+        - power: The power dissipated in the discharge in W, either a constant or a tuple (time, power) such as returned
+          by getCyclePower(), which is interpolated linearly and held constant outside its range. Negative values drive
+          no electrons (default: 0).
+        - volume: The discharge volume in m^3 (default: 1e-6).
+        - initial: The initial densities in m^-3 (default: getInitialDensities()).
+        - rtol: The relative tolerance of the solver (default: 1e-6).
+        - atol: The absolute tolerance of the solver in m^-3 (default: 1e6).
+        - samples: The number of output samples (default: 200).
+        - reducedField: The reduced field E/N in Td for the reactions tabulated in the rate table (see setRateTable),
+          either a constant or a tuple (time, field) that is interpolated linearly, e.g. the per-cycle RMS of
+          RateTable.reducedField() (default: None, constant rates).
+
+        Returns:
+        A dictionary with the output "time" array and one density array per species name.
+
+        Raises:
+        RuntimeError: If the solver fails.
+
+        Note: This method assumes the existence of the scipy library.
+        """
+        if isinstance(power, tuple):
+            powerTime, powerValues = (np.asarray(values, dtype=float) for values in power)
+            electronDensity = lambda time: self.__electronDensityPerPowerDensity * max(np.interp(time, powerTime, powerValues), 0.0) / volume
+        else:
+            constant = self.__electronDensityPerPowerDensity * max(float(power), 0.0) / volume
+            electronDensity = lambda time: constant
+
+        if isinstance(reducedField, tuple):
+            fieldTime, fieldValues = (np.asarray(values, dtype=float) for values in reducedField)
+            field = lambda time: np.interp(time, fieldTime, fieldValues)
+        else:
+            field = lambda time: reducedField
+
+        initial = self.getInitialDensities() if initial is None else np.asarray(initial, dtype=float)
+        solution = solve_ivp(lambda time, densities: self.getDerivative(densities, electronDensity(time), field(time)),
+                             (0.0, duration), initial, method="BDF", rtol=rtol, atol=atol,
+                             jac=lambda time, densities: self.getJacobian(densities, electronDensity(time), field(time)),
+                             t_eval=np.linspace(0.0, duration, samples))
+        if not solution.success:
+            raise RuntimeError(f"Plasma kinetics integration failed: {solution.message}")
+        self.log.info(f"Integrated {duration}s of plasma kinetics in {solution.nfev} evaluations and {solution.nlu} factorizations")
+        result = {"time": solution.t}
+        result.update({name: solution.y[position] for position, name in enumerate(self.__species)})
+        return result
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import numpy as np
+from utility.logger import LoggerIfc
+
+
+class RateTable:
+    """
+    Electron impact rate coefficients precomputed on a reduced field (E/N) grid.
+
+    Methods:
+    - __init__(path: str): Open a table file, memory mapping its rate coefficients.
+    - build(crossSections: dict, meanEnergy, fieldRange: tuple = (1.0, 1000.0), points: int = 256, cacheDirectory: str = ".rate_tables"): Get the table for a set of cross sections, from the cache or computed.
+    - compute(crossSections: dict, meanEnergy, fields): Compute rate coefficients for a set of reduced fields.
+    - write(path: str, names, fields, rates, digest: bytes): Write a table file.
+    - getNames(): Get the reaction names of the table.
+    - getFields(): Get the reduced field grid in Td.
+    - getDigest(): Get the hash of the input data the table was computed from.
+    - lookup(reducedField, names=None): Interpolate the rate coefficients for an array of reduced fields.
+    - reducedField(gapVoltage, gapDistance: float, gasDensity: float): Get the reduced field in the gap.
+    - getGapVoltage(voltage, dielectricBarrierCapacitor, plasmaGapCapacitor): Get the share of the applied voltage across the gap.
+
+    Rate coefficients k = sqrt(2e/m_e) * integral(eps * sigma(eps) * f(eps) deps) (m^3/s) are computed for a Maxwellian
+    electron energy distribution whose mean energy follows the reduced field through a user supplied mapping. The grid
+    is logarithmic in E/N, so a lookup finds its grid interval with one multiplication instead of a search and all
+    fields of an array are interpolated in one pass. Fields outside the grid are clamped to its ends.
+
+    File format (little endian): the magic b"PRSRATE1", uint32 version, field count, reaction count and the byte length
+    of the names block, the 32-byte sha256 digest of the input data, the reaction names separated by newlines and
+    padded to 8 bytes, then the float64 fields and the float64 (reactions x fields) rate coefficients. The numeric part
+    is memory mapped, so opening a table reads only its header. build() names cached files after the digest of the
+    cross sections, the field grid and the mean energies on it, so any change of the inputs computes a new table.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy library.
+    """
+    MAGIC = b"PRSRATE1"
+    VERSION = 1
+    ELECTRON_CHARGE = 1.602176634e-19
+    ELECTRON_MASS = 9.1093837015e-31
+    ENERGY_POINTS = 2048
+
+    def __init__(self, path : str) -> None:
+        """
+        Open a table file, memory mapping its rate coefficients.
+
+        Parameters:
+        - path: The path of the table file.
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the file is not a rate table of a supported version.
+        """
+        self.__log = LoggerIfc("RateTable")
+        with open(path, "rb") as source:
+            if source.read(len(RateTable.MAGIC)) != RateTable.MAGIC:
+                raise ValueError(f"{path} is not a rate table")
+            version, fieldCount, reactionCount, nameBytes = np.frombuffer(source.read(16), dtype="<u4")
+            if version != RateTable.VERSION:
+                raise ValueError(f"{path} has the unsupported rate table version {version}")
+            self.__digest = source.read(32)
+            names = source.read(int(nameBytes)).rstrip(b"\0").decode("utf-8")
+            offset = source.tell()
+        self.__names = names.split("\n") if names else []
+        self.__columns = {name: row for row, name in enumerate(self.__names)}
+        data = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(int(fieldCount) * (int(reactionCount) + 1),))
+        self.__fields = data[:fieldCount]
+        self.__rates = data[fieldCount:].reshape(int(reactionCount), int(fieldCount))
+        self.__logStart = np.log(self.__fields[0])
+        self.__logStep = (np.log(self.__fields[-1]) - self.__logStart) / max(int(fieldCount) - 1, 1)
+        self.__log.debug(f"Opened rate table {path} with {reactionCount} reactions on {fieldCount} fields")
+
+    @staticmethod
+    def compute(crossSections : dict, meanEnergy, fields) -> np.ndarray:
+        """
+        Compute rate coefficients for a set of reduced fields.
+
+        Parameters:
+        - crossSections: A dictionary mapping reaction names to tuples (energy in eV, cross section in m^2).
+        - meanEnergy: The mean electron energy in eV as a function of the reduced field in Td, either a vectorized
+          callable or a tuple (fields, energies) that is interpolated in log(E/N).
+        - fields: The reduced fields in Td.
+
+        Returns:
+        A (reactions x fields) array of rate coefficients in m^3/s, in the order of crossSections.
+
+        The energy integral is evaluated on one common energy grid for all fields at once.
+        """
+        fields = np.asarray(fields, dtype=float)
+        if callable(meanEnergy):
+            energies = np.asarray(meanEnergy(fields), dtype=float)
+        else:
+            energies = np.interp(np.log(fields), np.log(np.asarray(meanEnergy[0], dtype=float)), np.asarray(meanEnergy[1], dtype=float))
+        temperature = 2.0 / 3.0 * np.broadcast_to(energies, fields.shape)
+        top = max(float(np.max(energy)) for energy, _ in crossSections.values())
+        grid = np.linspace(0.0, max(top, 30.0 * float(np.max(temperature))), RateTable.ENERGY_POINTS)
+        weight = np.full(len(grid), grid[1] - grid[0])
+        weight[[0, -1]] *= 0.5
+        distribution = 2.0 / np.sqrt(np.pi) * temperature[None, :] ** -1.5 * np.exp(-grid[:, None] / temperature[None, :])
+        kernel = np.sqrt(2 * RateTable.ELECTRON_CHARGE / RateTable.ELECTRON_MASS) * (weight * grid)[:, None] * distribution
+        sections = np.stack([np.interp(grid, np.asarray(energy, dtype=float), np.asarray(section, dtype=float), left=0.0, right=0.0)
+                             for energy, section in crossSections.values()])
+        return sections @ kernel
+
+    @staticmethod
+    def write(path : str, names, fields, rates, digest : bytes = b"\0" * 32) -> None:
+        """
+        Write a table file.
+
+        Parameters:
+        - path: The path of the table file. The file is written next to it first and then renamed, so readers never see
+          a partial table.
+        - names: The reaction names.
+        - fields: The logarithmic reduced field grid in Td.
+        - rates: The (reactions x fields) rate coefficients in m^3/s.
+        - digest: The 32-byte sha256 digest of the input data (default: zeros).
+
+        Returns:
+        None
+        """
+        encoded = "\n".join(names).encode("utf-8")
+        encoded += b"\0" * (-len(encoded) % 8)
+        fields = np.asarray(fields, dtype="<f8")
+        rates = np.asarray(rates, dtype="<f8")
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as target:
+            target.write(RateTable.MAGIC)
+            target.write(np.array([RateTable.VERSION, len(fields), len(rates), len(encoded)], dtype="<u4").tobytes())
+            target.write(digest)
+            target.write(encoded)
+            target.write(fields.tobytes())
+            target.write(rates.tobytes())
+        os.replace(temporary, path)
+
+    @staticmethod
+    def build(crossSections : dict, meanEnergy, fieldRange : tuple = (1.0, 1000.0), points : int = 256, cacheDirectory : str = ".rate_tables"):
+        """
+        Get the table for a set of cross sections, from the cache or computed.
+
+        Parameters:
+        - crossSections: See compute().
+        - meanEnergy: See compute().
+        - fieldRange: The lowest and highest reduced field of the grid in Td (default: (1, 1000)).
+        - points: The number of grid points (default: 256).
+        - cacheDirectory: The directory of the cached table files (default: ".rate_tables").
+
+        Returns:
+        A RateTable instance.
+        """
+        fields = np.geomspace(fieldRange[0], fieldRange[1], points)
+        energies = np.asarray(meanEnergy(fields) if callable(meanEnergy) else
+                              np.interp(np.log(fields), np.log(np.asarray(meanEnergy[0], dtype=float)), np.asarray(meanEnergy[1], dtype=float)), dtype="<f8")
+        digest = hashlib.sha256()
+        for name, (energy, section) in crossSections.items():
+            digest.update(name.encode("utf-8") + b"\0")
+            digest.update(np.asarray(energy, dtype="<f8").tobytes())
+            digest.update(np.asarray(section, dtype="<f8").tobytes())
+        digest.update(fields.astype("<f8").tobytes())
+        digest.update(np.broadcast_to(energies, fields.shape).tobytes())
+        path = os.path.join(cacheDirectory, digest.hexdigest() + ".rates")
+        if not os.path.exists(path):
+            os.makedirs(cacheDirectory, exist_ok=True)
+            LoggerIfc("RateTable").info(f"Computing rate table for {len(crossSections)} reactions on {points} fields")
+            RateTable.write(path, list(crossSections), fields, RateTable.compute(crossSections, (fields, energies), fields), digest.digest())
+        return RateTable(path)
+
+    def getNames(self) -> list:
+        return list(self.__names)
+
+    def getFields(self) -> np.ndarray:
+        return self.__fields
+
+    def getDigest(self) -> bytes:
+        return self.__digest
+
+    def lookup(self, reducedField, names = None) -> np.ndarray:
+        """
+        Interpolate the rate coefficients for an array of reduced fields.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - reducedField: The reduced fields in Td, any shape.
+        - names: The reactions to look up (default: all, in table order).
+
+        Returns:
+        An array of shape (reactions,) + reducedField.shape with the rate coefficients in m^3/s, linearly interpolated
+        in log(E/N).
+
+        Raises:
+        KeyError: If a reaction name is not in the table.
+        """
+        reducedField = np.asarray(reducedField, dtype=float)
+        rates = self.__rates if names is None else self.__rates[[self.__columns[name] for name in names]]
+        position = (np.log(np.clip(reducedField, self.__fields[0], self.__fields[-1])) - self.__logStart) / self.__logStep
+        index = np.clip(position.astype(np.int64), 0, len(self.__fields) - 2)
+        fraction = position - index
+        return rates[:, index] * (1.0 - fraction) + rates[:, index + 1] * fraction
+
+    @staticmethod
+    def reducedField(gapVoltage, gapDistance : float, gasDensity : float = 2.45e25) -> np.ndarray:
+        """
+        Get the reduced field in the gap.
+
+        Parameters:
+        - gapVoltage: The voltage across the gap in V.
+        - gapDistance: The gap width in m.
+        - gasDensity: The gas number density in m^-3 (default: 2.45e25, atmospheric pressure at 300 K).
+
+        Returns:
+        The magnitude of E/N in Td (1 Td = 1e-21 V m^2).
+        """
+        return np.abs(np.asarray(gapVoltage, dtype=float)) / gapDistance / gasDensity * 1e21
+
+    @staticmethod
+    def getGapVoltage(voltage, dielectricBarrierCapacitor, plasmaGapCapacitor) -> np.ndarray:
+        """
+        Get the share of the applied voltage across the gap.
+
+        Parameters:
+        - voltage: The applied voltage in V, e.g. SimulationResults.getVoltage().
+        - dielectricBarrierCapacitor: The dielectric barrier Capacitor.
+        - plasmaGapCapacitor: The plasma gap Capacitor.
+
+        Returns:
+        The gap voltage of the capacitive divider, V * C_barrier / (C_barrier + C_gap), valid before breakdown.
+        """
+        barrier = dielectricBarrierCapacitor.getValue()
+        return np.asarray(voltage, dtype=float) * barrier / (barrier + plasmaGapCapacitor.getValue())
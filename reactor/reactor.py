@@ -1,11 +1,16 @@
 import sympy
+import numpy as np
 from reactor.capacitor import Capacitor
 from utility.logger import LoggerIfc
 from reactor.ac_voltage_source import VoltageSource as Vs
 from base.charge import Charge
 from base.intensity import Intensity
-from utility.matplot_wrapper import MatPlotWrapper
+from reactor.netlist import Netlist
+from reactor.results import SimulationResults
+from base.sensitivity import Sensitivity
+from utility.time import Time
 from utility.job_scheduler import JobScheduler
+from utility.memory_tracker import MemoryTracker
 
 
 class Reactor:
@@ -14,11 +19,17 @@ class Reactor:
 
     Methods:
     - __init__(reactorCellCapacitor: Capacitor, dielectricBarrierCapacitor: Capacitor, plasmaGapCapacitor: Capacitor, voltageSrc: Vs): Initialize a Reactor instance.
+    - getParameters(): Get the capacitances and voltage source parameters of the reactor.
+    - getNetlist(breakdownVoltage: float = None, onResistance: float = 1e3): Get the equivalent circuit of the reactor as a Netlist.
+    - simulateAdaptive(duration: float = 1e-1, tolerance: float = 1e-2, minStep: float = 1e-7, maxStep: float = 1e-4, breakdownVoltage: float = None): Simulate the reactor on an adaptive time axis.
+    - simulateChunks(duration: float = 1e-1, sampleRate: float = 1e6, chunkSize: int = 65536): Simulate the reactor chunk by chunk.
+    - simulate(duration: float = 1e-1, sampleRate: float = 1e6, workers: int = None, sensitivities: bool = False): Simulate the reactor without plotting.
+    - simulateCircuit(duration: float = 1e-1, sampleRate: float = 1e6, breakdownVoltage: float = None, onResistance: float = 1e3): Simulate the equivalent circuit of the reactor.
     - simulateWithPlots(duration: float = 1e-1, samplePoint: float = 1e-6): Simulate the reactor with plots.
 
-    Note: This class assumes the existence of LoggerIfc, Capacitor, Vs, Charge, Intensity, JobScheduler, and MatPlotWrapper classes.
+    Note: This class assumes the existence of LoggerIfc, Capacitor, Vs, Charge, Intensity, Netlist, SimulationResults, Sensitivity, Time, JobScheduler, and MatPlotWrapper classes.
     """
-    def __init__(self, reactorCellCapacitor: Capacitor, dielectricBarrierCapacitor: Capacitor, plasmaGapCapacitor: Capacitor, voltageSrc: Vs):
+    def __init__(self, reactorCellCapacitor: Capacitor, dielectricBarrierCapacitor: Capacitor, plasmaGapCapacitor: Capacitor, voltageSrc: Vs, memoryTracker: MemoryTracker = None):
         """
         Initialize a Reactor instance.
 
@@ -26,7 +37,10 @@ class Reactor:
         - reactorCellCapacitor: An instance of the Capacitor class representing the reactor cell capacitor.
         - dielectricBarrierCapacitor: An instance of the Capacitor class representing the dielectric barrier capacitor.
         - plasmaGapCapacitor: An instance of the Capacitor class representing the plasma gap capacitor.
-        - voltageSrc: An instance of the Vs class representing the voltage source.
+        - voltageSrc: An instance of the Vs class representing the voltage source, or any source with the same interface
+          (e.g. a MeasuredVoltageSource or a BurstVoltageSource).
+        - memoryTracker: An optional MemoryTracker instance. If given, the setup and every simulation stage are measured
+          with it (default: None).
 
         Returns:
         None
@@ -48,15 +62,243 @@ class Reactor:
         self.log.info(f"Plasma gap capacitance was added with value {self.__plasmaGapCapacitor.getValue()}C and symbol {self.__plasmaGapCapacitor.getSymbol()}")
 
         self.__voltageSrc = voltageSrc
-        self.log.info(f"Voltage source was added with amplitude {self.__voltageSrc.getAmplitude()}V and frequency {self.__voltageSrc.getFrequency()}Hz")
+        if self.__voltageSrc.isSymbolic():
+            self.log.info(f"Voltage source was added with amplitude {self.__voltageSrc.getAmplitude()}V and frequency {self.__voltageSrc.getFrequency()}Hz")
+        else:
+            # Numeric sources may derive amplitude and frequency from a whole capture, so they are not queried here.
+            self.log.info(f"Voltage source {type(self.__voltageSrc).__name__} was added")
 
-        self.__charge = Charge("Q", self.__voltageSrc, self.__reactorCellCapacitor)
+        self.__memoryTracker = memoryTracker
+        with MemoryTracker.track(self.__memoryTracker, "setup"):
+            self.__charge = Charge("Q", self.__voltageSrc, self.__reactorCellCapacitor)
 
-        self.__intensityInstance = Intensity(self.__charge)
-        self.__intensityInstance.substituteCharge(self.__charge)
-        self.__intensityInstance.substituteVoltage(self.__voltageSrc)
-        self.__intensityInstance.substituteCapacitance(self.__reactorCellCapacitor.getValue())
-        self.__jobScheduler = JobScheduler()
+            self.__intensityInstance = Intensity(self.__charge)
+            self.__intensityInstance.substituteCharge(self.__charge)
+            if self.__voltageSrc.isSymbolic():
+                self.__intensityInstance.substituteVoltage(self.__voltageSrc)
+            else:
+                self.log.info("Voltage source has no symbolic equation, intensity is derived from its sampled derivative")
+            self.__intensityInstance.substituteCapacitance(self.__reactorCellCapacitor.getValue())
+            self.__jobScheduler = JobScheduler()
+            self.__sensitivity = None
+
+    def __evaluateIntensity(self, time):
+        """
+        Evaluate the intensity (mA) for an array of time values, from the Intensity equation when the voltage source is
+        symbolic and as C_cell * dV/dt otherwise.
+        """
+        if self.__voltageSrc.isSymbolic():
+            return self.__intensityInstance.evaluate(time)
+        return self.__reactorCellCapacitor.getValue() * self.__voltageSrc.evaluateDerivative(time) * 1e3
+
+    def __evaluateSensitivities(self, time):
+        """
+        Evaluate voltage, intensity and their parameter sensitivities in one compiled pass and wrap them into a
+        SimulationResults instance.
+        """
+        if self.__sensitivity is None:
+            self.__sensitivity = Sensitivity(self.__reactorCellCapacitor, self.__dielectricBarrierCapacitor, self.__plasmaGapCapacitor, self.__voltageSrc)
+        with MemoryTracker.track(self.__memoryTracker, "sensitivity solve"):
+            solution = self.__sensitivity.evaluate(time)
+        sensitivities = {"intensitySensitivity": solution["intensitySensitivity"], "powerSensitivity": solution["powerSensitivity"]}
+        return SimulationResults(time, solution["voltage"], solution["intensity"], solution["voltage"] * self.__reactorCellCapacitor.getValue(), sensitivities)
+
+    def __evaluateWindows(self, time):
+        """
+        Evaluate all channels of a source with idle spans (e.g. a BurstVoltageSource) only inside its active windows. Only
+        the active samples are stored, together with the windows, in the SimulationResults instance.
+        """
+        windows = self.__voltageSrc.getActiveWindows(time)
+        activeTime = time[Time.getWindowIndices(windows)]
+        with MemoryTracker.track(self.__memoryTracker, "voltage solve"):
+            voltage = self.__voltageSrc.evaluate(activeTime)
+        with MemoryTracker.track(self.__memoryTracker, "intensity solve"):
+            intensity = self.__evaluateIntensity(activeTime)
+        with MemoryTracker.track(self.__memoryTracker, "power"):
+            return SimulationResults(time, voltage, intensity, voltage * self.__reactorCellCapacitor.getValue(), windows=windows)
+
+    def __evaluate(self, time, workers = None):
+        """
+        Evaluate all channels for an array of time values and wrap them into a SimulationResults instance. With more than
+        one worker and a symbolic voltage source, voltage and intensity are evaluated with JobScheduler.runSplit. Sources
+        with active windows are evaluated inside them only.
+        """
+        if hasattr(self.__voltageSrc, "getActiveWindows"):
+            return self.__evaluateWindows(time)
+        split = workers is not None and workers > 1 and self.__voltageSrc.isSymbolic()
+        with MemoryTracker.track(self.__memoryTracker, "voltage solve"):
+            voltage = self.__jobScheduler.runSplit(self.__voltageSrc.evaluate, time, workers) if split else self.__voltageSrc.evaluate(time)
+        with MemoryTracker.track(self.__memoryTracker, "intensity solve"):
+            intensity = self.__jobScheduler.runSplit(self.__intensityInstance.evaluate, time, workers) if split else self.__evaluateIntensity(time)
+        with MemoryTracker.track(self.__memoryTracker, "power"):
+            return SimulationResults(time, voltage, intensity, voltage * self.__reactorCellCapacitor.getValue())
+
+    def getParameters(self):
+        """
+        Get the capacitances and voltage source parameters of the reactor.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+
+        Returns:
+        A dictionary with the values of C_cell, C_barrier and C_gap (F) and the amplitude and frequency of the voltage
+        source, e.g. for storing next to exported results.
+        """
+        return {"C_cell": self.__reactorCellCapacitor.getValue(), "C_barrier": self.__dielectricBarrierCapacitor.getValue(),
+                "C_gap": self.__plasmaGapCapacitor.getValue(), "amplitude": float(self.__voltageSrc.getAmplitude()),
+                "frequency": float(self.__voltageSrc.getFrequency())}
+
+    def getNetlist(self, breakdownVoltage: float = None, onResistance: float = 1e3):
+        """
+        Get the equivalent circuit of the reactor as a Netlist.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - breakdownVoltage: The gap breakdown voltage. If given, a plasma element is placed across the gap (default: None).
+        - onResistance: The resistance of the plasma element while conducting (default: 1e3 ohms).
+
+        Returns:
+        A Netlist instance with the nodes "source" and "gap".
+
+        This method builds the usual dielectric barrier discharge equivalent circuit: the voltage source drives the
+        dielectric barrier capacitor in series with the plasma gap capacitor. The reactor cell capacitor is the series
+        equivalent of those two and is therefore not added as a separate element.
+
+        Note: This method assumes the existence of the Netlist class.
+        """
+        netlist = Netlist()
+        netlist.addVoltageSource("source", "0", self.__voltageSrc)
+        netlist.addCapacitor("source", "gap", self.__dielectricBarrierCapacitor)
+        netlist.addCapacitor("gap", "0", self.__plasmaGapCapacitor)
+        if breakdownVoltage is not None:
+            netlist.addPlasma("gap", "0", breakdownVoltage, onResistance)
+        return netlist
+
+    def simulateAdaptive(self, duration: float = 1e-1, tolerance: float = 1e-2, minStep: float = 1e-7, maxStep: float = 1e-4, breakdownVoltage: float = None):
+        """
+        Simulate the reactor on an adaptive time axis.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The duration of the simulation in seconds (default: 0.1).
+        - tolerance: The allowed interpolation error relative to the peak voltage and intensity (default: 1e-2).
+        - minStep: The smallest allowed sample spacing in seconds (default: 1e-7).
+        - maxStep: The largest allowed sample spacing in seconds (default: 1e-4).
+        - breakdownVoltage: If given, the moments where the gap voltage crosses this value are resolved down to minStep (default: None).
+
+        Returns:
+        A SimulationResults instance carrying the non-uniform time axis.
+
+        This method builds the time axis with Time.getAdaptiveTimeAxis so that samples are dense around voltage
+        zero-crossings, breakdown events and steep intensity slopes and coarse elsewhere. Sources with a getBreakpoints()
+        method (e.g. a BurstVoltageSource) seed the axis with them, so bursts shorter than maxStep are not skipped. Use SimulationResults.resample()
+        to get a uniform grid for plotting or FFTs.
+
+        Note: This method assumes the existence of the Time, Intensity and SimulationResults classes.
+        """
+        self.log.info(f"Simulating adaptively with duration {duration}s and tolerance {tolerance}")
+        events = [self.__voltageSrc.evaluate]
+        if breakdownVoltage is not None:
+            barrier = self.__dielectricBarrierCapacitor.getValue()
+            gapShare = barrier / (barrier + self.__plasmaGapCapacitor.getValue())
+            events.append(lambda time: np.abs(gapShare * self.__voltageSrc.evaluate(time)) - breakdownVoltage)
+
+        breakpoints = ()
+        if hasattr(self.__voltageSrc, "getBreakpoints"):
+            breakpoints = self.__voltageSrc.getBreakpoints(duration)
+        time = Time.getAdaptiveTimeAxis(duration, [self.__voltageSrc.evaluate, self.__evaluateIntensity],
+                                        tolerance, minStep, maxStep, events, breakpoints)
+        self.log.info(f"Adaptive time axis has {len(time)} samples instead of {int(duration / minStep)} at the finest step")
+        return self.__evaluate(time)
+
+    def simulateChunks(self, duration: float = 1e-1, sampleRate: float = 1e6, chunkSize: int = 1 << 16):
+        """
+        Simulate the reactor chunk by chunk.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The duration of the simulation in seconds (default: 0.1).
+        - sampleRate: The sampling rate in samples per second (default: 1e6).
+        - chunkSize: The number of samples per chunk (default: 65536).
+
+        Returns:
+        A generator of SimulationResults instances, one per chunk, in time order.
+
+        This method walks the same uniform time axis as Time.getTimeAxis(duration, sampleRate) but only ever creates one
+        chunk of it at a time. Together with a memory mapped MeasuredVoltageSource this streams arbitrarily long runs
+        through a bounded amount of memory.
+
+        Note: This method assumes the existence of the SimulationResults class.
+        """
+        samples = int(duration * sampleRate)
+        step = duration / samples if samples else 0.0
+        self.log.info(f"Simulating {samples} samples in chunks of {chunkSize}")
+        for start in range(0, samples, chunkSize):
+            yield self.__evaluate(np.arange(start, min(start + chunkSize, samples)) * step)
+
+    def simulate(self, duration: float = 1e-1, sampleRate: float = 1e6, workers: int = None, sensitivities: bool = False):
+        """
+        Simulate the reactor without plotting.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The duration of the simulation in seconds (default: 0.1).
+        - sampleRate: The sampling rate of the simulation in samples per second (default: 1e6).
+        - workers: If larger than 1, the time axis is split into contiguous slices evaluated by this many worker
+          processes through shared memory (see JobScheduler.runSplit). The results are identical to the serial run
+          (default: None, serial).
+        - sensitivities: If True, the derivatives of intensity and power with respect to every capacitance and to the
+          amplitude and frequency of the voltage source are evaluated in the same pass as the solution and returned by
+          SimulationResults.getSensitivities(), see Sensitivity. Needs a symbolic voltage source and ignores workers
+          (default: False).
+
+        Returns:
+        A SimulationResults instance holding the time axis and the voltage, intensity, power and charge arrays.
+
+        This method only runs the numerics: it neither imports matplotlib nor writes any file, so batch jobs and sweeps
+        only pay for the evaluation itself. Plotting is an optional consumer of the returned results, see
+        MatPlotWrapper.plotResults() and simulateWithPlots().
+
+        Note: This method assumes the existence of the Time and SimulationResults classes.
+        """
+        self.log.info(f"Simulating with duration {duration}s and sample rate {sampleRate}")
+        if sensitivities:
+            return self.__evaluateSensitivities(Time.getTimeAxis(duration, sampleRate))
+        return self.__evaluate(Time.getTimeAxis(duration, sampleRate), workers)
+
+    def simulateCircuit(self, duration: float = 1e-1, sampleRate: float = 1e6, breakdownVoltage: float = None, onResistance: float = 1e3):
+        """
+        Simulate the equivalent circuit of the reactor.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The duration of the simulation in seconds (default: 0.1).
+        - sampleRate: The sampling rate of the simulation in samples per second (default: 1e6).
+        - breakdownVoltage: The gap breakdown voltage. If given, the gap discharges through a plasma element (default:
+          None, no discharge).
+        - onResistance: The resistance of the plasma element while conducting (default: 1e3 ohms).
+
+        Returns:
+        A SimulationResults instance with the source voltage, the source current as intensity, the charge moved through
+        the dielectric barrier and the power dissipated in the plasma element (see getDissipatedPower()).
+
+        Unlike simulate(), which evaluates the ideal capacitor C_cell in closed form, this method solves the circuit of
+        getNetlist() with Netlist.solveTransient(), so it sees the barrier and gap capacitances separately and the
+        current pulses of the gap breakdown. The charge is C_barrier * (V_source - V_gap), which equals the charge
+        delivered by the source as the barrier is in series with it.
+
+        Note: This method assumes the existence of the Netlist, Time and SimulationResults classes.
+        """
+        self.log.info(f"Simulating the equivalent circuit with duration {duration}s and sample rate {sampleRate}")
+        time = Time.getTimeAxis(duration, sampleRate)
+        netlist = self.getNetlist(breakdownVoltage, onResistance)
+        with MemoryTracker.track(self.__memoryTracker, "circuit solve"):
+            voltages, currents = netlist.solveTransient(time)
+        source = voltages[netlist.getNodeIndex("source")]
+        gap = voltages[netlist.getNodeIndex("gap")]
+        dissipated = netlist.getPlasmaPower(voltages).sum(axis=0)
+        return SimulationResults(time, source, -currents[0] * 1e3, self.__dielectricBarrierCapacitor.getValue() * (source - gap),
+                                 dissipatedPower=dissipated)
 
     def simulateWithPlots(self, duration: float = 1e-1, samplePoint: float = 1e-6):
         """
@@ -68,23 +310,18 @@ class Reactor:
         - samplePoint: The sample point of the simulation in seconds (default: 1e-6).
 
         Returns:
-        None
+        The SimulationResults instance that was plotted.
 
-        This method simulates the reactor with the given duration and sample point. It schedules and runs the intensity and
-        voltage source solvers using a JobScheduler. After the simulation, it plots the results using MatPlotWrapper.
+        This method simulates the reactor with simulate() and plots the results using MatPlotWrapper, together with the
+        Lissajous curve of the charge.
 
-        Note: This method assumes the existence of a LoggerIfc, Intensity, JobScheduler, and MatPlotWrapper classes.
+        Note: This method assumes the existence of a LoggerIfc, SimulationResults, and MatPlotWrapper classes.
         """
-        self.log.info(f"Simulating with duration {duration}s and sample point {samplePoint}s")
+        from utility.matplot_wrapper import MatPlotWrapper
 
-        ploter = MatPlotWrapper(duration, samplePoint)
-        self.__jobScheduler.schedule(self.__intensityInstance.solve, ploter.getTime())
-        self.__jobScheduler.schedule(self.__voltageSrc.solve, ploter.getTime())
-        self.__jobScheduler.run()
-        
+        results = self.simulate(duration, samplePoint)
         self.log.info("Finished simulating syntetic data. Plotting results!")
-        ploter.plotInstance(self.__intensityInstance.getSolutions(), "Intensity I(t)", "Intensity (mA)", 8e-1)
-        ploter.plotInstance(self.__voltageSrc.getSolutions(), "Tension V(t)", "Tension (V)", 1e2)
-        ploter.plotInstance([i*v*1e-3 for i,v in zip(self.__intensityInstance.getSolutions(), self.__voltageSrc.getSolutions())], "Power approximated P(t)", "Power (W)", 0)
-        ploter.plotInstance([i*v*1e-3 for i,v in zip(self.__intensityInstance.getSolutions(), self.__voltageSrc.getSolutions())], "Power approximated P(t) with noise", "Power (W)", 2)
-        self.__charge.plotLissajousCurve()
\ No newline at end of file
+        MatPlotWrapper(duration, samplePoint).plotResults(results, self.__memoryTracker)
+        with MemoryTracker.track(self.__memoryTracker, "plot Lissajous Curve"):
+            self.__charge.plotLissajousCurve()
+        return results
@@ -0,0 +1,147 @@
+import numpy as np
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+from reactor.ac_voltage_source import VoltageSource as Vs
+
+
+class ReactorArrayResults:
+    """
+    Holds the results of a ReactorArray simulation as (cells x time) arrays.
+
+    Methods:
+    - getTime(): Get the time axis.
+    - getVoltage(): Get the supply voltage shared by all cells.
+    - getCellCharge(): Get the charge of every cell.
+    - getCellIntensity(): Get the current of every cell.
+    - getCellPower(): Get the power of every cell.
+    - getGapVoltage(): Get the voltage across the plasma gap of every cell.
+    - getBarrierVoltage(): Get the voltage across the dielectric barrier of every cell.
+    - getTotalIntensity(): Get the total current drawn from the supply.
+    - getTotalPower(): Get the total power drawn from the supply.
+    - getCurrentDistribution(): Get the share of the total RMS current carried by every cell.
+    - getPowerDistribution(): Get the share of the total mean absolute power taken by every cell.
+
+    Units follow Reactor.simulateWithPlots: charge in C, current in mA and power in W.
+    """
+    def __init__(self, time, voltage, charge, intensity, gapVoltage, barrierVoltage) -> None:
+        self.__time = time
+        self.__voltage = voltage
+        self.__charge = charge
+        self.__intensity = intensity
+        self.__power = intensity * voltage * 1e-3
+        self.__gapVoltage = gapVoltage
+        self.__barrierVoltage = barrierVoltage
+
+    def getTime(self) -> np.ndarray:
+        return self.__time
+
+    def getVoltage(self) -> np.ndarray:
+        return self.__voltage
+
+    def getCellCharge(self) -> np.ndarray:
+        return self.__charge
+
+    def getCellIntensity(self) -> np.ndarray:
+        return self.__intensity
+
+    def getCellPower(self) -> np.ndarray:
+        return self.__power
+
+    def getGapVoltage(self) -> np.ndarray:
+        return self.__gapVoltage
+
+    def getBarrierVoltage(self) -> np.ndarray:
+        return self.__barrierVoltage
+
+    def getTotalIntensity(self) -> np.ndarray:
+        return self.__intensity.sum(axis=0)
+
+    def getTotalPower(self) -> np.ndarray:
+        return self.__power.sum(axis=0)
+
+    def getCurrentDistribution(self) -> np.ndarray:
+        rms = np.sqrt(np.mean(self.__intensity ** 2, axis=1))
+        return rms / rms.sum()
+
+    def getPowerDistribution(self) -> np.ndarray:
+        meanPower = np.mean(np.abs(self.__power), axis=1)
+        return meanPower / meanPower.sum()
+
+
+class ReactorArray:
+    """
+    Represents a stack of dielectric barrier discharge cells driven by one voltage source.
+
+    Methods:
+    - __init__(reactorCellCapacitors, dielectricBarrierCapacitors, plasmaGapCapacitors, voltageSrc: Vs): Initialize a ReactorArray instance.
+    - getCellCount(): Get the number of cells.
+    - simulate(time: np.ndarray): Simulate all cells over the given time axis.
+
+    Every cell has its own cell, barrier and gap capacitance, so toleranced cells can be modelled side by side. The
+    capacitances are kept as column vectors and the source waveform as a row vector, so all cells are evaluated
+    together through numpy broadcasting without a Python loop over cells.
+
+    Note: This class assumes the existence of LoggerIfc, Capacitor and Vs classes.
+    """
+    def __init__(self, reactorCellCapacitors, dielectricBarrierCapacitors, plasmaGapCapacitors, voltageSrc : Vs):
+        """
+        Initialize a ReactorArray instance.
+
+        Parameters:
+        - reactorCellCapacitors: Sequence of Capacitor instances or array of values for the cell capacitance of every cell.
+        - dielectricBarrierCapacitors: Sequence of Capacitor instances or array of values for the barrier capacitance of every cell.
+        - plasmaGapCapacitors: Sequence of Capacitor instances or array of values for the gap capacitance of every cell.
+        - voltageSrc: An instance of the Vs class shared by all cells.
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the three capacitance sequences do not have the same length.
+        """
+        self.log = LoggerIfc("ReactorArray")
+        self.__cellCapacitance = self.__toColumn(reactorCellCapacitors)
+        self.__barrierCapacitance = self.__toColumn(dielectricBarrierCapacitors)
+        self.__gapCapacitance = self.__toColumn(plasmaGapCapacitors)
+        if not len(self.__cellCapacitance) == len(self.__barrierCapacitance) == len(self.__gapCapacitance):
+            raise ValueError("Every cell needs a cell, barrier and gap capacitance")
+        self.__voltageSrc = voltageSrc
+        self.log.info(f"Reactor array created with {len(self.__cellCapacitance)} cells, mean cell capacitance {self.__cellCapacitance.mean()}F")
+
+    @staticmethod
+    def __toColumn(capacitors) -> np.ndarray:
+        values = [capacitor.getValue() if isinstance(capacitor, Capacitor) else capacitor for capacitor in capacitors]
+        return np.asarray(values, dtype=float).reshape(-1, 1)
+
+    def getCellCount(self) -> int:
+        return len(self.__cellCapacitance)
+
+    def simulate(self, time : np.ndarray) -> ReactorArrayResults:
+        """
+        Simulate all cells over the given time axis.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - time: An array of time values shared by all cells, or a (cells x time) array giving every cell its own time
+          axis, e.g. a time axis scaled by a per-cell frequency factor.
+
+        Returns:
+        A ReactorArrayResults instance.
+
+        The supply voltage and its derivative are evaluated once for the whole time axis. Charge (Q = V * C_cell) and
+        current (i = C_cell * dV/dt) of every cell then follow from one broadcast multiplication, and the supply voltage
+        divides over barrier and gap in proportion to the inverse of their capacitances. With a (cells x time) axis the
+        voltage is a (cells x time) array as well and broadcasts the same way.
+
+        Note: This method assumes the existence of the numpy library.
+        """
+        time = np.asarray(time, dtype=float)
+        voltage = self.__voltageSrc.evaluate(time)
+        slope = self.__voltageSrc.evaluateDerivative(time)
+        self.log.debug(f"Simulating {self.getCellCount()} cells over {time.shape[-1]} samples")
+
+        charge = self.__cellCapacitance * voltage
+        intensity = self.__cellCapacitance * slope * 1e3
+        gapShare = self.__barrierCapacitance / (self.__barrierCapacitance + self.__gapCapacitance)
+        gapVoltage = gapShare * voltage
+        return ReactorArrayResults(time, voltage, charge, intensity, gapVoltage, voltage - gapVoltage)
@@ -0,0 +1,182 @@
+import numpy as np
+from utility.time import Time
+
+
+class SimulationResults:
+    """
+    Holds the channels of a reactor simulation together with their own time axis.
+
+    Methods:
+    - __init__(time, voltage, intensity, charge, sensitivities=None, windows=None, dissipatedPower=None): Initialize a SimulationResults instance.
+    - getTime(): Get the time axis.
+    - getVoltage(): Get the voltage channel.
+    - getIntensity(): Get the intensity channel.
+    - getPower(): Get the power channel.
+    - getCharge(): Get the charge channel.
+    - getActiveIndices(): Get the indices of the time axis at which the channels are stored.
+    - getActiveTime(), getActiveVoltage(), getActiveIntensity(), getActivePower(), getActiveCharge(): Get the stored samples of a channel.
+    - getSensitivities(): Get the parameter sensitivities, if they were computed.
+    - getActiveWindows(): Get the index ranges outside of which the source was idle.
+    - getDissipatedPower(): Get the power dissipated in the discharge, if it was computed.
+    - isUniform(): Check whether the time axis is uniformly sampled.
+    - resample(sampleRate): Get a copy of the results on a uniform time axis.
+
+    Units follow Reactor.simulateWithPlots: voltage in V, intensity in mA, power in W and charge in C. The time axis
+    may be non-uniform (see Time.getAdaptiveTimeAxis); plotting and FFTs should go through resample().
+
+    Results of a source with idle spans carry the active windows of the time axis and store the channels only inside
+    them, so a low duty cycle run only holds its bursts (plus the time axis). The getActive...() methods return the
+    stored samples as they are; getVoltage() and the other dense getters expand them to the whole time axis with 0 in
+    the idle spans, which allocates a full-length array on every call. Consumers that can work on the active samples
+    (exporters, event detection) should use the getActive...() methods.
+    """
+    def __init__(self, time : np.ndarray, voltage : np.ndarray, intensity : np.ndarray, charge : np.ndarray, sensitivities : dict = None, windows : np.ndarray = None, dissipatedPower : np.ndarray = None) -> None:
+        """
+        Initialize a SimulationResults instance.
+
+        Parameters:
+        - time: The time axis in seconds.
+        - voltage: The voltage values in V, only those inside the windows if windows are given.
+        - intensity: The intensity values in mA, only those inside the windows if windows are given.
+        - charge: The charge values in C, only those inside the windows if windows are given.
+        - sensitivities: The "intensitySensitivity" and "powerSensitivity" dictionaries returned by Sensitivity.evaluate()
+          (default: None).
+        - windows: The (n x 2) [start, stop) index ranges in which the source was active, e.g. from
+          BurstVoltageSource.getActiveWindows(); all channels are 0 outside of them and only the samples inside them
+          are passed and stored (default: None, active throughout).
+        - dissipatedPower: The power in W dissipated in the plasma elements of the circuit, e.g. from
+          Reactor.simulateCircuit() (default: None).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the number of channel samples does not match the time axis or the windows.
+
+        The power channel is derived as intensity * voltage * 1e-3 (W).
+        """
+        self.__time = np.asarray(time, dtype=float)
+        self.__voltage = np.asarray(voltage, dtype=float)
+        self.__intensity = np.asarray(intensity, dtype=float)
+        self.__charge = np.asarray(charge, dtype=float)
+        self.__power = self.__intensity * self.__voltage * 1e-3
+        self.__sensitivities = sensitivities
+        self.__windows = None if windows is None else np.asarray(windows, dtype=np.int64).reshape(-1, 2)
+        self.__indices = None
+        expected = len(self.__time) if self.__windows is None else int(np.sum(self.__windows[:, 1] - self.__windows[:, 0]))
+        if not len(self.__voltage) == len(self.__intensity) == len(self.__charge) == expected:
+            raise ValueError(f"Expected {expected} samples per channel, got {len(self.__voltage)}, {len(self.__intensity)} and {len(self.__charge)}")
+        self.__dissipatedPower = None if dissipatedPower is None else np.asarray(dissipatedPower, dtype=float)
+
+    def __expand(self, values : np.ndarray) -> np.ndarray:
+        """
+        Expand stored samples to the whole time axis, with 0 outside the active windows.
+        """
+        if self.__windows is None:
+            return values
+        dense = np.zeros(len(self.__time))
+        dense[self.getActiveIndices()] = values
+        return dense
+
+    def getTime(self) -> np.ndarray:
+        return self.__time
+
+    def getVoltage(self) -> np.ndarray:
+        return self.__expand(self.__voltage)
+
+    def getIntensity(self) -> np.ndarray:
+        return self.__expand(self.__intensity)
+
+    def getPower(self) -> np.ndarray:
+        return self.__expand(self.__power)
+
+    def getCharge(self) -> np.ndarray:
+        return self.__expand(self.__charge)
+
+    def getActiveIndices(self) -> np.ndarray:
+        """
+        Get the indices of the time axis at which the channels are stored.
+
+        Returns:
+        The ascending indices inside the active windows (see Time.getWindowIndices()), or all indices if the whole time
+        axis is active.
+        """
+        if self.__indices is None:
+            self.__indices = np.arange(len(self.__time)) if self.__windows is None else Time.getWindowIndices(self.__windows)
+        return self.__indices
+
+    def getActiveTime(self) -> np.ndarray:
+        return self.__time if self.__windows is None else self.__time[self.getActiveIndices()]
+
+    def getActiveVoltage(self) -> np.ndarray:
+        return self.__voltage
+
+    def getActiveIntensity(self) -> np.ndarray:
+        return self.__intensity
+
+    def getActivePower(self) -> np.ndarray:
+        return self.__power
+
+    def getActiveCharge(self) -> np.ndarray:
+        return self.__charge
+
+    def getSensitivities(self) -> dict:
+        """
+        Get the parameter sensitivities, if they were computed.
+
+        Returns:
+        A dictionary with "intensitySensitivity" and "powerSensitivity", each mapping parameter names to arrays on the
+        time axis (see Sensitivity.evaluate()), or None. Sensitivities are not carried over by resample().
+        """
+        return self.__sensitivities
+
+    def getActiveWindows(self):
+        """
+        Get the index ranges outside of which the source was idle.
+
+        Returns:
+        An (n x 2) array of [start, stop) index ranges, or None if the whole time axis is active. Sources with idle
+        spans lose their windows on resample().
+        """
+        return self.__windows
+
+    def getDissipatedPower(self):
+        """
+        Get the power dissipated in the discharge, if it was computed.
+
+        Returns:
+        An array of the power in W turned into heat in the plasma elements of the circuit, or None. Unlike getPower(),
+        which is the mostly reactive power drawn from the source and averages to about 0 over a cycle, its cycle mean is
+        the power that actually goes into the discharge. It is not carried over by resample().
+        """
+        return self.__dissipatedPower
+
+    def isUniform(self, relativeTolerance : float = 1e-6) -> bool:
+        """
+        Check whether the time axis is uniformly sampled.
+
+        Parameters:
+        - relativeTolerance: The allowed relative deviation between sample spacings (default: 1e-6).
+
+        Returns:
+        True if all sample spacings are equal within the tolerance.
+        """
+        steps = np.diff(self.__time)
+        return len(steps) == 0 or bool(np.all(np.abs(steps - steps[0]) <= relativeTolerance * abs(steps[0])))
+
+    def resample(self, sampleRate : float):
+        """
+        Get a copy of the results on a uniform time axis.
+
+        Parameters:
+        - sampleRate: The sampling rate of the uniform axis in samples per second.
+
+        Returns:
+        A new SimulationResults instance sampled uniformly with the given rate.
+
+        The channels are linearly interpolated with Time.resampleUniform. The power channel is recomputed from the
+        resampled voltage and intensity.
+        """
+        channels = np.stack([self.getVoltage(), self.getIntensity(), self.getCharge()])
+        time, (voltage, intensity, charge) = Time.resampleUniform(self.__time, channels, sampleRate)
+        return SimulationResults(time, voltage, intensity, charge)
@@ -0,0 +1,208 @@
+import numpy as np
+from utility.logger import LoggerIfc
+from reactor.capacitor import Capacitor
+from reactor.reactor import Reactor
+
+
+class BarrierThermalModel:
+    """
+    Multirate electro-thermal model of the dielectric barrier.
+
+    Methods:
+    - __init__(...): Initialize a BarrierThermalModel instance.
+    - getBarrierCapacitance(temperature): Get the barrier capacitance at a temperature.
+    - getLossTangent(temperature): Get the dielectric loss tangent at a temperature.
+    - evaluateCycle(barrierCapacitance: float): Evaluate the discharge power of one period of the equivalent circuit.
+    - getDischargePower(barrierCapacitance: float): Get the discharge power interpolated between cached operating points.
+    - getHeatingPower(temperature: float): Get the power heating the barrier at a temperature.
+    - simulate(duration: float, step: float = 1.0): Integrate the barrier temperature and capacitance over time.
+
+    The barrier is a lumped thermal RC: C_th * dT/dt = P(T) - (T - T_ambient) / R_th. Its capacitance follows the
+    permittivity, C_barrier(T) = C_0 * (1 + alpha * (T - T_0)), and it is heated by two sources:
+    - The dielectric loss P = omega * C_barrier * tan(delta) * mean(V_barrier^2), with V_barrier = V * C_gap /
+      (C_barrier + C_gap) the share of the source voltage across the barrier and omega the source frequency in the
+      convention of VoltageSource. mean(V^2) of the source over one period does not depend on the barrier, so it is
+      computed once and the loss is evaluated in closed form for every temperature.
+    - Optionally a fraction of the power dissipated in the discharge, the mean V^2 / R_on of the plasma element of the
+      equivalent circuit over one period (see Netlist.getPlasmaPower()).
+
+    The two time scales are stepped separately. The discharge power needs a transient solution of the circuit, which
+    depends on the barrier capacitance; it is solved for a few periods of the source until the breakdowns repeat and
+    averaged over the last one. The circuit is only solved at operating points on a grid of barrier capacitances
+    C_0 * (1 + k * tolerance), each once, and the discharge power in between is interpolated linearly. The thermal side
+    advances with implicit Euler steps of seconds, so a long run only visits the few grid points its capacitance drift
+    spans. Without a breakdown voltage or a discharge heat fraction no circuit is solved at all.
+
+    Note: This class assumes the existence of the LoggerIfc, Capacitor and Reactor classes and the numpy library.
+    """
+    def __init__(self, plasmaGapCapacitor : Capacitor, voltageSrc, barrierCapacitance : float, thermalCapacitance : float,
+                 thermalResistance : float, ambientTemperature : float = 293.15, referenceTemperature : float = None,
+                 temperatureCoefficient : float = 1e-3, lossTangent : float = 1e-2, lossTangentCoefficient : float = 0.0,
+                 breakdownVoltage : float = None, onResistance : float = 1e3, dischargeHeatFraction : float = 0.0,
+                 samplesPerCycle : int = 1024, settlingCycles : int = 2, tolerance : float = 1e-3) -> None:
+        """
+        Initialize a BarrierThermalModel instance.
+
+        Parameters:
+        - plasmaGapCapacitor: The plasma gap capacitor.
+        - voltageSrc: The voltage source, any source with an evaluate(time) method and a frequency.
+        - barrierCapacitance: The barrier capacitance C_0 in F at the reference temperature.
+        - thermalCapacitance: The heat capacity of the barrier in J/K.
+        - thermalResistance: The thermal resistance from the barrier to the ambient in K/W.
+        - ambientTemperature: The ambient and initial temperature in K (default: 293.15).
+        - referenceTemperature: The temperature T_0 of C_0 in K (default: ambientTemperature).
+        - temperatureCoefficient: The relative change of the capacitance per K, alpha (default: 1e-3).
+        - lossTangent: The loss tangent at the reference temperature (default: 1e-2).
+        - lossTangentCoefficient: The relative change of the loss tangent per K (default: 0).
+        - breakdownVoltage: The gap breakdown voltage of the plasma element (default: None, no discharge).
+        - onResistance: The resistance of the plasma element while conducting (default: 1e3 ohms).
+        - dischargeHeatFraction: The fraction of the power dissipated in the discharge that heats the barrier (default: 0).
+        - samplesPerCycle: The number of samples per period of the source (default: 1024).
+        - settlingCycles: The number of periods solved before the one the discharge power is averaged over (default: 2).
+        - tolerance: The relative spacing of the barrier capacitances the circuit is evaluated at (default: 1e-3).
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the voltage source has no frequency, as there is no cycle to evaluate then.
+        """
+        self.log = LoggerIfc("BarrierThermalModel")
+        self.__gapCapacitor = plasmaGapCapacitor
+        self.__voltageSrc = voltageSrc
+        self.__frequency = float(voltageSrc.getFrequency())
+        if self.__frequency <= 0:
+            raise ValueError("The electro-thermal model needs a periodic voltage source")
+        self.__barrierCapacitance = barrierCapacitance
+        self.__thermalCapacitance = thermalCapacitance
+        self.__thermalResistance = thermalResistance
+        self.__ambientTemperature = ambientTemperature
+        self.__referenceTemperature = ambientTemperature if referenceTemperature is None else referenceTemperature
+        self.__temperatureCoefficient = temperatureCoefficient
+        self.__lossTangent = lossTangent
+        self.__lossTangentCoefficient = lossTangentCoefficient
+        self.__breakdownVoltage = breakdownVoltage
+        self.__onResistance = onResistance
+        self.__dischargeHeatFraction = dischargeHeatFraction
+        self.__samplesPerCycle = samplesPerCycle
+        self.__settlingCycles = settlingCycles
+        self.__tolerance = tolerance
+        self.__period = 2 * np.pi / self.__frequency
+        periodTime = np.arange(samplesPerCycle) * (self.__period / samplesPerCycle)
+        self.__meanSquareVoltage = float(np.mean(np.square(voltageSrc.evaluate(periodTime))))
+        self.__operatingPoints = {}
+        self.__evaluations = 0
+
+    def getBarrierCapacitance(self, temperature):
+        return self.__barrierCapacitance * (1 + self.__temperatureCoefficient * (np.asarray(temperature) - self.__referenceTemperature))
+
+    def getLossTangent(self, temperature):
+        return self.__lossTangent * (1 + self.__lossTangentCoefficient * (np.asarray(temperature) - self.__referenceTemperature))
+
+    def evaluateCycle(self, barrierCapacitance : float) -> dict:
+        """
+        Evaluate the discharge power of one period of the equivalent circuit.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - barrierCapacitance: The barrier capacitance in F.
+
+        Returns:
+        A dictionary with the "barrierCapacitance" it was evaluated for and the mean power "dischargePower" in W
+        dissipated in the plasma element over the last of settlingCycles + 1 solved periods.
+
+        The circuit is the one of Reactor.getNetlist(): the source drives the barrier in series with the gap, and a
+        plasma element across the gap conducts above the breakdown voltage.
+
+        Note: This method assumes the existence of the Reactor and Capacitor classes.
+        """
+        gap = self.__gapCapacitor.getValue()
+        reactor = Reactor(Capacitor(barrierCapacitance * gap / (barrierCapacitance + gap), "C_cell"),
+                          Capacitor(barrierCapacitance, "C_barrier"), self.__gapCapacitor, self.__voltageSrc)
+        netlist = reactor.getNetlist(self.__breakdownVoltage, self.__onResistance)
+        time = np.arange((self.__settlingCycles + 1) * self.__samplesPerCycle) * (self.__period / self.__samplesPerCycle)
+        voltages, _ = netlist.solveTransient(time)
+        power = netlist.getPlasmaPower(voltages).sum(axis=0)
+        self.__evaluations += 1
+        return {"barrierCapacitance": barrierCapacitance, "dischargePower": float(np.mean(power[-self.__samplesPerCycle:]))}
+
+    def getDischargePower(self, barrierCapacitance : float) -> float:
+        """
+        Get the discharge power interpolated between cached operating points.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - barrierCapacitance: The barrier capacitance in F.
+
+        Returns:
+        The mean discharge power in W, interpolated linearly between the two neighbouring grid capacitances
+        C_0 * (1 + k * tolerance). Grid points are evaluated with evaluateCycle() the first time they are needed.
+        """
+        position = (barrierCapacitance / self.__barrierCapacitance - 1) / self.__tolerance
+        lower = int(np.floor(position))
+        weight = position - lower
+        power = 0.0
+        for point, share in ((lower, 1 - weight), (lower + 1, weight)):
+            if share == 0:
+                continue
+            if point not in self.__operatingPoints:
+                capacitance = self.__barrierCapacitance * (1 + point * self.__tolerance)
+                self.__operatingPoints[point] = self.evaluateCycle(capacitance)["dischargePower"]
+            power += share * self.__operatingPoints[point]
+        return power
+
+    def getHeatingPower(self, temperature : float) -> float:
+        """
+        Get the power heating the barrier at a temperature.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - temperature: The barrier temperature in K.
+
+        Returns:
+        The heating power in W: the dielectric loss at this temperature plus the discharge heat fraction of the discharge
+        power at the barrier capacitance of this temperature, see getDischargePower().
+        """
+        capacitance = float(self.getBarrierCapacitance(temperature))
+        gap = self.__gapCapacitor.getValue()
+        barrierShare = gap / (capacitance + gap)
+        loss = self.__frequency * capacitance * float(self.getLossTangent(temperature)) * self.__meanSquareVoltage * barrierShare ** 2
+        if self.__breakdownVoltage is None or self.__dischargeHeatFraction == 0:
+            return loss
+        return loss + self.__dischargeHeatFraction * self.getDischargePower(capacitance)
+
+    def simulate(self, duration : float, step : float = 1.0) -> dict:
+        """
+        Integrate the barrier temperature and capacitance over time.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - duration: The simulated time in seconds.
+        - step: The thermal time step in seconds (default: 1).
+
+        Returns:
+        A dictionary with the arrays "time" (s), "temperature" (K), "C_barrier" and "C_cell" (F) and "power" (W, the
+        heating power during the following step), and the number of circuit "evaluations".
+
+        Every step solves the implicit Euler update
+        T_next = (T + step / C_th * (P + T_ambient / R_th)) / (1 + step / (C_th * R_th))
+        with the heating power P of the current temperature, which is unconditionally stable for any step size.
+        """
+        steps = int(np.ceil(duration / step))
+        time = np.arange(steps + 1) * step
+        temperature = np.empty(steps + 1)
+        power = np.empty(steps + 1)
+        temperature[0] = self.__ambientTemperature
+        ratio = step / self.__thermalCapacitance
+        decay = 1 + ratio / self.__thermalResistance
+        self.__evaluations = 0
+        for index in range(steps):
+            power[index] = self.getHeatingPower(temperature[index])
+            temperature[index + 1] = (temperature[index] + ratio * (power[index] + self.__ambientTemperature / self.__thermalResistance)) / decay
+        power[steps] = self.getHeatingPower(temperature[steps])
+
+        barrier = self.getBarrierCapacitance(temperature)
+        gap = self.__gapCapacitor.getValue()
+        self.log.info(f"Simulated {duration}s of barrier heating in {steps} thermal steps and {self.__evaluations} circuit evaluations")
+        return {"time": time, "temperature": temperature, "C_barrier": barrier, "C_cell": barrier * gap / (barrier + gap),
+                "power": power, "evaluations": self.__evaluations}
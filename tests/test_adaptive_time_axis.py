@@ -0,0 +1,35 @@
+import numpy as np
+from reactor.burst_voltage_source import BurstVoltageSource
+from reactor.capacitor import Capacitor
+from reactor.reactor import Reactor
+from utility.time import Time
+
+
+def makeSource():
+    return BurstVoltageSource(1000.0, 2 * np.pi * 20e3, repetitionRate=1e3, burstLength=50e-6)
+
+
+def test_unseeded_axis_misses_short_bursts():
+    source = makeSource()
+    time = Time.getAdaptiveTimeAxis(2e-3, [source.evaluate], max_step=1e-4, events=[source.evaluate])
+    assert np.max(np.abs(source.evaluate(time))) < 1.0
+
+
+def test_breakpoints_resolve_short_bursts():
+    source = makeSource()
+    time = Time.getAdaptiveTimeAxis(2e-3, [source.evaluate], max_step=1e-4, events=[source.evaluate],
+                                    breakpoints=source.getBreakpoints(2e-3))
+    assert time[0] == 0.0 and time[-1] == 2e-3 and np.all(np.diff(time) > 0)
+    for start in (0.0, 1e-3):
+        inside = time[(time >= start) & (time <= start + 50e-6)]
+        assert len(inside) >= 16
+        np.testing.assert_allclose(np.max(np.abs(source.evaluate(inside))), 1000.0)
+
+
+def test_adaptive_simulation_of_burst_source():
+    source = makeSource()
+    reactor = Reactor(Capacitor(1.347e-9, "C_cell"), Capacitor(2.13e-9, "C_barrier"), Capacitor(3.66e-9, "C_gap"), source)
+    results = reactor.simulateAdaptive(2e-3, maxStep=1e-4)
+    time = results.getTime()
+    dense = Time.getTimeAxis(2e-3, 1e8)
+    np.testing.assert_allclose(np.interp(dense, time, results.getVoltage()), source.evaluate(dense), atol=20.0)
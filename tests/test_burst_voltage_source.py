@@ -0,0 +1,36 @@
+import numpy as np
+from reactor.burst_voltage_source import BurstVoltageSource
+from reactor.capacitor import Capacitor
+from reactor.reactor import Reactor
+from utility.time import Time
+
+
+def makeSource():
+    return BurstVoltageSource(6000.0, 2 * np.pi * 20e3, repetitionRate=1e3, burstLength=100.5e-6, ramp=1e-5)
+
+
+def test_active_windows_cover_the_bursts():
+    source = makeSource()
+    time = Time.getTimeAxis(5e-3, 1e6)
+    windows = source.getActiveWindows(time)
+    active = np.zeros(len(time), dtype=bool)
+    active[Time.getWindowIndices(windows)] = True
+    np.testing.assert_array_equal(active, np.mod(time, 1e-3) < 100.5e-6)
+    assert np.all(source.evaluate(time[~active]) == 0)
+
+
+def test_derivative_matches_finite_differences():
+    source = makeSource()
+    time = np.linspace(2e-6, 9.8e-5, 1000)
+    numeric = (source.evaluate(time + 1e-10) - source.evaluate(time - 1e-10)) / 2e-10
+    np.testing.assert_allclose(source.evaluateDerivative(time), numeric, rtol=1e-4, atol=1e-3 * np.max(np.abs(numeric)))
+
+
+def test_reactor_stores_only_active_samples():
+    source = makeSource()
+    reactor = Reactor(Capacitor(1.347e-9, "C_cell"), Capacitor(2.13e-9, "C_barrier"), Capacitor(3.66e-9, "C_gap"), source)
+    results = reactor.simulate(5e-3, 1e6)
+    time = results.getTime()
+    assert len(results.getActiveTime()) == np.count_nonzero(np.mod(time, 1e-3) < 100.5e-6)
+    np.testing.assert_allclose(results.getVoltage(), source.evaluate(time))
+    np.testing.assert_allclose(results.getIntensity(), 1e3 * 1.347e-9 * source.evaluateDerivative(time))
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from base.discharge_events import DischargeEventDetector
+from reactor.ac_voltage_source import VoltageSource
+from reactor.burst_voltage_source import BurstVoltageSource
+from reactor.results import SimulationResults
+from utility.time import Time
+
+
+def makeChunk(time, intensity):
+    return SimulationResults(time, np.zeros_like(time), intensity, np.zeros_like(time))
+
+
+def detect(time, intensity, splits):
+    detector = DischargeEventDetector(2 * np.pi * 50, threshold=1.0)
+    bounds = [0, *splits, len(time)]
+    return detector.run(makeChunk(time[start:stop], intensity[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:]))
+
+
+@pytest.mark.parametrize("splits", [(), (100,), (40,), (60,), (95,), (50, 97, 99)])
+def test_split_chunks_match_single_chunk(splits):
+    time = np.arange(200) * 1e-6
+    intensity = np.zeros(200)
+    intensity[40:60] = 5.0
+    intensity[95:100] = 5.0
+
+    whole = detect(time, intensity, ())
+    split = detect(time, intensity, splits)
+
+    assert whole["events"] == 2
+    assert whole["totalCharge"] == pytest.approx(1.25e-7)
+    assert split["events"] == whole["events"]
+    assert split["totalCharge"] == pytest.approx(whole["totalCharge"])
+    assert split["peakCurrent"] == whole["peakCurrent"]
+    np.testing.assert_array_equal(split["phaseCounts"], whole["phaseCounts"])
+    np.testing.assert_array_equal(split["eventsPerHalfCycle"], whole["eventsPerHalfCycle"])
+
+
+def makeWindowedChunk(time, intensity, windows, start, stop):
+    clipped = np.clip(windows, start, stop) - start
+    clipped = clipped[clipped[:, 1] > clipped[:, 0]]
+    active = np.concatenate([np.arange(first, last) for first, last in clipped]) if len(clipped) else np.zeros(0, dtype=np.int64)
+    values = intensity[start:stop][active]
+    return SimulationResults(time[start:stop], np.zeros_like(values), values, np.zeros_like(values), windows=clipped)
+
+
+@pytest.mark.parametrize("splits", [(), (100,), (60,), (75,), (50, 97, 99)])
+def test_windowed_chunks_match_dense_chunks(splits):
+    time = np.arange(200) * 1e-6
+    windows = np.array([[30, 70], [90, 100], [100, 130], [150, 180]])
+    intensity = np.zeros(200)
+    intensity[40:70] = 5.0
+    intensity[90:110] = 0.8
+    intensity[95:105] = 5.0
+    intensity[150:160] = 0.8
+
+    dense = detect(time, intensity, ())
+    detector = DischargeEventDetector(2 * np.pi * 50, threshold=1.0)
+    bounds = [0, *splits, len(time)]
+    windowed = detector.run(makeWindowedChunk(time, intensity, windows, start, stop) for start, stop in zip(bounds[:-1], bounds[1:]))
+
+    assert windowed["events"] == dense["events"]
+    assert windowed["totalCharge"] == pytest.approx(dense["totalCharge"])
+    np.testing.assert_array_equal(windowed["eventsPerHalfCycle"], dense["eventsPerHalfCycle"])
+
+
+def makeBurstChunk(source, duration, pulses):
+    time = Time.getTimeAxis(duration, 1e7)
+    phase = source.getPhase(time)
+    active = np.mod(time, 1.0 / source.getRepetitionRate()) < source.getBurstLength()
+    intensity = np.zeros(len(time))
+    for angle, sign in pulses:
+        intensity[active & (phase >= angle) & (phase < angle + 0.1)] = 5.0 * sign
+    return SimulationResults(time, source.evaluate(time), intensity, np.zeros(len(time)))
+
+
+def test_burst_events_are_binned_by_carrier_phase():
+    # 2.4 carrier periods per burst and a repetition period that is no multiple of the carrier period, so the
+    # continuous phase frequency * t drifts from burst to burst while the carrier restarts at 0.
+    source = BurstVoltageSource(1000.0, 2 * np.pi * 20e3, repetitionRate=1.03e3, burstLength=120e-6)
+    chunk = makeBurstChunk(source, 10 / 1.03e3, [(0.5 * np.pi, 1), (1.5 * np.pi, -1), (2.5 * np.pi, 1)])
+    detector = DischargeEventDetector(source, threshold=1.0)
+    statistics = detector.run([chunk])
+    assert statistics["events"] == 30 and statistics["negativeEvents"] == 10
+    assert set(np.flatnonzero(statistics["phaseCounts"])) == {18, 54}
+    assert statistics["phaseCounts"][18] == 20
+    # Five carrier half-cycles per burst, the first three with one event each.
+    assert statistics["halfCycles"] == 50
+    np.testing.assert_array_equal(statistics["eventsPerHalfCycle"][:2], [20, 30])
+
+
+def test_frequency_and_voltage_source_agree():
+    time = Time.getTimeAxis(0.1, 1e5)
+    intensity = np.where(np.mod(time, 7.3e-3) < 1e-4, 5.0, 0.0)
+    chunk = makeChunk(time, intensity)
+    byFrequency = DischargeEventDetector(2 * np.pi * 50, threshold=1.0).run([chunk])
+    bySource = DischargeEventDetector(VoltageSource(1.0, 2 * np.pi * 50), threshold=1.0).run([chunk])
+    for key in ("phaseCounts", "eventsPerHalfCycle"):
+        np.testing.assert_array_equal(byFrequency[key], bySource[key])
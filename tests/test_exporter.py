@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from reactor.results import SimulationResults
+from utility.exporter import Hdf5Exporter, ParquetExporter, getMetrics
+
+h5py = pytest.importorskip("h5py")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+
+def makeChunks(count, size, sampleRate=1e6, first=0):
+    chunks = []
+    for chunk in range(count):
+        time = (first + chunk * size + np.arange(size)) / sampleRate
+        voltage = 6000 * np.sin(2 * np.pi * 910 * time)
+        intensity = 1e3 * 1.347e-9 * 6000 * 2 * np.pi * 910 * np.cos(2 * np.pi * 910 * time)
+        chunks.append(SimulationResults(time, voltage, intensity, 1.347e-9 * voltage))
+    return chunks
+
+
+def write(exporter, path, chunks, **options):
+    with exporter(str(path), {"amplitude": 6000.0, "frequency": 910.0}, **options) as target:
+        for chunk in chunks:
+            target.append(chunk)
+
+
+@pytest.mark.parametrize("exporter, options", [(Hdf5Exporter, {"chunkSize": 1000}), (ParquetExporter, {"rowGroupSize": 1000})])
+@pytest.mark.parametrize("count, size", [(5, 2000), (1, 10000)])
+def test_round_trip(tmp_path, exporter, options, count, size):
+    path = tmp_path / "export"
+    chunks = makeChunks(count, size)
+    write(exporter, path, chunks, **options)
+    time = np.concatenate([chunk.getTime() for chunk in chunks])
+    voltage = np.concatenate([chunk.getVoltage() for chunk in chunks])
+    for startTime, stopTime in [(0.0, 1.0), (1.5e-3, 4.2e-3), (2.9995e-3, 3.0005e-3), (5e-3, 5e-3), (1.0, 2.0)]:
+        inside = (time >= startTime) & (time <= stopTime)
+        results = exporter.readTimeSlice(str(path), startTime, stopTime)
+        np.testing.assert_array_equal(results.getTime(), time[inside])
+        np.testing.assert_array_equal(results.getVoltage(), voltage[inside])
+    assert exporter.readParameters(str(path)) == {"amplitude": 6000.0, "frequency": 910.0}
+    metrics = exporter.readMetrics(str(path))
+    np.testing.assert_allclose(metrics["energy"], [getMetrics(chunk)["energy"] for chunk in chunks])
+
+
+def test_hdf5_index_has_one_row_per_dataset_chunk(tmp_path):
+    path = tmp_path / "export.h5"
+    write(Hdf5Exporter, path, makeChunks(1, 10000) + makeChunks(1, 700, first=10000), chunkSize=1000)
+    with h5py.File(path, "r") as source:
+        index = source["index"][:]
+        np.testing.assert_array_equal(index[:, 1], np.arange(0, 10700, 1000))
+        np.testing.assert_array_equal(index[:, 0], source["channels"]["time"][::1000])
+
+
+def test_parquet_splits_large_chunks_into_row_groups(tmp_path):
+    path = tmp_path / "export.parquet"
+    write(ParquetExporter, path, makeChunks(1, 10000), rowGroupSize=1000)
+    assert parquet.ParquetFile(str(path)).metadata.num_row_groups == 10
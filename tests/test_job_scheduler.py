@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from reactor.ac_voltage_source import VoltageSource
+from reactor.capacitor import Capacitor
+from reactor.reactor import Reactor
+from utility.job_scheduler import JobScheduler
+
+
+@pytest.mark.parametrize("length, slices", [(10_001, None), (7, 16), (1, None)])
+def test_run_split_matches_serial(length, slices):
+    source = VoltageSource(6000.0, 910.0)
+    time = np.linspace(0, 0.02, length)
+    split = JobScheduler().runSplit(source.evaluate, time, workers=2, slices=slices)
+    np.testing.assert_array_equal(split, source.evaluate(time))
+
+
+def test_parallel_simulation_matches_serial():
+    reactor = Reactor(Capacitor(1.347e-9, "C_cell"), Capacitor(2.13e-9, "C_barrier"), Capacitor(3.66e-9, "C_gap"),
+                      VoltageSource(6000.0, 910.0))
+    serial = reactor.simulate(2e-2, 1e5)
+    parallel = reactor.simulate(2e-2, 1e5, workers=2)
+    for getter in ("getTime", "getVoltage", "getIntensity", "getCharge", "getPower"):
+        np.testing.assert_array_equal(getattr(parallel, getter)(), getattr(serial, getter)())
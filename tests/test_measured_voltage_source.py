@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from reactor.capacitor import Capacitor
+from reactor.measured_voltage_source import MeasuredVoltageSource
+from reactor.reactor import Reactor
+
+
+@pytest.fixture
+def capture(tmp_path):
+    interval = 1e-6
+    time = np.arange(2000) * interval
+    voltage = 100.0 * np.sin(2 * np.pi * 5e3 * time)
+    path = tmp_path / "capture.bin"
+    with open(path, "wb") as target:
+        target.write(f"dtype=float32\nsample_interval={interval}\nEND\n".encode("ascii"))
+        target.write(voltage.astype("<f4").tobytes())
+    return str(path), time, voltage
+
+
+def test_empty_time_axis(capture):
+    source = MeasuredVoltageSource(capture[0])
+    assert source.evaluate(np.zeros(0)).shape == (0,)
+    assert source.evaluateDerivative(np.zeros(0)).shape == (0,)
+
+
+def test_outside_capture(capture):
+    path, time, voltage = capture
+    source = MeasuredVoltageSource(path)
+    outside = np.array([-1e-3, -1e-6, time[-1] + 1e-6, 1.0])
+    np.testing.assert_allclose(source.evaluate(outside), [voltage[0], voltage[0], voltage[-1], voltage[-1]], rtol=1e-6)
+    np.testing.assert_array_equal(source.evaluateDerivative(outside), np.zeros(4))
+
+
+def test_inside_capture(capture):
+    path, time, voltage = capture
+    source = MeasuredVoltageSource(path)
+    middle = 0.5 * (time[:-1] + time[1:])
+    np.testing.assert_allclose(source.evaluate(time[100:200]), voltage[100:200], rtol=1e-6, atol=1e-4)
+    np.testing.assert_allclose(source.evaluateDerivative(middle[100:200]), np.diff(voltage)[100:200] / 1e-6, rtol=1e-4, atol=1.0)
+
+
+def test_reactor_does_not_scan_capture(capture, monkeypatch):
+    source = MeasuredVoltageSource(capture[0])
+    def scan(self):
+        raise AssertionError("the capture statistics were computed")
+    monkeypatch.setattr(MeasuredVoltageSource, "getAmplitude", scan)
+    monkeypatch.setattr(MeasuredVoltageSource, "getFrequency", scan)
+    Reactor(Capacitor(1.347e-9, "C_cell"), Capacitor(2.13e-9, "C_barrier"), Capacitor(3.66e-9, "C_gap"), source)
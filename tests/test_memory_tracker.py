@@ -0,0 +1,56 @@
+import tracemalloc
+import numpy as np
+import pytest
+from utility.memory_tracker import MemoryBudgetExceeded, MemoryTracker
+
+
+def test_stage_records_peak_and_retained_allocation():
+    tracker = MemoryTracker()
+    kept = []
+    with tracker.stage("allocate"):
+        np.ones(1 << 20)
+        kept.append(np.ones(1 << 17))
+    report = tracker.getReport()["allocate"]
+    assert report["calls"] == 1
+    assert report["seconds"] >= 0.0
+    assert report["peakBytes"] >= 8 << 20
+    assert (1 << 20) <= report["retainedBytes"] < 8 << 20
+
+
+def test_nested_peak_counts_towards_outer_stage():
+    tracker = MemoryTracker()
+    with tracker.stage("outer"):
+        with tracker.stage("inner"):
+            np.ones(1 << 20)
+    report = tracker.getReport()
+    assert report["outer"]["peakBytes"] >= report["inner"]["peakBytes"] >= 8 << 20
+
+
+def test_repeated_stages_accumulate():
+    tracker = MemoryTracker()
+    for _ in range(3):
+        with tracker.stage("repeat"):
+            pass
+    assert tracker.getReport()["repeat"]["calls"] == 3
+
+
+def test_track_without_tracker_is_a_no_op():
+    with MemoryTracker.track(None, "ignored"):
+        pass
+    tracker = MemoryTracker()
+    with MemoryTracker.track(tracker, "tracked"):
+        pass
+    assert list(tracker.getReport()) == ["tracked"]
+
+
+def test_budgets_and_summary():
+    wasTracing = tracemalloc.is_tracing()
+    tracker = MemoryTracker(budgets={"small": 1 << 10, "large": 1 << 30})
+    for name in ("small", "large"):
+        with tracker.stage(name):
+            np.ones(1 << 18)
+    with pytest.raises(MemoryBudgetExceeded, match="small"):
+        tracker.checkBudgets()
+    table = tracker.summary()
+    assert "small" in table and "large" in table
+    assert tracemalloc.is_tracing() == wasTracing
@@ -0,0 +1,55 @@
+import numpy as np
+from reactor.ac_voltage_source import VoltageSource
+from reactor.capacitor import Capacitor
+from reactor.monte_carlo import MonteCarlo
+from utility.streaming_histogram import StreamingHistogram, StreamingMoments
+
+
+DISTRIBUTIONS = {"C_barrier": ("normal", 0.05), "C_gap": ("uniform", 0.1), "amplitude": ("normal", 0.02)}
+
+
+def makeMonteCarlo():
+    return MonteCarlo(Capacitor(1.347e-9, "C_cell"), Capacitor(2.13e-9, "C_barrier"), Capacitor(3.66e-9, "C_gap"),
+                      VoltageSource(6000.0, 910.0), DISTRIBUTIONS)
+
+
+def getExactChannels(realizations, batchSize, seed, time):
+    monteCarlo = makeMonteCarlo()
+    nominal = {"C_cell": 1.347e-9, "C_barrier": 2.13e-9, "C_gap": 3.66e-9, "amplitude": 6000.0, "frequency": 910.0}
+    counts = [min(batchSize, realizations - start) for start in range(0, realizations, batchSize)]
+    _, *seeds = np.random.SeedSequence(seed).spawn(len(counts) + 1)
+    batches = [MonteCarlo.evaluate(VoltageSource(6000.0, 910.0), nominal,
+                                   MonteCarlo.sample(nominal, DISTRIBUTIONS, np.random.default_rng(batchSeed), count), time)
+               for batchSeed, count in zip(seeds, counts)]
+    return monteCarlo, [np.concatenate(channel) for channel in zip(*batches)]
+
+
+def test_percentiles_match_exact_quantiles():
+    time = np.linspace(0, 2 * np.pi / 910, 200)
+    monteCarlo, (intensity, power, energy) = getExactChannels(4000, 500, 7, time)
+    report = monteCarlo.run(time, 4000, 500, processes=1, seed=7)
+    assert report["realizations"] == 4000
+    for name, values in (("intensity", intensity), ("power", power)):
+        spread = np.std(values, axis=0)
+        np.testing.assert_allclose(report[name]["mean"], np.mean(values, axis=0), atol=1e-9 * np.max(np.abs(values)))
+        np.testing.assert_allclose(report[name]["std"], spread, rtol=1e-6, atol=1e-9 * np.max(spread))
+        for q in (5, 50, 95):
+            error = np.abs(report[name][q] - np.percentile(values, q, axis=0))
+            assert np.all(error <= 0.05 * spread + 1e-8 * np.max(np.abs(values)))
+    assert abs(report["energy"][50] - np.percentile(energy, 50)) <= 0.02 * np.std(energy)
+
+
+def test_histogram_with_column_ranges():
+    rng = np.random.default_rng(3)
+    values = rng.normal([0.0, 1e3], [1.0, 1e-3], size=(20000, 2))
+    histogram = StreamingHistogram([-5.0, 1e3 - 5e-3], [5.0, 1e3 + 5e-3], 2, 64)
+    for batch in np.split(values, 4):
+        other = StreamingHistogram([-5.0, 1e3 - 5e-3], [5.0, 1e3 + 5e-3], 2, 64)
+        other.add(batch)
+        histogram.merge(other)
+    error = np.abs(histogram.percentile(90) - np.percentile(values, 90, axis=0))
+    assert error[0] < 0.03 and error[1] < 3e-5 and histogram.getClipped() == 0
+    moments = StreamingMoments(2)
+    for batch in np.split(values, 4):
+        moments.add(batch)
+    np.testing.assert_allclose(moments.getStd(), np.std(values, axis=0), rtol=1e-10)
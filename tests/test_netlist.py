@@ -0,0 +1,60 @@
+import numpy as np
+import sympy
+from reactor.ac_voltage_source import VoltageSource
+from reactor.netlist import Netlist
+from utility.time import Time
+
+
+RESISTANCE, CAPACITANCE, FREQUENCY = 1e3, 1e-6, 2 * np.pi * 100
+
+
+def getLowPass():
+    netlist = Netlist()
+    netlist.addVoltageSource("in", "0", VoltageSource(10.0, FREQUENCY))
+    netlist.addResistor("in", "out", RESISTANCE)
+    netlist.addCapacitor("out", "0", CAPACITANCE)
+    return netlist
+
+
+def getAnalyticLowPass():
+    t = sympy.Symbol("t")
+    v = sympy.Function("v")
+    equation = sympy.Eq(RESISTANCE * CAPACITANCE * v(t).diff(t) + v(t), 10 * sympy.sin(FREQUENCY * t))
+    solution = sympy.dsolve(equation, v(t), ics={v(0): 0}).rhs
+    return sympy.lambdify(t, solution, "numpy")
+
+
+def test_low_pass_matches_analytic_solution():
+    netlist = getLowPass()
+    time = Time.getTimeAxis(2e-2, 1e6)
+    voltages, currents = netlist.solveTransient(time)
+    expected = getAnalyticLowPass()(time)
+    np.testing.assert_allclose(voltages[netlist.getNodeIndex("out")], expected, atol=1e-2)
+    np.testing.assert_allclose(voltages[netlist.getNodeIndex("in")], 10 * np.sin(FREQUENCY * time), atol=1e-9)
+    # The source delivers the capacitor current, so it flows out of the positive terminal.
+    np.testing.assert_allclose(-currents[0, 1:], CAPACITANCE * np.diff(voltages[netlist.getNodeIndex("out")]) / 1e-6, atol=1e-8)
+
+
+def test_capacitive_divider_starts_consistent():
+    netlist = Netlist()
+    source = VoltageSource(6000.0, 910.0)
+    netlist.addVoltageSource("source", "0", source)
+    netlist.addCapacitor("source", "gap", 2.13e-9)
+    netlist.addCapacitor("gap", "0", 3.66e-9)
+    time = 1e-3 + Time.getTimeAxis(1e-2, 1e6)
+    voltages, _ = netlist.solveTransient(time)
+    np.testing.assert_allclose(voltages[netlist.getNodeIndex("gap")], source.evaluate(time) * 2.13 / (2.13 + 3.66), atol=1e-6)
+
+
+def test_adaptive_axis_keeps_factorization_cache_bounded(monkeypatch):
+    netlist = getLowPass()
+    source = VoltageSource(10.0, FREQUENCY)
+    time = Time.getAdaptiveTimeAxis(2e-2, [source.evaluate], tolerance=1e-4, min_step=1e-7, max_step=1e-4)
+    time = time + np.random.default_rng(1).uniform(-1e-9, 1e-9, len(time)) * (np.arange(len(time)) % (len(time) - 1) > 0)
+    assert len(np.unique(np.round(np.diff(time), 15))) > 4 * Netlist.CACHE_SIZE
+    voltages, _ = netlist.solveTransient(time)
+    assert len(netlist._Netlist__factorizations) <= Netlist.CACHE_SIZE
+    # Reusing a factorization within STEP_TOLERANCE barely changes the solution against exact steps.
+    monkeypatch.setattr(Netlist, "STEP_TOLERANCE", 0.0)
+    exact, _ = getLowPass().solveTransient(time)
+    np.testing.assert_allclose(voltages, exact, atol=1e-4)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from base.parameter_fit import ParameterFit
+
+
+BARRIER, GAP, AMPLITUDE, FREQUENCY, OFFSET = 2.13e-9, 3.66e-9, 6000.0, 2 * np.pi * 910, 3e-5
+
+
+def makeTraces(discharges):
+    time = np.linspace(0, 5 * 2 * np.pi / FREQUENCY, 5000, endpoint=False)
+    phase = np.mod(FREQUENCY * (time + OFFSET), np.pi)
+    conducting = discharges & (phase > 0.25 * np.pi) & (phase < 0.45 * np.pi)
+    capacitance = np.where(conducting, BARRIER, BARRIER * GAP / (BARRIER + GAP))
+    voltage = AMPLITUDE * np.sin(FREQUENCY * (time + OFFSET))
+    intensity = 1e3 * capacitance * AMPLITUDE * FREQUENCY * np.cos(FREQUENCY * (time + OFFSET))
+    return time, voltage, intensity
+
+
+def test_fit_recovers_barrier_and_gap():
+    result = ParameterFit().fit(*makeTraces(True))
+    assert result["identifiable"] and result["success"]
+    assert result["C_barrier"] == pytest.approx(BARRIER, rel=5e-3)
+    assert result["C_gap"] == pytest.approx(GAP, rel=5e-3)
+    assert result["C_cell"] == pytest.approx(BARRIER * GAP / (BARRIER + GAP), rel=5e-3)
+    assert result["frequency"] == pytest.approx(FREQUENCY, rel=1e-4)
+
+
+def test_fit_without_discharges_reports_barrier_and_gap_unidentifiable():
+    result = ParameterFit().fit(*makeTraces(False))
+    assert not result["identifiable"]
+    assert np.isnan(result["C_barrier"]) and np.isnan(result["C_gap"])
+    assert result["C_cell"] == pytest.approx(BARRIER * GAP / (BARRIER + GAP), rel=1e-6)
+    assert result["amplitude"] == pytest.approx(AMPLITUDE, rel=1e-6)
+    assert result["dischargeFraction"] == 0.0
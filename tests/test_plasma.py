@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from reactor.plasma import Plasma
+from reactor.results import SimulationResults
+
+
+REACTION_SET = {
+    "species": {"O2": 5.0e24, "O": 1.0e20, "O3": 1.0e19},
+    "reactions": [
+        {"reactants": ["e", "O2"], "products": ["e", "O", "O"], "rate": 1e-16},
+        {"reactants": ["O", "O2", "O2"], "products": ["O3", "O2"], "rate": [6.0e-46, -2.6, 0.0]},
+        {"reactants": ["O", "O3"], "products": ["O2", "O2"], "rate": [8.0e-18, 0.0, 2060.0]},
+        {"reactants": ["O", "O"], "products": ["O2"], "rate": 1e-45},
+    ],
+}
+
+
+def test_jacobian_matches_finite_differences():
+    plasma = Plasma(REACTION_SET)
+    densities = np.array([5.0e24, 3.0e21, 2.0e20])
+    jacobian = plasma.getJacobian(densities, 1e16).toarray()
+    numeric = np.empty_like(jacobian)
+    for column in range(len(densities)):
+        step = 1e-6 * densities[column]
+        upper, lower = densities.copy(), densities.copy()
+        upper[column] += step
+        lower[column] -= step
+        numeric[:, column] = (plasma.getDerivative(upper, 1e16) - plasma.getDerivative(lower, 1e16)) / (2 * step)
+    np.testing.assert_allclose(jacobian, numeric, rtol=1e-6, atol=1e-12 * np.max(np.abs(numeric)))
+
+
+def makeResults(time, power):
+    zeros = np.zeros(len(time))
+    return SimulationResults(time, zeros, zeros, zeros, dissipatedPower=power)
+
+
+def test_cycle_power_leaves_out_partial_tail():
+    frequency = 2 * np.pi * 50
+    time = np.linspace(0, 0.05, 50001)
+    power = np.where(time < 0.04, 1.0, 100.0)
+    centres, mean = Plasma.getCyclePower(makeResults(time, power), frequency)
+    np.testing.assert_allclose(centres, [0.01, 0.03])
+    np.testing.assert_allclose(mean, [1.0, 1.0])
+
+
+def test_cycle_power_needs_dissipated_power():
+    time = np.linspace(0, 0.04, 100)
+    with pytest.raises(ValueError):
+        Plasma.getCyclePower(makeResults(time, None), 2 * np.pi * 50)
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import pytest
+from reactor.rate_table import RateTable
+
+
+CROSS_SECTIONS = {"ionization": ([12.0, 20.0, 100.0], [0.0, 1e-20, 2.5e-20]),
+                  "excitation": ([6.0, 10.0, 50.0], [0.0, 3e-21, 1e-21])}
+
+
+def meanEnergy(fields):
+    return 1.0 + 0.05 * np.asarray(fields)
+
+
+def test_build_round_trip_and_cache(tmp_path):
+    table = RateTable.build(CROSS_SECTIONS, meanEnergy, (1.0, 500.0), 64, str(tmp_path))
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    assert table.getNames() == ["ionization", "excitation"]
+    np.testing.assert_allclose(table.getFields(), np.geomspace(1.0, 500.0, 64))
+    expected = RateTable.compute(CROSS_SECTIONS, meanEnergy, table.getFields())
+    np.testing.assert_allclose(table.lookup(table.getFields()), expected, rtol=1e-12)
+
+    again = RateTable.build(CROSS_SECTIONS, meanEnergy, (1.0, 500.0), 64, str(tmp_path))
+    assert os.listdir(tmp_path) == files
+    assert again.getDigest() == table.getDigest()
+
+    changed = dict(CROSS_SECTIONS, excitation=([6.0, 10.0, 50.0], [0.0, 4e-21, 1e-21]))
+    RateTable.build(changed, meanEnergy, (1.0, 500.0), 64, str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_lookup_interpolates_in_log_field_and_clamps(tmp_path):
+    fields = np.geomspace(10.0, 1000.0, 3)
+    rates = np.array([[1.0, 2.0, 4.0]])
+    path = str(tmp_path / "table.rates")
+    RateTable.write(path, ["r"], fields, rates)
+    table = RateTable(path)
+    np.testing.assert_allclose(table.lookup([1.0, 10.0, np.sqrt(10.0) * 10.0, 100.0, 1e4]), [[1.0, 1.0, 1.5, 2.0, 4.0]])
+    assert table.lookup(np.ones((2, 3)), ["r"]).shape == (1, 2, 3)
+    with pytest.raises(KeyError):
+        table.lookup(10.0, ["missing"])
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "foreign.rates"
+    path.write_bytes(b"NOTARATE" + bytes(64))
+    with pytest.raises(ValueError):
+        RateTable(str(path))
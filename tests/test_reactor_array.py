@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from reactor.ac_voltage_source import VoltageSource
+from reactor.capacitor import Capacitor
+from reactor.reactor import Reactor
+from reactor.reactor_array import ReactorArray
+from utility.time import Time
+
+
+CELLS = [1.347e-9, 1.1e-9, 1.6e-9]
+BARRIERS = [2.13e-9, 2.0e-9, 2.5e-9]
+GAPS = [3.66e-9, 2.9e-9, 4.1e-9]
+
+
+def test_cells_match_single_reactors():
+    source = VoltageSource(6000.0, 910.0)
+    time = Time.getTimeAxis(2e-2, 1e5)
+    results = ReactorArray(CELLS, BARRIERS, GAPS, source).simulate(time)
+    for row, (cell, barrier, gap) in enumerate(zip(CELLS, BARRIERS, GAPS)):
+        single = Reactor(Capacitor(cell, "C_cell"), Capacitor(barrier, "C_barrier"), Capacitor(gap, "C_gap"),
+                         source).simulate(2e-2, 1e5)
+        np.testing.assert_array_equal(single.getTime(), time)
+        np.testing.assert_allclose(results.getCellIntensity()[row], single.getIntensity(), rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(results.getCellCharge()[row], single.getCharge(), rtol=1e-9, atol=1e-18)
+
+
+def test_voltage_divides_over_barrier_and_gap():
+    source = VoltageSource(6000.0, 910.0)
+    time = np.linspace(0, 2e-2, 501)
+    results = ReactorArray(CELLS, BARRIERS, GAPS, source).simulate(time)
+    np.testing.assert_allclose(results.getGapVoltage() + results.getBarrierVoltage(),
+                               np.broadcast_to(results.getVoltage(), results.getGapVoltage().shape))
+    # The series capacitors carry the same charge: C_gap * V_gap == C_barrier * V_barrier
+    np.testing.assert_allclose(np.asarray(GAPS)[:, None] * results.getGapVoltage(),
+                               np.asarray(BARRIERS)[:, None] * results.getBarrierVoltage(), rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(results.getTotalIntensity(), results.getCellIntensity().sum(axis=0))
+
+
+def test_accepts_capacitor_instances():
+    source = VoltageSource(6000.0, 910.0)
+    time = np.linspace(0, 1e-2, 101)
+    values = ReactorArray(CELLS, BARRIERS, GAPS, source).simulate(time)
+    instances = ReactorArray([Capacitor(value, "C_cell") for value in CELLS], BARRIERS, GAPS, source).simulate(time)
+    np.testing.assert_array_equal(instances.getCellIntensity(), values.getCellIntensity())
+
+
+def test_mismatched_lengths_raise():
+    with pytest.raises(ValueError):
+        ReactorArray(CELLS, BARRIERS[:2], GAPS, VoltageSource(6000.0, 910.0))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from base.sensitivity import Sensitivity
+from reactor.ac_voltage_source import VoltageSource
+from reactor.capacitor import Capacitor
+
+
+NOMINAL = {"C_cell": 1.347e-9, "C_barrier": 2.13e-9, "C_gap": 3.66e-9, "amplitude": 6000.0, "frequency": 910.0}
+
+
+def evaluate(values, time):
+    sensitivity = Sensitivity(Capacitor(values["C_cell"], "C_cell"), Capacitor(values["C_barrier"], "C_barrier"),
+                              Capacitor(values["C_gap"], "C_gap"), VoltageSource(values["amplitude"], values["frequency"]))
+    return sensitivity.evaluate(time)
+
+
+def series(values):
+    return values["C_barrier"] * values["C_gap"] / (values["C_barrier"] + values["C_gap"])
+
+
+@pytest.mark.parametrize("parameter", ["C_cell", "C_barrier", "C_gap", "amplitude", "frequency"])
+def test_sensitivities_match_finite_differences(parameter):
+    time = np.linspace(0, 2e-2, 257)
+    solution = evaluate(NOMINAL, time)
+    shifted = []
+    for sign in (1, -1):
+        values = dict(NOMINAL)
+        values[parameter] *= 1 + sign * 1e-6
+        # The barrier and the gap act through their series equivalent, as in MonteCarlo.sample().
+        values["C_cell"] *= series(values) / series(NOMINAL)
+        shifted.append(evaluate(values, time))
+    step = 2e-6 * NOMINAL[parameter]
+    for channel in ("intensity", "power"):
+        numeric = (shifted[0][channel] - shifted[1][channel]) / step
+        scale = np.max(np.abs(numeric))
+        assert scale > 0
+        np.testing.assert_allclose(solution[f"{channel}Sensitivity"][parameter], numeric, rtol=1e-4, atol=1e-5 * scale)
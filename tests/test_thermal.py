@@ -0,0 +1,34 @@
+import numpy as np
+from reactor.ac_voltage_source import VoltageSource
+from reactor.capacitor import Capacitor
+from reactor.thermal import BarrierThermalModel
+
+
+def makeModel(**options):
+    return BarrierThermalModel(Capacitor(3.66e-9, "C_gap"), VoltageSource(6000.0, 2 * np.pi * 910), 2.13e-9, 50.0, 2.0,
+                               samplesPerCycle=256, **options)
+
+
+def test_dielectric_loss_reaches_analytic_steady_state():
+    model = makeModel(temperatureCoefficient=0.0)
+    results = model.simulate(2000.0, 10.0)
+    share = 3.66 / (2.13 + 3.66)
+    loss = 2 * np.pi * 910 * 2.13e-9 * 1e-2 * 0.5 * 6000.0 ** 2 * share ** 2
+    np.testing.assert_allclose(results["power"], loss, rtol=1e-3)
+    np.testing.assert_allclose(results["temperature"][-1], 293.15 + 2.0 * loss, rtol=1e-4)
+    assert results["evaluations"] == 0
+
+
+def test_discharge_power_is_interpolated_between_operating_points():
+    model = makeModel(breakdownVoltage=2000.0, dischargeHeatFraction=0.5)
+    for capacitance in 2.13e-9 * np.array([1.0, 1.0025, 1.0137]):
+        direct = model.evaluateCycle(capacitance)["dischargePower"]
+        # The breakdowns land on discrete samples, so the direct evaluation itself jitters by a few 1e-3.
+        np.testing.assert_allclose(model.getDischargePower(capacitance), direct, rtol=5e-3)
+
+
+def test_long_run_only_evaluates_the_visited_grid_points():
+    model = makeModel(breakdownVoltage=2000.0, dischargeHeatFraction=0.5)
+    results = model.simulate(7200.0, 60.0)
+    drift = results["C_barrier"][-1] / results["C_barrier"][0] - 1
+    assert results["evaluations"] <= int(np.ceil(drift / 1e-3)) + 2
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from reactor.results import SimulationResults
+from utility.waveform_pyramid import WaveformPyramid, WaveformPyramidWriter
+
+
+STEP = 1e-6
+
+
+@pytest.fixture(scope="module")
+def pyramid(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("pyramid"))
+    voltage = np.cumsum(np.random.default_rng(5).standard_normal(300_001))
+    with WaveformPyramidWriter(directory) as writer:
+        for start, stop in [(0, 12_345), (12_345, 12_346), (12_346, 200_001), (200_001, 300_001)]:
+            time = np.arange(start, stop) * STEP
+            writer.append(SimulationResults(time, voltage[start:stop], np.zeros(stop - start), np.zeros(stop - start)))
+    return WaveformPyramid(directory), voltage
+
+
+@pytest.mark.parametrize("startTime, stopTime, points", [(0.0, 0.3, 100), (0.0123, 0.2567, 250), (0.05, 0.0501, 1000),
+                                                         (0.1, 0.10003, 1000), (0.1234567, 0.2987654, 37)])
+def test_query_matches_brute_force(pyramid, startTime, stopTime, points):
+    reader, voltage = pyramid
+    result = reader.query("voltage", startTime, stopTime, points)
+    first, stop = int(np.ceil(startTime / STEP - 1e-9)), int(np.floor(stopTime / STEP + 1e-9)) + 1
+    window = voltage[first:stop]
+    assert np.min(result["min"]) == np.min(window) and np.max(result["max"]) == np.max(window)
+    if result["level"] == 0 and len(window) <= points:
+        np.testing.assert_array_equal(result["mean"], window)
+        return
+
+    # Every bucket is exact up to the blocks of the level read that straddle its edges.
+    block = 1 << result["level"]
+    edges = np.round(result["edges"] / STEP + 0.5).astype(int)
+    assert len(result["min"]) == points and len(edges) == points + 1
+    for index in range(points):
+        inner = voltage[max(edges[index] + block, first):max(min(edges[index + 1] - block, stop), edges[index] + block)]
+        outer = voltage[max(edges[index] - block, first):min(edges[index + 1] + block, stop)]
+        assert np.min(outer) <= result["min"][index] and result["max"][index] <= np.max(outer)
+        if len(inner):
+            assert result["min"][index] <= np.min(inner) and np.max(inner) <= result["max"][index]
+        assert np.min(outer) <= result["mean"][index] <= np.max(outer)
+    np.testing.assert_allclose(np.mean(result["mean"]), np.mean(window), rtol=0, atol=0.02 * np.ptp(window))
+
+
+def test_time_range_and_unknown_channel(pyramid):
+    reader, voltage = pyramid
+    assert reader.getCount() == len(voltage)
+    assert reader.getTimeRange() == pytest.approx((0.0, (len(voltage) - 1) * STEP))
+    with pytest.raises(KeyError):
+        reader.query("missing", 0.0, 1.0)
@@ -0,0 +1,371 @@
+import json
+import numpy as np
+from utility.logger import LoggerIfc
+from reactor.results import SimulationResults
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+
+CHANNELS = ("time", "voltage", "intensity", "power", "charge")
+METRICS = ("startTime", "stopTime", "voltageRms", "intensityRms", "meanPower", "energy")
+
+
+def getChannels(results : SimulationResults) -> dict:
+    """
+    Get the channels of a SimulationResults instance by their export name.
+
+    Parameters:
+    - results: A SimulationResults instance.
+
+    Returns:
+    A dictionary mapping every name in CHANNELS to its array. Results with active windows (see
+    SimulationResults.getActiveWindows) only contribute the samples inside them, which are all they store; the idle
+    samples are all 0 and are left out, so a file of a low duty cycle run only stores its bursts.
+    """
+    return {"time": results.getActiveTime(), "voltage": results.getActiveVoltage(), "intensity": results.getActiveIntensity(),
+            "power": results.getActivePower(), "charge": results.getActiveCharge()}
+
+
+def getMetrics(results : SimulationResults) -> dict:
+    """
+    Get the derived metrics of one chunk of results.
+
+    Parameters:
+    - results: A SimulationResults instance.
+
+    Returns:
+    A dictionary mapping every name in METRICS to its value: the time span of the chunk, the RMS voltage (V) and
+    intensity (mA), the mean power (W) and the energy (J) delivered within the chunk.
+
+    The metrics are computed from the stored (active) samples only, as the idle samples are 0. The trapezoidal energy
+    is written as the sum of every sample times half the span between its neighbours, which only needs the time values
+    next to the active samples.
+    """
+    time, power, active = results.getTime(), results.getActivePower(), results.getActiveIndices()
+    count = len(time)
+    weight = 0.5 * (time[np.minimum(active + 1, count - 1)] - time[np.maximum(active - 1, 0)])
+    return {"startTime": float(time[0]), "stopTime": float(time[-1]),
+            "voltageRms": float(np.sqrt(np.sum(results.getActiveVoltage() ** 2) / count)),
+            "intensityRms": float(np.sqrt(np.sum(results.getActiveIntensity() ** 2) / count)),
+            "meanPower": float(np.sum(power) / count),
+            "energy": float(np.sum(power * weight))}
+
+
+class Hdf5Exporter:
+    """
+    Writes simulation channels to an HDF5 file, appended chunk by chunk.
+
+    Methods:
+    - __init__(path: str, parameters: dict = None, chunkSize: int = 65536, compressionLevel: int = 4): Create the file.
+    - append(results): Append one chunk of SimulationResults.
+    - close(): Close the file.
+    - readTimeSlice(path: str, startTime: float, stopTime: float): Read the samples of a time window.
+    - readParameters(path: str): Read the simulation parameters stored in the file.
+    - readMetrics(path: str): Read the derived metrics of every appended chunk.
+
+    Layout: one resizable, chunked, gzip-compressed (with byte shuffle) float64 dataset per channel under "channels",
+    one dataset per derived metric under "metrics" (one row per appended chunk), and an "index" dataset with the first
+    time and sample offset of every HDF5 dataset chunk, so it stays fine-grained however large the appended chunks are.
+    The parameters are stored as attributes of the root group. readTimeSlice() bisects the small index and only
+    decompresses the dataset chunks overlapping the window.
+
+    Can be used as a context manager. Requires the optional h5py package.
+
+    Note: This class assumes the existence of the LoggerIfc and SimulationResults classes and the numpy library.
+    """
+    def __init__(self, path : str, parameters : dict = None, chunkSize : int = 65536, compressionLevel : int = 4) -> None:
+        """
+        Create the file.
+
+        Parameters:
+        - path: The path of the HDF5 file. An existing file is overwritten.
+        - parameters: Simulation parameters to store as file metadata, e.g. Reactor.getParameters() (default: None).
+        - chunkSize: The number of samples per HDF5 dataset chunk (default: 65536).
+        - compressionLevel: The gzip compression level (default: 4).
+
+        Returns:
+        None
+
+        Raises:
+        ImportError: If h5py is not installed.
+        """
+        if h5py is None:
+            raise ImportError("HDF5 export requires the h5py package")
+        self.__log = LoggerIfc("Hdf5Exporter")
+        self.__file = h5py.File(path, "w")
+        self.__chunkSize = chunkSize
+        for key, value in (parameters or {}).items():
+            self.__file.attrs[key] = value
+        channels = self.__file.create_group("channels")
+        for name in CHANNELS:
+            channels.create_dataset(name, shape=(0,), maxshape=(None,), dtype="f8", chunks=(chunkSize,),
+                                    compression="gzip", compression_opts=compressionLevel, shuffle=True)
+        metrics = self.__file.create_group("metrics")
+        for name in METRICS:
+            metrics.create_dataset(name, shape=(0,), maxshape=(None,), dtype="f8", chunks=(1024,))
+        self.__file.create_dataset("index", shape=(0, 2), maxshape=(None, 2), dtype="f8", chunks=(1024, 2))
+        self.__log.info(f"Exporting to {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    @staticmethod
+    def __appendRows(dataset, rows) -> int:
+        start = dataset.shape[0]
+        dataset.resize(start + len(rows), axis=0)
+        dataset[start:] = rows
+        return start
+
+    def append(self, results : SimulationResults) -> None:
+        """
+        Append one chunk of SimulationResults.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - results: The chunk to append. Chunks must be appended in time order.
+
+        Returns:
+        None
+        """
+        channels = getChannels(results)
+        if len(channels["time"]) == 0:
+            return
+        offset = None
+        for name, values in channels.items():
+            offset = self.__appendRows(self.__file["channels"][name], values)
+        for name, value in getMetrics(results).items():
+            self.__appendRows(self.__file["metrics"][name], [value])
+        starts = np.arange(-(-offset // self.__chunkSize) * self.__chunkSize, offset + len(channels["time"]), self.__chunkSize)
+        if len(starts):
+            self.__appendRows(self.__file["index"], np.stack([channels["time"][starts - offset], starts], axis=1))
+
+    def close(self) -> None:
+        """
+        Close the file.
+
+        Returns:
+        None
+        """
+        if self.__file:
+            self.__file.close()
+            self.__file = None
+
+    @staticmethod
+    def readTimeSlice(path : str, startTime : float, stopTime : float) -> SimulationResults:
+        """
+        Read the samples of a time window.
+
+        Parameters:
+        - path: The path of the HDF5 file.
+        - startTime: The start of the window in seconds (inclusive).
+        - stopTime: The end of the window in seconds (inclusive).
+
+        Returns:
+        A SimulationResults instance with the samples inside the window.
+
+        Raises:
+        ImportError: If h5py is not installed.
+        """
+        if h5py is None:
+            raise ImportError("HDF5 export requires the h5py package")
+        with h5py.File(path, "r") as source:
+            index = source["index"][:]
+            total = source["channels"]["time"].shape[0]
+            first = max(np.searchsorted(index[:, 0], startTime, side="right") - 1, 0)
+            last = np.searchsorted(index[:, 0], stopTime, side="right")
+            start = int(index[first, 1]) if len(index) else 0
+            stop = int(index[last, 1]) if last < len(index) else total
+            data = {name: source["channels"][name][start:stop] for name in CHANNELS}
+        inside = (data["time"] >= startTime) & (data["time"] <= stopTime)
+        return SimulationResults(data["time"][inside], data["voltage"][inside], data["intensity"][inside], data["charge"][inside])
+
+    @staticmethod
+    def readParameters(path : str) -> dict:
+        """
+        Read the simulation parameters stored in the file.
+
+        Parameters:
+        - path: The path of the HDF5 file.
+
+        Returns:
+        The parameters dictionary given when the file was written.
+        """
+        if h5py is None:
+            raise ImportError("HDF5 export requires the h5py package")
+        with h5py.File(path, "r") as source:
+            return {key: value.item() if hasattr(value, "item") else value for key, value in source.attrs.items()}
+
+    @staticmethod
+    def readMetrics(path : str) -> dict:
+        """
+        Read the derived metrics of every appended chunk.
+
+        Parameters:
+        - path: The path of the HDF5 file.
+
+        Returns:
+        A dictionary mapping every name in METRICS to an array with one value per appended chunk.
+        """
+        if h5py is None:
+            raise ImportError("HDF5 export requires the h5py package")
+        with h5py.File(path, "r") as source:
+            return {name: source["metrics"][name][:] for name in METRICS}
+
+
+class ParquetExporter:
+    """
+    Writes simulation channels to a Parquet file, appended chunk by chunk in row groups of bounded size.
+
+    Methods:
+    - __init__(path: str, parameters: dict = None, compression: str = "zstd", rowGroupSize: int = 65536): Create the file.
+    - append(results): Append one chunk of SimulationResults as one or more row groups.
+    - close(): Write the metadata and close the file.
+    - readTimeSlice(path: str, startTime: float, stopTime: float): Read the samples of a time window.
+    - readParameters(path: str): Read the simulation parameters stored in the file.
+    - readMetrics(path: str): Read the derived metrics of every appended chunk.
+
+    Every channel is a float64 column. The parameters and the derived metrics of every row group are stored as JSON in
+    the key-value metadata of the file when it is closed. readTimeSlice() uses the min/max statistics of the time
+    column to read only the row groups overlapping the window.
+
+    Can be used as a context manager. Requires the optional pyarrow package.
+
+    Note: This class assumes the existence of the LoggerIfc and SimulationResults classes and the numpy library.
+    """
+    def __init__(self, path : str, parameters : dict = None, compression : str = "zstd", rowGroupSize : int = 65536) -> None:
+        """
+        Create the file.
+
+        Parameters:
+        - path: The path of the Parquet file. An existing file is overwritten.
+        - parameters: Simulation parameters to store as file metadata, e.g. Reactor.getParameters() (default: None).
+        - compression: The Parquet compression codec (default: "zstd").
+        - rowGroupSize: The largest number of samples per row group, so a large appended chunk is split and time slices
+          only read the row groups they overlap (default: 65536).
+
+        Returns:
+        None
+
+        Raises:
+        ImportError: If pyarrow is not installed.
+        """
+        if pyarrow is None:
+            raise ImportError("Parquet export requires the pyarrow package")
+        self.__log = LoggerIfc("ParquetExporter")
+        self.__parameters = dict(parameters or {})
+        self.__rowGroupSize = rowGroupSize
+        self.__metrics = {name: [] for name in METRICS}
+        self.__schema = pyarrow.schema([(name, pyarrow.float64()) for name in CHANNELS])
+        self.__writer = parquet.ParquetWriter(path, self.__schema, compression=compression)
+        self.__log.info(f"Exporting to {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def append(self, results : SimulationResults) -> None:
+        """
+        Append one chunk of SimulationResults as one or more row groups.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - results: The chunk to append. Chunks must be appended in time order.
+
+        Returns:
+        None
+        """
+        channels = getChannels(results)
+        if len(channels["time"]) == 0:
+            return
+        self.__writer.write_table(pyarrow.table({name: channels[name] for name in CHANNELS}, schema=self.__schema),
+                                  row_group_size=self.__rowGroupSize)
+        for name, value in getMetrics(results).items():
+            self.__metrics[name].append(value)
+
+    def close(self) -> None:
+        """
+        Write the metadata and close the file.
+
+        Returns:
+        None
+        """
+        if self.__writer:
+            self.__writer.add_key_value_metadata({"parameters": json.dumps(self.__parameters), "metrics": json.dumps(self.__metrics)})
+            self.__writer.close()
+            self.__writer = None
+
+    @staticmethod
+    def readTimeSlice(path : str, startTime : float, stopTime : float) -> SimulationResults:
+        """
+        Read the samples of a time window.
+
+        Parameters:
+        - path: The path of the Parquet file.
+        - startTime: The start of the window in seconds (inclusive).
+        - stopTime: The end of the window in seconds (inclusive).
+
+        Returns:
+        A SimulationResults instance with the samples inside the window.
+
+        Raises:
+        ImportError: If pyarrow is not installed.
+        """
+        if pyarrow is None:
+            raise ImportError("Parquet export requires the pyarrow package")
+        source = parquet.ParquetFile(path)
+        timeColumn = source.schema_arrow.get_field_index("time")
+        groups = []
+        for group in range(source.metadata.num_row_groups):
+            statistics = source.metadata.row_group(group).column(timeColumn).statistics
+            if statistics is None or not statistics.has_min_max or (statistics.max >= startTime and statistics.min <= stopTime):
+                groups.append(group)
+        table = source.read_row_groups(groups, columns=list(CHANNELS))
+        data = {name: table.column(name).to_numpy() for name in CHANNELS}
+        inside = (data["time"] >= startTime) & (data["time"] <= stopTime)
+        return SimulationResults(data["time"][inside], data["voltage"][inside], data["intensity"][inside], data["charge"][inside])
+
+    @staticmethod
+    def readParameters(path : str) -> dict:
+        """
+        Read the simulation parameters stored in the file.
+
+        Parameters:
+        - path: The path of the Parquet file.
+
+        Returns:
+        The parameters dictionary given when the file was written.
+        """
+        if pyarrow is None:
+            raise ImportError("Parquet export requires the pyarrow package")
+        return json.loads(parquet.read_metadata(path).metadata[b"parameters"])
+
+    @staticmethod
+    def readMetrics(path : str) -> dict:
+        """
+        Read the derived metrics of every appended chunk.
+
+        Parameters:
+        - path: The path of the Parquet file.
+
+        Returns:
+        A dictionary mapping every name in METRICS to an array with one value per appended chunk.
+        """
+        if pyarrow is None:
+            raise ImportError("Parquet export requires the pyarrow package")
+        metrics = json.loads(parquet.read_metadata(path).metadata[b"metrics"])
+        return {name: np.asarray(values) for name, values in metrics.items()}
@@ -1,4 +1,8 @@
+import os
 import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
 from utility.logger import LoggerIfc
 
 class JobScheduler:
@@ -9,8 +13,10 @@ class JobScheduler:
     - __init__(): Initialize a JobScheduler instance.
     - schedule(job, *args): Schedule a job to be executed.
     - run(): Run all scheduled jobs.
+    - runSplit(job, time, workers=None, slices=None): Evaluate one job over a long time axis in parallel worker processes.
+    - evaluateSlice(job, inputName, outputName, length, start, stop): Evaluate one slice of a split job inside a worker.
 
-    Note: This class assumes the existence of threading and LoggerIfc libraries.
+    Note: This class assumes the existence of threading, multiprocessing, numpy and LoggerIfc libraries.
     """
     def __init__(self) -> None:
         """
@@ -69,4 +75,72 @@ class JobScheduler:
             job.join()
         self.log.debug("All jobs completed")
         self.__jobs.clear()
-        
\ No newline at end of file
+
+    def runSplit(self, job, time, workers : int = None, slices : int = None):
+        """
+        Evaluate one job over a long time axis in parallel worker processes.
+
+        Parameters:
+        - job: A picklable vectorized function mapping an array of time values to an array of results of the same length,
+          e.g. Intensity.evaluate.
+        - time: The time axis.
+        - workers: The number of worker processes (default: one per CPU).
+        - slices: The number of contiguous slices the time axis is split into (default: one per worker).
+
+        Returns:
+        A numpy array with the results for the whole time axis, identical to job(time).
+
+        This method places the time axis and the output array in shared memory (multiprocessing.shared_memory). Every
+        worker attaches to both, evaluates its contiguous slice and writes the result directly into its part of the
+        output, so neither the inputs nor the results are pickled and no concatenation is needed. The only copy is
+        the final one out of the shared block before it is released.
+
+        Note: This method assumes the existence of the multiprocessing and numpy libraries.
+        """
+        time = np.ascontiguousarray(time, dtype=np.float64)
+        workers = workers or os.cpu_count() or 1
+        slices = min(slices or workers, max(len(time), 1))
+        bounds = np.linspace(0, len(time), slices + 1).astype(int)
+        self.log.debug(f"Splitting {len(time)} samples into {slices} slices on {workers} workers")
+
+        inputBlock = shared_memory.SharedMemory(create=True, size=max(time.nbytes, 1))
+        outputBlock = shared_memory.SharedMemory(create=True, size=max(time.nbytes, 1))
+        try:
+            np.ndarray(time.shape, dtype=np.float64, buffer=inputBlock.buf)[:] = time
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(JobScheduler.evaluateSlice, job, inputBlock.name, outputBlock.name, len(time), start, stop)
+                           for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+                for future in futures:
+                    future.result()
+            return np.array(np.ndarray(time.shape, dtype=np.float64, buffer=outputBlock.buf))
+        finally:
+            for block in (inputBlock, outputBlock):
+                block.close()
+                block.unlink()
+
+    @staticmethod
+    def evaluateSlice(job, inputName : str, outputName : str, length : int, start : int, stop : int) -> None:
+        """
+        Evaluate one slice of a split job inside a worker.
+
+        Parameters:
+        - job: The vectorized function to evaluate.
+        - inputName: The name of the shared memory block holding the time axis.
+        - outputName: The name of the shared memory block receiving the results.
+        - length: The length of the time axis.
+        - start: The first index of the slice.
+        - stop: The index after the last one of the slice.
+
+        Returns:
+        None
+        """
+        inputBlock = shared_memory.SharedMemory(name=inputName)
+        outputBlock = shared_memory.SharedMemory(name=outputName)
+        try:
+            time = np.ndarray((length,), dtype=np.float64, buffer=inputBlock.buf)
+            output = np.ndarray((length,), dtype=np.float64, buffer=outputBlock.buf)
+            output[start:stop] = job(time[start:stop])
+            del time, output
+        finally:
+            inputBlock.close()
+            outputBlock.close()
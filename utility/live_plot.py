@@ -0,0 +1,250 @@
+import os
+from time import perf_counter
+import numpy as np
+import matplotlib
+from matplotlib import pyplot as plt
+from utility.logger import LoggerIfc
+
+
+class RingBuffer:
+    """
+    Fixed-size buffer holding the most recent samples of a time axis and several channels.
+
+    Methods:
+    - __init__(capacity: int, channels: int): Initialize an empty RingBuffer instance.
+    - extend(time, values): Append a chunk of samples, overwriting the oldest ones when full.
+    - view(): Get the buffered samples in time order.
+    - __len__(): Get the number of buffered samples.
+    """
+    def __init__(self, capacity : int, channels : int) -> None:
+        self.__time = np.zeros(capacity)
+        self.__values = np.zeros((channels, capacity))
+        self.__capacity = capacity
+        self.__head = 0
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def extend(self, time : np.ndarray, values : np.ndarray) -> None:
+        """
+        Append a chunk of samples, overwriting the oldest ones when full.
+
+        Parameters:
+        - time: The time values of the chunk.
+        - values: A (channels x samples) array with the channel values of the chunk.
+
+        Returns:
+        None
+
+        Only the last capacity samples of a chunk are kept. The chunk is copied in at most two slice assignments.
+        """
+        time = np.asarray(time)[-self.__capacity:]
+        values = np.asarray(values)[:, -self.__capacity:]
+        count = len(time)
+        first = min(count, self.__capacity - self.__head)
+        self.__time[self.__head:self.__head + first] = time[:first]
+        self.__values[:, self.__head:self.__head + first] = values[:, :first]
+        self.__time[:count - first] = time[first:]
+        self.__values[:, :count - first] = values[:, first:]
+        self.__head = (self.__head + count) % self.__capacity
+        self.__size = min(self.__size + count, self.__capacity)
+
+    def view(self):
+        """
+        Get the buffered samples in time order.
+
+        Returns:
+        A tuple (time, values) of copies in time order.
+        """
+        start = (self.__head - self.__size) % self.__capacity
+        order = (np.arange(self.__size) + start) % self.__capacity
+        return self.__time[order], self.__values[:, order]
+
+
+class LivePlotWrapper:
+    """
+    Live view of voltage, intensity and power fed chunk by chunk from a streaming simulation.
+
+    Methods:
+    - __init__(capacity: int, maxFps: float, headless: bool, snapshotDirectory: str, snapshotInterval: float): Initialize a LivePlotWrapper instance.
+    - update(results): Push one chunk of SimulationResults and redraw if a frame is due.
+    - run(chunks): Consume a whole stream of chunks, e.g. from Reactor.simulateChunks.
+    - decimate(time, values, points): Reduce a waveform to a min/max envelope of a given number of points.
+    - close(): Draw the final frame and close the figure.
+
+    The most recent samples are kept in a RingBuffer of fixed capacity. Redraws are capped at maxFps and the buffered
+    waveforms are decimated to a min/max envelope at the horizontal pixel resolution of the figure before drawing, so
+    the cost of a frame does not grow with the sample rate. Interactive backends are updated with blitting: the axes
+    background is cached and only the lines are redrawn, unless the data leaves the current axis limits. Headless runs
+    (non-interactive backend or headless=True) write snapshot frames to snapshotDirectory instead.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy and matplotlib libraries.
+    """
+    CHANNELS = (("Tension V(t)", "Tension (V)"), ("Intensity I(t)", "Intensity (mA)"), ("Power approximated P(t)", "Power (W)"))
+
+    def __init__(self, capacity : int = 1 << 18, maxFps : float = 20.0, headless : bool = None,
+                 snapshotDirectory : str = "plots/live", snapshotInterval : float = 1.0) -> None:
+        """
+        Initialize a LivePlotWrapper instance.
+
+        Parameters:
+        - capacity: The number of most recent samples kept for display (default: 262144).
+        - maxFps: The maximum number of redraws per second of wall-clock time (default: 20).
+        - headless: Write snapshot frames instead of drawing on screen (default: True for non-interactive backends).
+        - snapshotDirectory: The directory of the snapshot frames (default: "plots/live").
+        - snapshotInterval: The wall-clock time between two snapshot frames in seconds (default: 1).
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("LivePlot")
+        self.__buffer = RingBuffer(capacity, len(LivePlotWrapper.CHANNELS))
+        self.__capacity = capacity
+        self.__frameInterval = 1.0 / maxFps
+        self.__headless = headless if headless is not None else matplotlib.get_backend().lower() in ("agg", "pdf", "ps", "svg", "cairo", "template")
+        self.__snapshotDirectory = snapshotDirectory
+        self.__snapshotInterval = snapshotInterval
+        self.__lastFrame = -np.inf
+        self.__lastSnapshot = -np.inf
+        self.__snapshots = 0
+        self.__background = None
+
+        self.__figure, self.__axes = plt.subplots(len(LivePlotWrapper.CHANNELS), 1, sharex=True)
+        self.__lines = []
+        for axis, (title, ylabel) in zip(self.__axes, LivePlotWrapper.CHANNELS):
+            line, = axis.plot([], [], animated=not self.__headless)
+            axis.set_title(title)
+            axis.set_ylabel(ylabel)
+            axis.grid(True)
+            self.__lines.append(line)
+        self.__axes[-1].set_xlabel("Time (ms)")
+        self.__figure.tight_layout()
+        if self.__headless:
+            os.makedirs(self.__snapshotDirectory, exist_ok=True)
+        else:
+            plt.show(block=False)
+            self.__figure.canvas.mpl_connect("draw_event", self.__cacheBackground)
+        self.__log.info(f"Live plot started ({'headless snapshots' if self.__headless else 'interactive'}, capped at {maxFps} fps)")
+
+    @staticmethod
+    def decimate(time : np.ndarray, values : np.ndarray, points : int):
+        """
+        Reduce a waveform to a min/max envelope of a given number of points.
+
+        Parameters:
+        - time: The time axis.
+        - values: A (channels x samples) array.
+        - points: The number of buckets, typically the horizontal resolution in pixels.
+
+        Returns:
+        A tuple (time, values) with two samples (minimum and maximum) per bucket, or the input if it is already short.
+        """
+        bucket = len(time) // points
+        if bucket < 2:
+            return time, values
+        usable = bucket * points
+        blocks = values[:, -usable:].reshape(values.shape[0], points, bucket)
+        envelope = np.stack([blocks.min(axis=2), blocks.max(axis=2)], axis=2).reshape(values.shape[0], 2 * points)
+        return np.repeat(time[-usable:][::bucket], 2), envelope
+
+    def __cacheBackground(self, event = None) -> None:
+        self.__background = self.__figure.canvas.copy_from_bbox(self.__figure.bbox)
+
+    def __rescale(self, time : np.ndarray, values : np.ndarray) -> bool:
+        rescaled = False
+        for axis, channel in zip(self.__axes, values):
+            low, high = axis.get_ylim()
+            if len(channel) and (channel.min() < low or channel.max() > high):
+                span = max(channel.max() - channel.min(), np.finfo(float).eps)
+                axis.set_ylim(channel.min() - 0.1 * span, channel.max() + 0.1 * span)
+                rescaled = True
+        low, high = self.__axes[0].get_xlim()
+        if len(time) and (time[0] * 1e3 < low or time[-1] * 1e3 > high):
+            span = max(time[-1] - time[0], np.finfo(float).eps) * 1e3
+            self.__axes[0].set_xlim(time[0] * 1e3, time[0] * 1e3 + 1.5 * span)
+            rescaled = True
+        return rescaled
+
+    def __draw(self) -> None:
+        time, values = self.__buffer.view()
+        time, values = LivePlotWrapper.decimate(time, values, int(self.__figure.get_figwidth() * self.__figure.dpi))
+        for line, channel in zip(self.__lines, values):
+            line.set_data(time * 1e3, channel)
+        rescaled = self.__rescale(time, values)
+
+        if self.__headless:
+            return
+        canvas = self.__figure.canvas
+        if rescaled or self.__background is None:
+            canvas.draw()
+        canvas.restore_region(self.__background)
+        for axis, line in zip(self.__axes, self.__lines):
+            axis.draw_artist(line)
+        canvas.blit(self.__figure.bbox)
+        canvas.flush_events()
+
+    def __snapshot(self) -> None:
+        self.__figure.savefig(os.path.join(self.__snapshotDirectory, f"frame_{self.__snapshots:05d}.png"))
+        self.__snapshots += 1
+
+    def update(self, results) -> None:
+        """
+        Push one chunk of SimulationResults and redraw if a frame is due.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - results: A SimulationResults chunk.
+
+        Returns:
+        None
+
+        Pushing is a copy into the ring buffer. A frame is drawn only when at least 1 / maxFps seconds have passed since
+        the last one, and in headless mode a snapshot is written only every snapshotInterval seconds. Only the samples
+        that fit into the ring buffer are taken from the chunk; for results with active windows they are expanded from the
+        stored active samples, with 0 in the idle spans.
+        """
+        time = results.getTime()[-self.__capacity:]
+        offset = len(results.getTime()) - len(time)
+        active = results.getActiveIndices()
+        keep = active >= offset
+        values = np.zeros((len(LivePlotWrapper.CHANNELS), len(time)))
+        values[:, active[keep] - offset] = np.stack([results.getActiveVoltage()[keep], results.getActiveIntensity()[keep], results.getActivePower()[keep]])
+        self.__buffer.extend(time, values)
+        now = perf_counter()
+        if self.__headless:
+            if now - self.__lastSnapshot >= self.__snapshotInterval:
+                self.__draw()
+                self.__snapshot()
+                self.__lastSnapshot = now
+        elif now - self.__lastFrame >= self.__frameInterval:
+            self.__draw()
+            self.__lastFrame = now
+
+    def run(self, chunks) -> None:
+        """
+        Consume a whole stream of chunks, e.g. from Reactor.simulateChunks.
+
+        Parameters:
+        - chunks: An iterable of SimulationResults chunks.
+
+        Returns:
+        None
+        """
+        for chunk in chunks:
+            self.update(chunk)
+        self.close()
+
+    def close(self) -> None:
+        """
+        Draw the final frame and close the figure.
+
+        Returns:
+        None
+        """
+        if len(self.__buffer):
+            self.__draw()
+            if self.__headless:
+                self.__snapshot()
+        self.__log.info(f"Live plot finished after {self.__snapshots} snapshot frames")
+        plt.close(self.__figure)
@@ -1,6 +1,8 @@
+import numpy as np
 from matplotlib import pyplot as plt
 from utility.time import Time
 from utility.noise import NoiseGenerator
+from utility.memory_tracker import MemoryTracker
 
 class MatPlotWrapper:
     def __init__(self, plotDuration, plotSamples) -> None:
@@ -9,14 +11,31 @@ class MatPlotWrapper:
         self.__plotDuration = plotDuration
         self.__plotSamples = plotSamples
 
-    def plotInstance(self, instance, title : str, ylabel : str, addNoiseLevel : float = 1):
-        plt.cla()
-        plt.plot(self.__time * 1e3, instance + self.__noise.getNoise(self.__plotDuration, self.__plotSamples, addNoiseLevel))
-        plt.title(title)
-        plt.ylabel(ylabel)
-        plt.xlabel("Time (ms)")
-        plt.grid(True)
-        plt.savefig(f"plots/{title}.png")
+    def plotInstance(self, instance, title : str, ylabel : str, addNoiseLevel : float = 1, time = None, memoryTracker : MemoryTracker = None, windows = None):
+        time = self.__time if time is None else time
+        with MemoryTracker.track(memoryTracker, "noise"):
+            if windows is None:
+                noisy = instance + self.__noise.getNoiseSamples(len(time), addNoiseLevel)
+            else:
+                noisy = np.zeros(len(time))
+                noisy[Time.getWindowIndices(windows)] = instance + self.__noise.getNoiseSamples(len(instance), addNoiseLevel)
+        with MemoryTracker.track(memoryTracker, f"plot {title}"):
+            plt.cla()
+            plt.plot(time * 1e3, noisy)
+            plt.title(title)
+            plt.ylabel(ylabel)
+            plt.xlabel("Time (ms)")
+            plt.grid(True)
+            plt.savefig(f"plots/{title}.png")
+
+    def plotResults(self, results, memoryTracker : MemoryTracker = None):
+        if not results.isUniform():
+            results = results.resample(self.__plotSamples)
+        time, windows = results.getTime(), results.getActiveWindows()
+        self.plotInstance(results.getActiveIntensity(), "Intensity I(t)", "Intensity (mA)", 8e-1, time, memoryTracker, windows)
+        self.plotInstance(results.getActiveVoltage(), "Tension V(t)", "Tension (V)", 1e2, time, memoryTracker, windows)
+        self.plotInstance(results.getActivePower(), "Power approximated P(t)", "Power (W)", 0, time, memoryTracker, windows)
+        self.plotInstance(results.getActivePower(), "Power approximated P(t) with noise", "Power (W)", 2, time, memoryTracker, windows)
 
     def getTime(self):
         return self.__time
\ No newline at end of file
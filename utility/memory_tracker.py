@@ -0,0 +1,176 @@
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from utility.logger import LoggerIfc
+from utility.time import StopWatch
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """
+    Raised by MemoryTracker.checkBudgets() when a stage used more memory than its budget.
+    """
+
+
+class MemoryTracker:
+    """
+    Opt-in per-stage memory and time accounting.
+
+    Methods:
+    - __init__(budgets: dict = None, rssInterval: float = 0.01): Initialize a MemoryTracker instance.
+    - stage(name: str): Context manager that measures one stage.
+    - track(tracker, name: str): Get tracker.stage(name), or a no-op context when tracker is None.
+    - getReport(): Get the measurements of every stage.
+    - summary(): Log and return a table of timings and memory per stage.
+    - checkBudgets(): Raise MemoryBudgetExceeded if a stage exceeded its budget.
+
+    Every stage records its wall-clock time, the peak and the retained Python heap allocation (tracemalloc, relative to
+    the allocation at stage entry) and the peak resident set size above the RSS at stage entry, sampled by a background
+    thread. Stages may be nested; the peak of an inner stage counts towards its outer stage. tracemalloc is started on
+    the first stage if it is not already running and stopped again by summary() in that case.
+
+    Note: This class assumes the existence of the LoggerIfc and StopWatch classes.
+    """
+    def __init__(self, budgets : dict = None, rssInterval : float = 0.01) -> None:
+        """
+        Initialize a MemoryTracker instance.
+
+        Parameters:
+        - budgets: A dictionary mapping stage names to their allowed peak allocation in bytes (default: no budgets).
+        - rssInterval: The RSS sampling interval in seconds (default: 0.01).
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("MemoryTracker")
+        self.__budgets = dict(budgets or {})
+        self.__rssInterval = rssInterval
+        self.__report = {}
+        self.__stack = []
+        self.__startedTracing = False
+
+    @staticmethod
+    def getRss() -> int:
+        """
+        Get the current resident set size of this process in bytes, or 0 where it cannot be read.
+        """
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    @staticmethod
+    def track(tracker, name : str):
+        """
+        Get tracker.stage(name), or a no-op context when tracker is None.
+
+        Parameters:
+        - tracker: A MemoryTracker instance or None.
+        - name: The name of the stage.
+
+        Returns:
+        A context manager.
+        """
+        return nullcontext() if tracker is None else tracker.stage(name)
+
+    @contextmanager
+    def stage(self, name : str):
+        """
+        Context manager that measures one stage.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - name: The name of the stage. Repeated stages with the same name are accumulated (times add up, peaks take the
+          maximum).
+
+        Returns:
+        A context manager.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__startedTracing = True
+        if self.__stack:
+            self.__stack[-1]["peak"] = max(self.__stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        entry = {"peak": baseline, "rss": MemoryTracker.getRss()}
+        entry["rssPeak"] = entry["rss"]
+        self.__stack.append(entry)
+
+        stopSampling = threading.Event()
+        def sample():
+            while not stopSampling.wait(self.__rssInterval):
+                entry["rssPeak"] = max(entry["rssPeak"], MemoryTracker.getRss())
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        watch = StopWatch()
+        watch.start()
+        try:
+            yield
+        finally:
+            elapsed = watch.stop()
+            stopSampling.set()
+            sampler.join()
+            current, peak = tracemalloc.get_traced_memory()
+            entry["rssPeak"] = max(entry["rssPeak"], MemoryTracker.getRss())
+            self.__stack.pop()
+            peak = max(entry["peak"], peak)
+            if self.__stack:
+                self.__stack[-1]["peak"] = max(self.__stack[-1]["peak"], peak)
+                self.__stack[-1]["rssPeak"] = max(self.__stack[-1]["rssPeak"], entry["rssPeak"])
+
+            record = self.__report.setdefault(name, {"calls": 0, "seconds": 0.0, "peakBytes": 0, "retainedBytes": 0, "rssPeakBytes": 0})
+            record["calls"] += 1
+            record["seconds"] += elapsed
+            record["peakBytes"] = max(record["peakBytes"], peak - baseline)
+            record["retainedBytes"] += current - baseline
+            record["rssPeakBytes"] = max(record["rssPeakBytes"], entry["rssPeak"] - entry["rss"])
+
+    def getReport(self) -> dict:
+        """
+        Get the measurements of every stage.
+
+        Returns:
+        A dictionary mapping stage names, in order of first use, to dictionaries with "calls", "seconds", "peakBytes",
+        "retainedBytes" and "rssPeakBytes".
+        """
+        return {name: dict(record) for name, record in self.__report.items()}
+
+    def summary(self) -> str:
+        """
+        Log and return a table of timings and memory per stage.
+
+        Returns:
+        The table as a string.
+        """
+        if self.__startedTracing and not self.__stack:
+            tracemalloc.stop()
+            self.__startedTracing = False
+        lines = [f"{'stage':<40}{'calls':>6}{'time [s]':>12}{'peak [MiB]':>12}{'retained [MiB]':>16}{'RSS peak [MiB]':>16}{'budget [MiB]':>14}"]
+        for name, record in self.__report.items():
+            budget = self.__budgets.get(name)
+            lines.append(f"{name:<40}{record['calls']:>6}{record['seconds']:>12.4f}{record['peakBytes'] / 2**20:>12.2f}"
+                         f"{record['retainedBytes'] / 2**20:>16.2f}{record['rssPeakBytes'] / 2**20:>16.2f}"
+                         f"{'-' if budget is None else f'{budget / 2**20:.2f}':>14}")
+        table = "\n".join(lines)
+        self.__log.info("Stage summary:\n" + table)
+        return table
+
+    def checkBudgets(self) -> None:
+        """
+        Raise MemoryBudgetExceeded if a stage exceeded its budget.
+
+        Returns:
+        None
+
+        Raises:
+        MemoryBudgetExceeded: If the peak allocation of any stage with a budget is larger than the budget. The message
+        lists all offending stages.
+        """
+        exceeded = [f"{name}: {self.__report[name]['peakBytes']} > {budget} bytes" for name, budget in self.__budgets.items()
+                    if name in self.__report and self.__report[name]["peakBytes"] > budget]
+        if exceeded:
+            for line in exceeded:
+                self.__log.error(f"Memory budget exceeded in stage {line}")
+            raise MemoryBudgetExceeded("Memory budget exceeded in " + ", ".join(exceeded))
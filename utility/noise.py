@@ -18,4 +18,18 @@ class NoiseGenerator:
             numpy.ndarray: The noise as a numpy array.
 
         """
-        return np.random.randn(int(sample_rate * duration)) * severity
\ No newline at end of file
+        return np.random.randn(int(sample_rate * duration)) * severity
+
+    def getNoiseSamples(self, count : int, severity : float = 1) -> np.ndarray:
+        """
+        Generate a given number of noise samples.
+
+        Args:
+            count (int): The number of samples.
+            severity (float): The standard deviation of the noise.
+
+        Returns:
+            numpy.ndarray: The noise as a numpy array.
+
+        """
+        return np.random.randn(count) * severity
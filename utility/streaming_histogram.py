@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class StreamingHistogram:
+    """
+    Accumulates per-column histograms of a stream of (rows x columns) batches and answers percentile queries.
+
+    Methods:
+    - __init__(low, high, columns: int, bins: int): Initialize an empty StreamingHistogram instance.
+    - add(values): Add a batch of rows.
+    - merge(other): Add the counts of another histogram with the same layout.
+    - percentile(q): Get the q-th percentile of every column.
+
+    low and high are scalars or one value per column, so every column can get a range that fits its own spread. Memory
+    is bins x columns counters regardless of the number of rows added. Values outside [low, high] are counted in the
+    first or last bin and reported through getClipped(). percentile() interpolates linearly within the bin holding the
+    percentile, so its error is a fraction of the bin width (high - low) / bins of the column.
+
+    Note: This class assumes the existence of the numpy library.
+    """
+    def __init__(self, low, high, columns : int = 1, bins : int = 512) -> None:
+        self.__low = np.broadcast_to(np.asarray(low, dtype=float), (columns,)).copy()
+        high = np.broadcast_to(np.asarray(high, dtype=float), (columns,))
+        self.__width = np.where(high > self.__low, (high - self.__low) / bins, 1.0)
+        self.__bins = bins
+        self.__columns = columns
+        self.__counts = np.zeros((bins, columns), dtype=np.int64)
+        self.__clipped = 0
+
+    def getCounts(self) -> np.ndarray:
+        return self.__counts
+
+    def getClipped(self) -> int:
+        return self.__clipped
+
+    def add(self, values) -> None:
+        values = np.asarray(values, dtype=float).reshape(-1, self.__columns)
+        index = np.floor((values - self.__low) / self.__width).astype(np.int64)
+        self.__clipped += int(np.count_nonzero((index < 0) | (index >= self.__bins)))
+        index = np.clip(index, 0, self.__bins - 1) * self.__columns + np.arange(self.__columns)
+        self.__counts += np.bincount(index.ravel(), minlength=self.__bins * self.__columns).reshape(self.__bins, self.__columns)
+
+    def merge(self, other) -> None:
+        self.__counts += other.getCounts()
+        self.__clipped += other.getClipped()
+
+    def percentile(self, q : float) -> np.ndarray:
+        cumulative = np.cumsum(self.__counts, axis=0)
+        target = q / 100.0 * cumulative[-1]
+        index = np.argmax(cumulative >= target, axis=0)
+        columns = np.arange(self.__columns)
+        below = np.where(index > 0, cumulative[index - 1, columns], 0)
+        inBin = np.maximum(self.__counts[index, columns], 1)
+        return self.__low + (index + np.clip((target - below) / inBin, 0.0, 1.0)) * self.__width
+
+
+class StreamingMoments:
+    """
+    Accumulates per-column count, mean, sum of squared deviations, minimum and maximum of a stream of (rows x columns)
+    batches.
+
+    Methods:
+    - __init__(columns: int): Initialize an empty StreamingMoments instance.
+    - add(values): Add a batch of rows.
+    - merge(other): Combine with the moments of another batch with the same columns.
+    - getCount(), getMean(), getStd(), getMin(), getMax(): Get the accumulated statistics.
+
+    Memory is five values per column regardless of the number of rows added. Batches are combined with the pairwise
+    update of Chan et al. (mean and sum of squared deviations instead of raw sums of squares), so the variance does not
+    lose precision to cancellation when the mean is large compared to the spread.
+
+    Note: This class assumes the existence of the numpy library.
+    """
+    def __init__(self, columns : int = 1) -> None:
+        self.__count = 0
+        self.__mean = np.zeros(columns)
+        self.__squares = np.zeros(columns)
+        self.__min = np.full(columns, np.inf)
+        self.__max = np.full(columns, -np.inf)
+
+    def getCount(self) -> int:
+        return self.__count
+
+    def getMean(self) -> np.ndarray:
+        return self.__mean
+
+    def getStd(self) -> np.ndarray:
+        return np.sqrt(self.__squares / self.__count) if self.__count else np.zeros_like(self.__mean)
+
+    def getMin(self) -> np.ndarray:
+        return self.__min
+
+    def getMax(self) -> np.ndarray:
+        return self.__max
+
+    def __combine(self, count : int, mean : np.ndarray, squares : np.ndarray, low : np.ndarray, high : np.ndarray) -> None:
+        if count == 0:
+            return
+        total = self.__count + count
+        delta = mean - self.__mean
+        self.__mean = self.__mean + delta * (count / total)
+        self.__squares = self.__squares + squares + delta ** 2 * (self.__count * count / total)
+        self.__min = np.minimum(self.__min, low)
+        self.__max = np.maximum(self.__max, high)
+        self.__count = total
+
+    def add(self, values) -> None:
+        values = np.asarray(values, dtype=float).reshape(-1, len(self.__mean))
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        self.__combine(len(values), mean, np.square(values - mean).sum(axis=0), values.min(axis=0), values.max(axis=0))
+
+    def merge(self, other) -> None:
+        self.__combine(other.getCount(), other.getMean(), other.getStd() ** 2 * other.getCount(), other.getMin(), other.getMax())
@@ -20,7 +20,105 @@ class Time:
         """
 
         return np.linspace(0, duration, int(duration * sample_rate), endpoint=False)
-    
+
+    @staticmethod
+    def getAdaptiveTimeAxis(duration : float, signals, tolerance : float = 1e-2, min_step : float = 1e-7,
+                            max_step : float = 1e-4, events = (), breakpoints = ()) -> np.ndarray:
+        """
+        Generate a non-uniform time axis that is dense where the given signals change quickly.
+
+        Args:
+            duration (float): The duration of the waveform in seconds.
+            signals (list): Vectorized callables f(time) -> numpy.ndarray whose shape has to be resolved.
+            tolerance (float): The allowed linear interpolation error between two samples, relative to the peak
+                magnitude of each signal.
+            min_step (float): The smallest allowed distance between two samples in seconds.
+            max_step (float): The largest allowed distance between two samples in seconds.
+            events (list): Vectorized callables g(time) -> numpy.ndarray. Every sign change of an event function
+                (e.g. a voltage zero-crossing or the gap voltage passing the breakdown voltage) is resolved down to
+                min_step.
+            breakpoints (numpy.ndarray): Times that are always part of the axis, e.g. from
+                BurstVoltageSource.getBreakpoints(). Features narrower than max_step are only found if they are seeded
+                here, as the refinement only bisects intervals whose end points and midpoint already disagree.
+
+        Returns:
+            numpy.ndarray: The time axis as a numpy array, including both 0 and duration.
+
+        The axis starts as a uniform grid with max_step spacing merged with the breakpoints. Every pass evaluates all signals at the interval
+        midpoints at once and bisects the intervals whose midpoint deviates from the linear interpolation of their end
+        points by more than the tolerance, or that contain an event. Steep slopes and events therefore get dense samples
+        while smooth stretches keep the coarse spacing.
+        """
+        time = np.linspace(0, duration, int(np.ceil(duration / max_step)) + 1)
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        time = np.union1d(time, breakpoints[(breakpoints > 0) & (breakpoints < duration)])
+        values = [np.asarray(signal(time), dtype=float) for signal in signals]
+        scales = [max(np.max(np.abs(value)), np.finfo(float).tiny) for value in values]
+        eventValues = [np.asarray(event(time), dtype=float) for event in events]
+
+        for _ in range(int(np.ceil(np.log2(max_step / min_step))) + 1):
+            middle = 0.5 * (time[:-1] + time[1:])
+            refine = np.zeros(len(middle), dtype=bool)
+            middleValues = []
+            for signal, value, scale in zip(signals, values, scales):
+                middleValue = np.asarray(signal(middle), dtype=float)
+                middleValues.append(middleValue)
+                refine |= np.abs(middleValue - 0.5 * (value[:-1] + value[1:])) > tolerance * scale
+            for eventValue in eventValues:
+                refine |= np.signbit(eventValue[:-1]) != np.signbit(eventValue[1:])
+            refine &= np.diff(time) > 2 * min_step
+            if not np.any(refine):
+                break
+
+            positions = np.flatnonzero(refine) + 1
+            time = np.insert(time, positions, middle[refine])
+            values = [np.insert(value, positions, middleValue[refine]) for value, middleValue in zip(values, middleValues)]
+            eventValues = [np.insert(eventValue, positions, np.asarray(event(middle[refine]), dtype=float))
+                           for event, eventValue in zip(events, eventValues)]
+        return time
+
+    @staticmethod
+    def getWindowIndices(windows) -> np.ndarray:
+        """
+        Get the sample indices covered by a set of index ranges.
+
+        Args:
+            windows (numpy.ndarray): An (n x 2) array of [start, stop) index ranges in ascending order, e.g. from
+                BurstVoltageSource.getActiveWindows().
+
+        Returns:
+            numpy.ndarray: The ascending indices inside the ranges, built without a Python loop over the ranges.
+
+        """
+        windows = np.asarray(windows, dtype=np.int64).reshape(-1, 2)
+        lengths = windows[:, 1] - windows[:, 0]
+        offsets = windows[:, 0] - np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        return np.arange(int(np.sum(lengths))) + np.repeat(offsets, lengths)
+
+    @staticmethod
+    def resampleUniform(time : np.ndarray, values : np.ndarray, sample_rate : float = 1e3):
+        """
+        Resample a (possibly non-uniformly) sampled waveform onto a uniform time axis.
+
+        Args:
+            time (numpy.ndarray): The time axis of the waveform.
+            values (numpy.ndarray): The waveform values, sampled along the last axis.
+            sample_rate (float): The sampling rate of the uniform axis in samples per second.
+
+        Returns:
+            tuple: The uniform time axis (as produced by getTimeAxis, shifted to start at time[0]) and the linearly
+            interpolated values.
+
+        """
+        time = np.asarray(time, dtype=float)
+        values = np.asarray(values, dtype=float)
+        uniform = time[0] + Time.getTimeAxis(time[-1] - time[0], sample_rate)
+        if values.ndim == 1:
+            return uniform, np.interp(uniform, time, values)
+        flat = values.reshape(-1, values.shape[-1])
+        resampled = np.stack([np.interp(uniform, time, row) for row in flat])
+        return uniform, resampled.reshape(values.shape[:-1] + (len(uniform),))
+
 
 class StopWatch:
     def __init__(self):
@@ -0,0 +1,253 @@
+import json
+import os
+import numpy as np
+from utility.logger import LoggerIfc
+
+
+CHANNELS = ("voltage", "intensity", "power", "charge")
+
+
+class WaveformPyramidWriter:
+    """
+    Writes simulation channels to a directory together with a min/max/mean pyramid, appended chunk by chunk.
+
+    Methods:
+    - __init__(directory: str, levels: int = 32): Create the pyramid directory.
+    - append(results): Append one chunk of uniformly sampled SimulationResults.
+    - close(): Write the metadata and close the files.
+
+    For every channel the raw float64 samples go to "<channel>.bin" and level k (k >= 1) to "<channel>.L<k>.bin", with
+    one (min, max, mean) float64 triple per block of 2^k raw samples. Level k is built from pairs of level k - 1 entries
+    while the chunks are written, so the pyramid costs about the same as a second pass over the data and never needs
+    the raw samples again; an odd entry left over at the end of a chunk is carried to the next one. "meta.json" holds the
+    start time, the sample spacing and the number of samples and of entries per level. All files are plain appendable
+    binaries that WaveformPyramid memory maps.
+
+    Can be used as a context manager.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy library.
+    """
+    def __init__(self, directory : str, levels : int = 32) -> None:
+        """
+        Create the pyramid directory.
+
+        Parameters:
+        - directory: The directory to write to. Existing pyramid files in it are overwritten.
+        - levels: The highest level that is built (default: 32).
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("WaveformPyramid")
+        self.__directory = directory
+        self.__levels = levels
+        os.makedirs(directory, exist_ok=True)
+        self.__raw = {name: open(os.path.join(directory, f"{name}.bin"), "wb") for name in CHANNELS}
+        self.__files = {}
+        self.__carry = {name: [None] * (levels + 1) for name in CHANNELS}
+        self.__entries = [0] * (levels + 1)
+        self.__count = 0
+        self.__startTime = None
+        self.__step = None
+        self.__log.info(f"Writing waveform pyramid to {directory}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def __write(self, name : str, level : int, entries : np.ndarray) -> None:
+        if (name, level) not in self.__files:
+            self.__files[(name, level)] = open(os.path.join(self.__directory, f"{name}.L{level}.bin"), "wb")
+        self.__files[(name, level)].write(np.ascontiguousarray(entries, dtype="<f8").tobytes())
+
+    def __build(self, name : str, values : np.ndarray) -> None:
+        """
+        Fold new raw samples of one channel into every level of its pyramid.
+        """
+        entries = np.repeat(values[:, None], 3, axis=1)
+        for level in range(1, self.__levels + 1):
+            if self.__carry[name][level] is not None:
+                entries = np.concatenate([self.__carry[name][level], entries])
+            pairs = len(entries) // 2
+            self.__carry[name][level] = entries[2 * pairs:] if len(entries) % 2 else None
+            if pairs == 0:
+                return
+            even, odd = entries[0:2 * pairs:2], entries[1:2 * pairs:2]
+            entries = np.column_stack([np.minimum(even[:, 0], odd[:, 0]), np.maximum(even[:, 1], odd[:, 1]), 0.5 * (even[:, 2] + odd[:, 2])])
+            self.__write(name, level, entries)
+            if name == CHANNELS[0]:
+                self.__entries[level] += pairs
+
+    def append(self, results) -> None:
+        """
+        Append one chunk of uniformly sampled SimulationResults.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - results: The chunk to append, e.g. from Reactor.simulateChunks. Chunks must continue the time axis of the
+          previous ones with the same sample spacing.
+
+        Returns:
+        None
+
+        Raises:
+        ValueError: If the chunk is not uniformly sampled or does not continue the time axis.
+        """
+        time = results.getTime()
+        if len(time) == 0:
+            return
+        if not results.isUniform():
+            raise ValueError("The waveform pyramid needs uniformly sampled results")
+        if self.__startTime is None:
+            self.__startTime = float(time[0])
+        if self.__step is None and (len(time) > 1 or self.__count > 0):
+            self.__step = float(time[1] - time[0]) if len(time) > 1 else float(time[0]) - self.__startTime
+        if self.__step is not None and not np.isclose(time[0], self.__startTime + self.__count * self.__step, rtol=1e-9, atol=1e-6 * self.__step):
+            raise ValueError(f"Chunk starting at {time[0]}s does not continue the pyramid at {self.__startTime + self.__count * self.__step}s")
+
+        # The files hold every sample, so results with active windows are expanded one channel at a time.
+        channels = {"voltage": results.getVoltage, "intensity": results.getIntensity, "power": results.getPower, "charge": results.getCharge}
+        for name in CHANNELS:
+            values = np.asarray(channels[name](), dtype="<f8")
+            self.__raw[name].write(values.tobytes())
+            self.__build(name, values)
+        self.__count += len(time)
+
+    def close(self) -> None:
+        """
+        Write the metadata and close the files.
+
+        Returns:
+        None
+        """
+        if self.__raw is None:
+            return
+        for handle in list(self.__raw.values()) + list(self.__files.values()):
+            handle.close()
+        levels = [self.__count] + [count for count in self.__entries[1:] if count > 0]
+        with open(os.path.join(self.__directory, "meta.json"), "w") as target:
+            json.dump({"channels": list(CHANNELS), "startTime": self.__startTime or 0.0, "step": self.__step or 0.0,
+                       "count": self.__count, "levels": levels}, target)
+        self.__raw = None
+        self.__log.info(f"Waveform pyramid with {self.__count} samples and {len(levels) - 1} levels written")
+
+
+class WaveformPyramid:
+    """
+    Answers zoom queries on a waveform pyramid written by WaveformPyramidWriter.
+
+    Methods:
+    - __init__(directory: str): Open a pyramid directory.
+    - getChannels(): Get the names of the stored channels.
+    - getCount(): Get the number of raw samples per channel.
+    - getTimeRange(): Get the time of the first and the last sample.
+    - query(channel: str, startTime: float, stopTime: float, points: int = 1000): Get a time window reduced to a number of points.
+
+    A query picks the coarsest level that still has at least 8 * points entries inside the window and reads only those
+    entries through a memory map, plus the raw samples at both ends of the window that do not fill a whole block of
+    that level (fewer than 2^level each). Every bucket then spans at least 8 blocks, so snapping the bucket edges to
+    the blocks changes their width by well under a block. The cost of a query depends on points, not on the length of
+    the window or of the run.
+
+    Note: This class assumes the existence of the LoggerIfc class and the numpy library.
+    """
+    def __init__(self, directory : str) -> None:
+        """
+        Open a pyramid directory.
+
+        Parameters:
+        - directory: The directory written by WaveformPyramidWriter.
+
+        Returns:
+        None
+        """
+        self.__log = LoggerIfc("WaveformPyramid")
+        with open(os.path.join(directory, "meta.json")) as source:
+            meta = json.load(source)
+        self.__directory = directory
+        self.__channels = meta["channels"]
+        self.__startTime = meta["startTime"]
+        self.__step = meta["step"]
+        self.__levels = meta["levels"]
+        self.__maps = {}
+
+    def __map(self, channel : str, level : int) -> np.ndarray:
+        if (channel, level) not in self.__maps:
+            if level == 0:
+                path, shape = os.path.join(self.__directory, f"{channel}.bin"), (self.__levels[0],)
+            else:
+                path, shape = os.path.join(self.__directory, f"{channel}.L{level}.bin"), (self.__levels[level], 3)
+            self.__maps[(channel, level)] = np.memmap(path, dtype="<f8", mode="r", shape=shape) if shape[0] else np.zeros(shape)
+        return self.__maps[(channel, level)]
+
+    def getChannels(self) -> list:
+        return list(self.__channels)
+
+    def getCount(self) -> int:
+        return self.__levels[0]
+
+    def getTimeRange(self) -> tuple:
+        return self.__startTime, self.__startTime + max(self.__levels[0] - 1, 0) * self.__step
+
+    def query(self, channel : str, startTime : float, stopTime : float, points : int = 1000) -> dict:
+        """
+        Get a time window reduced to a number of points.
+
+        Parameters:
+        - self: The instance of the class calling this method.
+        - channel: The channel name, one of getChannels().
+        - startTime: The start of the window in seconds (inclusive).
+        - stopTime: The end of the window in seconds (inclusive).
+        - points: The maximum number of points to return. The window is split into points buckets of equal duration;
+          every raw sample or block of the level that is read goes to the bucket its centre falls into, so the bucket
+          widths are equal to within one block (default: 1000).
+
+        Returns:
+        A dictionary with the arrays "time" (centre of the samples of every point), "edges" (the bucket boundaries, one
+        more than points; every sample stands for the interval of one sample spacing around it), "min", "max" and
+        "mean" and the "level" that was read. Windows with at most points samples are returned at full resolution, with
+        min = max = mean.
+
+        Raises:
+        KeyError: If the channel is unknown.
+        """
+        if channel not in self.__channels:
+            raise KeyError(f"Unknown channel {channel}, expected one of {self.__channels}")
+        count = self.__levels[0]
+        first = int(np.clip(np.ceil((startTime - self.__startTime) / self.__step - 1e-9), 0, count)) if self.__step else 0
+        stop = int(np.clip(np.floor((stopTime - self.__startTime) / self.__step + 1e-9) + 1, first, count)) if self.__step else count
+        samples = stop - first
+        level = 0
+        while level + 1 < len(self.__levels) and samples >> (level + 1) >= 8 * points:
+            level += 1
+
+        if level == 0:
+            raw = np.asarray(self.__map(channel, 0)[first:stop])
+            time = self.__startTime + np.arange(first, stop) * self.__step
+            if samples <= points:
+                edges = self.__startTime + (np.arange(first, stop + 1) - 0.5) * self.__step
+                return {"time": time, "edges": edges, "min": raw, "max": raw, "mean": raw, "level": 0}
+            low, high, total, weight = raw, raw, raw, np.ones(samples)
+        else:
+            block = 1 << level
+            blockFirst = min(-(-first // block), self.__levels[level])
+            blockStop = max(min(stop // block, self.__levels[level]), blockFirst)
+            entries = np.asarray(self.__map(channel, level)[blockFirst:blockStop])
+            head = np.asarray(self.__map(channel, 0)[first:min(blockFirst * block, stop)])
+            tail = np.asarray(self.__map(channel, 0)[max(blockStop * block, first + len(head)):stop])
+            low = np.concatenate([head, entries[:, 0], tail])
+            high = np.concatenate([head, entries[:, 1], tail])
+            weight = np.concatenate([np.ones(len(head)), np.full(len(entries), float(block)), np.ones(len(tail))])
+            total = np.concatenate([head, entries[:, 2] * block, tail])
+
+        # Positions are in samples from the start of the window; sample j covers [j, j + 1).
+        position = np.cumsum(weight) - 0.5 * weight
+        edges = np.linspace(0.0, float(samples), points + 1)
+        bounds = np.searchsorted(position, edges[:-1])
+        counts = np.add.reduceat(weight, bounds)
+        return {"time": self.__startTime + (first + np.add.reduceat(position * weight, bounds) / counts - 0.5) * self.__step,
+                "edges": self.__startTime + (first + edges - 0.5) * self.__step,
+                "min": np.minimum.reduceat(low, bounds), "max": np.maximum.reduceat(high, bounds),
+                "mean": np.add.reduceat(total, bounds) / counts, "level": level}